@@ -24,6 +24,7 @@ def create_app(config_name='default'):
         app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
         app.config['UPLOAD_FOLDER'] = os.path.join(app.static_folder, 'uploads')
         app.config['OPENAI_API_KEY'] = os.getenv('OPENAI_API_KEY', '')
+        app.config['WARM_UP_MODELS'] = os.getenv('WARM_UP_MODELS', '').lower() in ('1', 'true', 'yes')
         app.config['DEBUG'] = True
     
     # Ensure SQLALCHEMY_DATABASE_URI is set
@@ -42,6 +43,15 @@ def create_app(config_name='default'):
     
     # Initialize extensions
     db.init_app(app)
+    
+    # One arXiv client per process so search, citations and the harvester share its rate limit
+    from app.services.arxiv_client import DEFAULT_API_URL, configure_arxiv_client
+    configure_arxiv_client(
+        api_url=app.config.get('ARXIV_API_URL', DEFAULT_API_URL),
+        request_interval=app.config.get('ARXIV_REQUEST_INTERVAL', 3.0),
+        max_retries=app.config.get('ARXIV_MAX_RETRIES', 3),
+        pool_size=app.config.get('ARXIV_POOL_SIZE', 10)
+    )
     login_manager.init_app(app)
     
     # Fix Flask-Login user_loader issue
@@ -62,9 +72,41 @@ def create_app(config_name='default'):
     app.register_blueprint(search_bp, url_prefix='/search')
     
     # Create database tables
+    from app import models  # noqa: F401  (registers models with SQLAlchemy)
     with app.app_context():
         db.create_all()
     
+    # Optionally start loading search models in the background so the first request is fast
+    if app.config.get('WARM_UP_MODELS'):
+        from app.routes.search import warm_up_search_service
+        warm_up_search_service(app)
+    
+    # Optionally keep the local paper store up to date from arXiv in the background
+    if app.config.get('HARVEST_INTERVAL'):
+        from app.routes.search import get_search_service
+        from app.services.harvester import start_background_harvester
+        start_background_harvester(app, get_search_service, app.config.get('HARVEST_CATEGORIES', []),
+                                   app.config['HARVEST_INTERVAL'])
+    
+    @app.cli.command('harvest')
+    def harvest_command():
+        """Pull new and updated arXiv papers into the local paper store."""
+        from app.routes.search import get_search_service
+        from app.services.harvester import ArxivHarvester
+        harvester = ArxivHarvester(
+            search_service=get_search_service(),
+            page_size=app.config.get('HARVEST_PAGE_SIZE', 100),
+            initial_days=app.config.get('HARVEST_INITIAL_DAYS', 14)
+        )
+        for category, count in harvester.harvest(app.config.get('HARVEST_CATEGORIES', ['cs.LG'])).items():
+            print(f"{category}: {count} new or updated papers")
+    
+    @app.cli.command('rebuild-trending')
+    def rebuild_trending_command():
+        """Recompute the per-category daily paper counts behind trending topics."""
+        from app.services.trending import rebuild_daily_counts
+        print(f"Rebuilt {rebuild_daily_counts()} daily category counts")
+    
     # Log successful app creation
     app.logger.info(f"Research AI Flask app created with config: {config_name}")
     
@@ -0,0 +1,51 @@
+from app import db
+from typing import Dict, Any
+
+class Paper(db.Model):
+    """arXiv paper metadata stored locally for offline search."""
+    __tablename__ = 'papers'
+
+    arxiv_id = db.Column(db.String(32), primary_key=True)  # Versioned ID, e.g. 1706.03762v7
+    base_id = db.Column(db.String(32), index=True)  # ID without version, e.g. 1706.03762
+    title = db.Column(db.Text, nullable=False)
+    abstract = db.Column(db.Text, nullable=False, default='')
+    authors = db.Column(db.Text, nullable=False, default='')  # Comma separated
+    categories = db.Column(db.String(255), nullable=False, default='')  # Space separated
+    published = db.Column(db.DateTime, index=True)
+    updated = db.Column(db.DateTime, index=True)
+    pdf_url = db.Column(db.String(255))
+    abs_url = db.Column(db.String(255))
+    doi = db.Column(db.String(255))
+    journal_ref = db.Column(db.Text)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'title': self.title,
+            'authors': self.authors,
+            'abstract': self.abstract,
+            'arxiv_id': self.arxiv_id,
+            'published_date': self.published.strftime('%Y-%m-%d') if self.published else None,
+            'updated_date': self.updated.strftime('%Y-%m-%d') if self.updated else None,
+            'categories': self.categories.split() if self.categories else [],
+            'pdf_url': self.pdf_url,
+            'abs_url': self.abs_url,
+            'doi': self.doi,
+            'journal_ref': self.journal_ref
+        }
+
+class HarvestCheckpoint(db.Model):
+    """Per-category progress of the arXiv harvester, so interrupted runs resume where they stopped."""
+    __tablename__ = 'harvest_checkpoints'
+
+    category = db.Column(db.String(32), primary_key=True)
+    last_updated = db.Column(db.DateTime)  # lastUpdatedDate of the newest entry stored so far
+    last_run = db.Column(db.DateTime)
+    papers_harvested = db.Column(db.Integer, nullable=False, default=0)
+
+class CategoryDailyCount(db.Model):
+    """Number of locally stored papers per category and submission day, kept up to date by the harvester."""
+    __tablename__ = 'category_daily_counts'
+
+    category = db.Column(db.String(32), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
@@ -1,6 +1,10 @@
 from flask import Blueprint, render_template, request, jsonify, current_app, send_file
 from app.services.pdf_processor import PDFProcessor
 from app.services.ai_service import AIService
+from app.services.document_store import DocumentStore, content_hash
+from app.services.ingestion import IngestionQueue
+from app.services.cache_store import SQLiteCache
+from app.services.llm_cache import LLMResponseCache
 import logging
 import os
 import uuid
@@ -11,7 +15,6 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
-import hashlib
 
 logger = logging.getLogger(__name__)
 paper_analysis_bp = Blueprint("paper_analysis", __name__)
@@ -19,6 +22,24 @@ paper_analysis_bp = Blueprint("paper_analysis", __name__)
 # Initialize services
 pdf_processor = None
 ai_service = None
+document_store = None
+ingestion_queue = None
+response_cache = None
+
+def get_response_cache():
+    """LLM responses keyed on provider, model, prompt and parameters, shared by all workers."""
+    global response_cache
+    if response_cache is None and current_app.config.get('LLM_CACHE_ENABLED', True):
+        response_cache = LLMResponseCache(
+            os.path.join(current_app.config.get('CACHE_DIR', 'cache'), 'cache.db'),
+            ttl=current_app.config.get('LLM_CACHE_TTL', 7 * 86400),
+            max_entries=current_app.config.get('LLM_CACHE_SIZE', 10000)
+        )
+    return response_cache
+
+def use_cache_arg(data):
+    """Per-request opt-out of the LLM response cache: ``"use_cache": false`` in the JSON body."""
+    return bool((data or {}).get('use_cache', True))
 
 def get_services():
     global pdf_processor, ai_service
@@ -30,10 +51,52 @@ def get_services():
             logger.error("No AI API keys configured")
             return None, None
             
-        pdf_processor = PDFProcessor(openai_api_key, google_api_key)
-        ai_service = AIService(openai_api_key) if openai_api_key else None
+        pdf_processor = PDFProcessor(openai_api_key, google_api_key,
+                                     inference_backend=current_app.config.get('INFERENCE_BACKEND', 'torch'),
+                                     extract_workers=current_app.config.get('PDF_EXTRACT_WORKERS'),
+                                     parallel_min_pages=current_app.config.get('PDF_PARALLEL_MIN_PAGES', 16),
+                                     page_timeout=current_app.config.get('PDF_PAGE_TIMEOUT', 20),
+                                     embed_chunk_tokens=current_app.config.get('EMBED_CHUNK_TOKENS', 256),
+                                     embed_chunk_overlap=current_app.config.get('EMBED_CHUNK_OVERLAP', 32),
+                                     context_chunk_tokens=current_app.config.get('CONTEXT_CHUNK_TOKENS', 2000),
+                                     context_chunk_overlap=current_app.config.get('CONTEXT_CHUNK_OVERLAP', 200),
+                                     summary_mode=current_app.config.get('SUMMARY_MODE', 'map_reduce'),
+                                     summary_concurrency=current_app.config.get('SUMMARY_CONCURRENCY', 4),
+                                     summary_cache=SQLiteCache(
+                                         os.path.join(current_app.config.get('CACHE_DIR', 'cache'), 'cache.db'),
+                                         'chunk_summaries', ttl=current_app.config.get('SUMMARY_CACHE_TTL', 7 * 86400),
+                                         max_entries=current_app.config.get('SUMMARY_CACHE_SIZE', 20000)),
+                                     response_cache=get_response_cache())
+        ai_service = AIService(openai_api_key, response_cache=get_response_cache()) if openai_api_key else None
     return pdf_processor, ai_service
 
+def get_document_store():
+    """Processed uploads and their sessions, on disk under CACHE_DIR and shared by all workers."""
+    global document_store
+    if document_store is None:
+        cache_dir = current_app.config.get('CACHE_DIR', 'cache')
+        document_store = DocumentStore(
+            os.path.join(cache_dir, 'uploads'),
+            memory_budget=current_app.config.get('SESSION_MEMORY_BUDGET_MB', 256) * 1024 * 1024,
+            session_ttl=current_app.config.get('SESSION_TTL', 86400),
+            preview_chars=current_app.config.get('UPLOAD_PREVIEW_CHARS', 500)
+        )
+    return document_store
+
+def get_ingestion_queue():
+    """Background PDF ingestion jobs; their status is shared by all workers."""
+    global ingestion_queue
+    if ingestion_queue is None:
+        uploads_dir = os.path.join(current_app.config.get('CACHE_DIR', 'cache'), 'uploads')
+        os.makedirs(uploads_dir, exist_ok=True)
+        ingestion_queue = IngestionQueue(
+            os.path.join(uploads_dir, 'jobs.db'),
+            workers=current_app.config.get('INGEST_WORKERS', 2),
+            max_queued=current_app.config.get('INGEST_MAX_QUEUED', 50),
+            job_timeout=current_app.config.get('INGEST_JOB_TIMEOUT', 1800)
+        )
+    return ingestion_queue
+
 def allowed_file(filename):
     ALLOWED_EXTENSIONS = {'pdf'}
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -96,49 +159,125 @@ def upload_pdf():
         if not pdf_proc:
             return jsonify({'error': 'Services not available. Please check configuration.'}), 500
         
-        logger.info(f"Processing PDF: {pdf_file.filename}")
-        
-        # Extract text from PDF
-        text = pdf_proc.extract_text_from_pdf(pdf_file)
-        if not text:
-            return jsonify({'error': 'Could not extract text from PDF'}), 400
-        
-        # Split text into chunks
-        chunks = pdf_proc.split_text_into_chunks(text)
-        if not chunks:
-            return jsonify({'error': 'Could not process text chunks'}), 400
-        
-        # Create vector store
-        vector_store = pdf_proc.create_vector_store(chunks)
-        if not vector_store:
-            return jsonify({'error': 'Could not create vector store'}), 500
-        
-        # Store vector store in session or cache for later use
-        # For now, we'll store it in a simple way - in production you'd use Redis or similar
-        session_id = hashlib.md5(f"{pdf_file.filename}_{text[:100]}".encode()).hexdigest()
-        
-        # Store in a simple in-memory cache (not recommended for production)
-        if not hasattr(current_app, 'vector_stores'):
-            current_app.vector_stores = {}
-        if not hasattr(current_app, 'document_texts'):
-            current_app.document_texts = {}
-            
-        current_app.vector_stores[session_id] = vector_store
-        current_app.document_texts[session_id] = text  # Store the original text
+        # Uploads are addressed by their bytes, so a repeated file skips processing entirely
+        data = pdf_file.read()
+        job_id = get_ingestion_queue().submit(pdf_file.filename, data, content_hash(data), pdf_proc, get_document_store())
+        if job_id is None:
+            return jsonify({'error': 'Too many documents are being processed. Please try again shortly.'}), 503
         
+        # Compact response: counts and a preview; text and chunks are fetched by range
+        job = get_ingestion_queue().get(job_id)
+        done = job['status'] == 'done'
+        info = get_document_store().info(job['session_id']) if done else None
         return jsonify({
             'success': True,
-            'text': text,
-            'chunks': chunks,
-            'session_id': session_id,
+            'job_id': job_id,
+            'status': job['status'],
+            'session_id': job['session_id'],
+            'document_hash': job['document_hash'],
+            **(info or {}),
             'filename': pdf_file.filename,
-            'message': 'PDF processed successfully'
-        })
+            'message': 'PDF processed successfully' if done else 'PDF queued for processing'
+        }), 200 if done else 202
         
     except Exception as e:
         logger.error(f"Error uploading PDF: {str(e)}")
         return jsonify({'error': f'Error uploading PDF: {str(e)}'}), 500
 
+@paper_analysis_bp.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Stage, progress and timings of an upload; includes the session ID once processing is done."""
+    job = get_ingestion_queue().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job['status'] == 'done':
+        job.update(get_document_store().info(job['session_id']) or {})
+    return jsonify({'success': True, **job})
+
+@paper_analysis_bp.route('/jobs/stats')
+def job_stats():
+    """Ingestion queue depth and mean per-stage timings."""
+    return jsonify({'success': True, 'stats': get_ingestion_queue().stats(), 'documents': get_document_store().stats()})
+
+def _range_arg(name, default, maximum, minimum=0):
+    value = request.args.get(name)
+    if value is None:
+        value = default
+    else:
+        try:
+            value = int(value)
+        except ValueError:
+            raise ValueError(f"'{name}' must be an integer")
+    if value < minimum:
+        raise ValueError(f"'{name}' must be at least {minimum}")
+    return min(value, maximum) if maximum is not None else value
+
+@paper_analysis_bp.route('/session/<session_id>/text')
+def session_text(session_id):
+    """A character range of the extracted text: ``offset`` and ``limit`` query parameters."""
+    try:
+        offset = _range_arg('offset', 0, None)
+        limit = _range_arg('limit', current_app.config.get('TEXT_PAGE_SIZE', 20000),
+                           current_app.config.get('TEXT_PAGE_MAX', 200000), minimum=1)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    document = get_document_store().get(session_id)
+    if document is None:
+        return jsonify({'error': 'Document session expired. Please upload the document again.'}), 404
+    
+    text = document['text']
+    end = min(offset + limit, len(text))
+    return jsonify({
+        'success': True,
+        'text': text[offset:end],
+        'offset': offset,
+        'total_length': len(text),
+        'next_offset': end if end < len(text) else None
+    })
+
+@paper_analysis_bp.route('/session/<session_id>/chunks')
+def session_chunks(session_id):
+    """A slice of the document's chunks: ``start`` and ``limit`` query parameters."""
+    try:
+        start = _range_arg('start', 0, None)
+        limit = _range_arg('limit', current_app.config.get('CHUNK_PAGE_SIZE', 50),
+                           current_app.config.get('CHUNK_PAGE_MAX', 500), minimum=1)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    document = get_document_store().get(session_id)
+    if document is None:
+        return jsonify({'error': 'Document session expired. Please upload the document again.'}), 404
+    
+    chunks = document['chunks']
+    end = min(start + limit, len(chunks))
+    return jsonify({
+        'success': True,
+        'chunks': chunks[start:end],
+        'start': start,
+        'total': len(chunks),
+        'next_start': end if end < len(chunks) else None
+    })
+
+@paper_analysis_bp.route('/llm-cache/stats')
+def llm_cache_stats():
+    """Hit rate of the LLM response cache and of the section-summary cache."""
+    pdf_proc, _ = get_services()
+    cache = get_response_cache()
+    return jsonify({
+        'success': True,
+        'responses': cache.stats() if cache is not None else None,
+        'section_summaries': pdf_proc.summarizer.cache.stats() if pdf_proc and pdf_proc.summarizer.cache is not None else None
+    })
+
+@paper_analysis_bp.route('/session/<session_id>', methods=['DELETE'])
+def close_session(session_id):
+    """Release a document session; its artifacts are freed once no other session uses them."""
+    if not get_document_store().release_session(session_id):
+        return jsonify({'error': 'Session not found'}), 404
+    return jsonify({'success': True, 'message': 'Session closed'})
+
 @paper_analysis_bp.route('/generate-summary', methods=['POST'])
 def generate_summary():
     try:
@@ -153,18 +292,16 @@ def generate_summary():
         if not pdf_proc:
             return jsonify({'error': 'Services not available. Please check configuration.'}), 500
         
-        # Retrieve vector store from cache to get the original text
-        if not hasattr(current_app, 'vector_stores') or session_id not in current_app.vector_stores:
+        # Retrieve the session's document to get the original text
+        document = get_document_store().get(session_id)
+        if document is None:
             return jsonify({'error': 'Document session expired. Please upload the document again.'}), 400
         
-        if not hasattr(current_app, 'document_texts') or session_id not in current_app.document_texts:
-            return jsonify({'error': 'Document text not found. Please upload the document again.'}), 400
-        
         # Get the original text
-        original_text = current_app.document_texts[session_id]
+        original_text = document['text']
         
         logger.info("Generating document summary")
-        summary = pdf_proc.generate_summary(original_text)
+        summary = pdf_proc.generate_summary(original_text, use_cache=use_cache_arg(data))
         
         return jsonify({
             'success': True,
@@ -194,16 +331,17 @@ def answer_question():
         if not pdf_proc:
             return jsonify({'error': 'Services not available. Please check configuration.'}), 500
         
-        # Retrieve vector store from cache
-        if not hasattr(current_app, 'vector_stores') or session_id not in current_app.vector_stores:
+        # Retrieve vector store from the session's document
+        document = get_document_store().get(session_id)
+        if document is None:
             return jsonify({'error': 'Document session expired. Please upload the document again.'}), 400
         
-        vector_store = current_app.vector_stores[session_id]
+        vector_store = document['vector_store']
         
         logger.info(f"Answering question: {question[:50]}...")
         
         # Answer question
-        answer = pdf_proc.answer_question(question, vector_store)
+        answer = pdf_proc.answer_question(question, vector_store, use_cache=use_cache_arg(data))
         
         return jsonify({
             'success': True,
@@ -233,7 +371,7 @@ def analyze_structure():
         logger.info("Analyzing paper structure")
         
         # Analyze paper structure
-        result = ai_svc.analyze_paper_structure(text)
+        result = ai_svc.analyze_paper_structure(text, use_cache=use_cache_arg(data))
         
         if not result['success']:
             return jsonify(result), 400
@@ -261,7 +399,7 @@ def extract_key_info():
         logger.info("Extracting key information")
         
         # Extract key information
-        key_info = pdf_proc.extract_key_information(text)
+        key_info = pdf_proc.extract_key_information(text, use_cache=use_cache_arg(data))
         
         return jsonify({
             'success': True,
@@ -291,7 +429,7 @@ def generate_insights():
         logger.info(f"Generating insights for topic: {topic}")
         
         # Generate research insights
-        result = ai_svc.generate_research_insights(topic, context)
+        result = ai_svc.generate_research_insights(topic, context, use_cache=use_cache_arg(data))
         
         if not result['success']:
             return jsonify(result), 400
@@ -320,7 +458,7 @@ def suggest_questions():
         logger.info(f"Suggesting research questions for topic: {topic}")
         
         # Suggest research questions
-        result = ai_svc.suggest_research_questions(topic, context)
+        result = ai_svc.suggest_research_questions(topic, context, use_cache=use_cache_arg(data))
         
         if not result['success']:
             return jsonify(result), 400
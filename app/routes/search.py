@@ -1,12 +1,63 @@
-from flask import Blueprint, render_template, request, jsonify
+from flask import Blueprint, render_template, request, jsonify, current_app, Response, stream_with_context
 from app.services.search_service import SearchService
+import json
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 search_bp = Blueprint("search", __name__)
 
-# Initialize search service
-search_service = SearchService()
+# Search service is created on first use; its models load lazily or via warm_up()
+search_service = None
+_search_service_lock = threading.Lock()
+
+def get_search_service():
+    global search_service
+    if search_service is None:
+        with _search_service_lock:
+            if search_service is None:
+                search_service = SearchService(
+                    cache_dir=current_app.config.get('CACHE_DIR'),
+                    embedding_cache_size=current_app.config.get('EMBEDDING_CACHE_SIZE', 100000),
+                    local_min_score=current_app.config.get('LOCAL_INDEX_MIN_SCORE'),
+                    arxiv_concurrency=current_app.config.get('ARXIV_CONCURRENCY', 3),
+                    trending_ttl=current_app.config.get('TRENDING_TTL', 1800),
+                    details_ttl=current_app.config.get('PAPER_DETAILS_TTL', 86400),
+                    summary_cache_size=current_app.config.get('ABSTRACT_SUMMARY_CACHE_SIZE', 100000),
+                    inference_backend=current_app.config.get('INFERENCE_BACKEND', 'torch'),
+                    query_cache_size=current_app.config.get('QUERY_CACHE_SIZE', 1024),
+                    query_cache_ttl=current_app.config.get('QUERY_CACHE_TTL', 3600),
+                    query_cache_shared=current_app.config.get('QUERY_CACHE_SHARED', False),
+                    retrieval_mode=current_app.config.get('RETRIEVAL_MODE', 'direct'),
+                    rerank_pool_factor=current_app.config.get('RERANK_POOL_FACTOR', 10),
+                    rerank_max_pool=current_app.config.get('RERANK_MAX_POOL', 200),
+                    rerank_latency_budget=current_app.config.get('RERANK_LATENCY_BUDGET', 10.0),
+                    hybrid_search=current_app.config.get('HYBRID_SEARCH', True),
+                    lexical_candidates=current_app.config.get('LEXICAL_CANDIDATES', 100),
+                    vector_storage=current_app.config.get('VECTOR_STORAGE', 'float32'),
+                    pq_subvectors=current_app.config.get('PQ_SUBVECTORS', 96),
+                    app=current_app._get_current_object()
+                )
+    return search_service
+
+def warm_up_search_service(app):
+    """Load search models in a background thread so workers start fast but are ready before traffic."""
+    with app.app_context():
+        service = get_search_service()
+    thread = threading.Thread(target=service.warm_up, name="search-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+def max_results_arg(data):
+    """``max_results`` from a request, defaulted and clamped to MAX_SEARCH_RESULTS; raises ValueError if invalid."""
+    value = data.get('max_results', current_app.config.get('DEFAULT_MAX_RESULTS', 5))
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("max_results must be a positive integer")
+    if value < 1:
+        raise ValueError("max_results must be a positive integer")
+    return min(value, current_app.config.get('MAX_SEARCH_RESULTS', 20))
 
 @search_bp.route('/')
 def search_page():
@@ -18,15 +69,23 @@ def search_papers():
         data = request.get_json()
         query = data.get('query', '')
         category = data.get('category', 'cs.LG')
-        max_results = data.get('max_results', 5)
+        mode = data.get('mode')
         
         if not query:
             return jsonify({'error': 'Search query is required'}), 400
         
+        try:
+            max_results = max_results_arg(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if mode not in (None, 'direct', 'rerank'):
+            return jsonify({'error': "Mode must be 'direct' or 'rerank'"}), 400
+        
         logger.info(f"Searching for papers with query: {query}, category: {category}")
         
         # Use real search service
-        similar_papers = search_service.find_similar_papers(query, category, max_results)
+        similar_papers = get_search_service().find_similar_papers(query, category, max_results, mode=mode)
         
         if not similar_papers:
             return jsonify({
@@ -48,24 +107,75 @@ def search_papers():
         logger.error(f"Error searching papers: {str(e)}")
         return jsonify({'error': f'Error searching papers: {str(e)}'}), 500
 
+def _sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@search_bp.route('/search-papers/stream', methods=['GET', 'POST'])
+def stream_search_papers():
+    """Stream scored papers as Server-Sent Events, followed by a final ranking event."""
+    data = request.get_json(silent=True) or request.args
+    query = data.get('query', '')
+    category = data.get('category', 'cs.LG')
+    mode = data.get('mode')
+    
+    if not query:
+        return jsonify({'error': 'Search query is required'}), 400
+    
+    try:
+        max_results = max_results_arg(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if mode not in (None, 'direct', 'rerank'):
+        return jsonify({'error': "Mode must be 'direct' or 'rerank'"}), 400
+    
+    logger.info(f"Streaming search for papers with query: {query}, category: {category}")
+    service = get_search_service()
+    batch_size = current_app.config.get('STREAM_SUMMARY_BATCH_SIZE', 1)
+    
+    def generate():
+        try:
+            for event, payload in service.iter_similar_papers(query, category, max_results,
+                                                                  summary_batch_size=batch_size, mode=mode):
+                if event == 'paper':
+                    yield _sse_event('paper', payload)
+                else:
+                    yield _sse_event('ranking', {
+                        'success': True,
+                        'papers': payload,
+                        'query': query,
+                        'total_results': len(payload),
+                        'message': f'Found {len(payload)} papers related to "{query}"' if payload else f'No papers found for "{query}"'
+                    })
+        except Exception as e:
+            logger.error(f"Error streaming papers: {str(e)}")
+            yield _sse_event('error', {'error': f'Error searching papers: {str(e)}'})
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @search_bp.route('/find-similar', methods=['POST'])
 def find_similar_papers():
     try:
         data = request.get_json()
         paper_title = data.get('paper_title', '')
         paper_abstract = data.get('paper_abstract', '')
-        max_results = data.get('max_results', 5)
         
         if not paper_title and not paper_abstract:
             return jsonify({'error': 'Paper title or abstract is required'}), 400
         
+        try:
+            max_results = max_results_arg(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         # Combine title and abstract for search
         search_text = f"{paper_title} {paper_abstract}".strip()
         
         logger.info(f"Finding similar papers for: {paper_title[:50]}...")
         
         # Use real search service
-        similar_papers = search_service.find_similar_papers(search_text, max_results=max_results)
+        similar_papers = get_search_service().find_similar_papers(search_text, max_results=max_results)
         
         return jsonify({
             'success': True,
@@ -84,7 +194,7 @@ def get_trending_topics():
         logger.info("Fetching trending topics")
         
         # Use real search service
-        trending_topics = search_service.get_trending_topics()
+        trending_topics = get_search_service().get_trending_topics()
         
         logger.info(f"Retrieved {len(trending_topics)} trending topics")
         
@@ -158,7 +268,7 @@ def get_paper_details():
         logger.info(f"Fetching details for paper: {arxiv_id}")
         
         # Use real search service
-        paper_details = search_service.get_paper_details(arxiv_id)
+        paper_details = get_search_service().get_paper_details(arxiv_id)
         
         if not paper_details:
             return jsonify({
@@ -173,4 +283,52 @@ def get_paper_details():
         })
     except Exception as e:
         logger.error(f"Error fetching paper details: {str(e)}")
-        return jsonify({'error': f'Error fetching paper details: {str(e)}'}), 500 
\ No newline at end of file
+        return jsonify({'error': f'Error fetching paper details: {str(e)}'}), 500 
+
+@search_bp.route('/papers-details', methods=['POST'])
+def get_papers_details():
+    try:
+        data = request.get_json()
+        arxiv_ids = data.get('arxiv_ids', [])
+        max_ids = current_app.config.get('MAX_BULK_DETAILS', 100)
+        
+        if not arxiv_ids or not isinstance(arxiv_ids, list):
+            return jsonify({'error': 'A list of ArXiv IDs is required'}), 400
+        
+        if not all(isinstance(arxiv_id, str) and arxiv_id.strip() for arxiv_id in arxiv_ids):
+            return jsonify({'error': 'ArXiv IDs must be non-empty strings'}), 400
+        
+        if len(arxiv_ids) > max_ids:
+            return jsonify({'error': f'Maximum {max_ids} ArXiv IDs allowed per request'}), 400
+        
+        logger.info(f"Fetching details for {len(arxiv_ids)} papers")
+        
+        results = get_search_service().get_papers_details(arxiv_ids)
+        found = sum(1 for result in results if result['success'])
+        
+        return jsonify({
+            'success': True,
+            'papers': results,
+            'total_results': found,
+            'message': f'Retrieved details for {found} of {len(arxiv_ids)} papers'
+        })
+    except Exception as e:
+        logger.error(f"Error fetching paper details: {str(e)}")
+        return jsonify({'error': f'Error fetching paper details: {str(e)}'}), 500
+
+@search_bp.route('/ready', methods=['GET'])
+def readiness():
+    service = get_search_service()
+    status = {
+        'ready': service.is_ready,
+        'loading': service.loading
+    }
+    return jsonify(status), (200 if service.is_ready else 503)
+
+@search_bp.route('/cache-stats', methods=['GET'])
+def cache_stats():
+    service = get_search_service()
+    return jsonify({
+        'success': True,
+        'query_cache': service.query_cache.stats()
+    })
@@ -3,15 +3,39 @@ import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from openai import OpenAI
+from app.services.llm_cache import LLMResponseCache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MODEL = "gpt-3.5-turbo"
+
 class AIService:
-    def __init__(self, openai_api_key: str):
+    def __init__(self, openai_api_key: str, response_cache: Optional[LLMResponseCache] = None):
         self.openai_api_key = openai_api_key
+        self.response_cache = response_cache
     
-    def generate_research_insights(self, topic: str, context: str = "") -> Dict[str, Any]:
+    def _chat(self, system_prompt: str, prompt: str, max_tokens: int, temperature: float, use_cache: bool = True) -> str:
+        """Run one chat completion, served from the response cache when an identical request was made before."""
+        def call():
+            client = OpenAI(api_key=self.openai_api_key)
+            response = client.chat.completions.create(
+                model=MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=max_tokens,
+                temperature=temperature
+            )
+            return response.choices[0].message.content.strip()
+        
+        if self.response_cache is None:
+            return call()
+        params = {'system': system_prompt, 'max_tokens': max_tokens, 'temperature': temperature}
+        return self.response_cache.complete('openai', MODEL, prompt, params, call, use_cache=use_cache)
+    
+    def generate_research_insights(self, topic: str, context: str = "", use_cache: bool = True) -> Dict[str, Any]:
         """Generate research insights and analysis for a given topic."""
         try:
             prompt = f"""
@@ -30,19 +54,10 @@ class AIService:
             Provide a well-structured analysis with specific examples and actionable insights.
             """
             
-            client = OpenAI(api_key=self.openai_api_key)
-            
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert research analyst with deep knowledge across multiple academic domains."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=2000,
-                temperature=0.7
+            insights = self._chat(
+                "You are an expert research analyst with deep knowledge across multiple academic domains.",
+                prompt, max_tokens=2000, temperature=0.7, use_cache=use_cache
             )
-            
-            insights = response.choices[0].message.content.strip()
             logger.info(f"Generated research insights for topic: {topic}")
             
             return {
@@ -50,7 +65,7 @@ class AIService:
                 'topic': topic,
                 'insights': insights,
                 'generated_at': datetime.now().isoformat(),
-                'model': 'gpt-3.5-turbo'
+                'model': MODEL
             }
             
         except Exception as e:
@@ -61,7 +76,7 @@ class AIService:
                 'topic': topic
             }
     
-    def analyze_paper_structure(self, paper_text: str) -> Dict[str, Any]:
+    def analyze_paper_structure(self, paper_text: str, use_cache: bool = True) -> Dict[str, Any]:
         """Analyze the structure and key components of a research paper."""
         try:
             prompt = f"""
@@ -84,19 +99,10 @@ class AIService:
             Provide a structured analysis with clear sections and bullet points.
             """
             
-            client = OpenAI(api_key=self.openai_api_key)
-            
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert at analyzing academic paper structure and content."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=2000,
-                temperature=0.3
+            analysis = self._chat(
+                "You are an expert at analyzing academic paper structure and content.",
+                prompt, max_tokens=2000, temperature=0.3, use_cache=use_cache
             )
-            
-            analysis = response.choices[0].message.content.strip()
             logger.info("Paper structure analysis completed")
             
             return {
@@ -114,7 +120,7 @@ class AIService:
                 'text_length': len(paper_text)
             }
     
-    def generate_literature_review(self, topic: str, papers: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def generate_literature_review(self, topic: str, papers: List[Dict[str, Any]], use_cache: bool = True) -> Dict[str, Any]:
         """Generate a literature review based on multiple papers."""
         try:
             # Prepare paper summaries
@@ -145,19 +151,10 @@ class AIService:
             Write a well-structured literature review that synthesizes the key findings and identifies research opportunities.
             """
             
-            client = OpenAI(api_key=self.openai_api_key)
-            
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert at writing comprehensive literature reviews."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=2500,
-                temperature=0.4
+            literature_review = self._chat(
+                "You are an expert at writing comprehensive literature reviews.",
+                prompt, max_tokens=2500, temperature=0.4, use_cache=use_cache
             )
-            
-            literature_review = response.choices[0].message.content.strip()
             logger.info(f"Generated literature review for topic: {topic}")
             
             return {
@@ -176,7 +173,7 @@ class AIService:
                 'topic': topic
             }
     
-    def suggest_research_questions(self, topic: str, context: str = "") -> Dict[str, Any]:
+    def suggest_research_questions(self, topic: str, context: str = "", use_cache: bool = True) -> Dict[str, Any]:
         """Suggest research questions for a given topic."""
         try:
             prompt = f"""
@@ -201,19 +198,10 @@ class AIService:
             Generate 10-15 high-quality research questions.
             """
             
-            client = OpenAI(api_key=self.openai_api_key)
-            
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert at formulating research questions across various academic domains."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=2000,
-                temperature=0.6
+            questions = self._chat(
+                "You are an expert at formulating research questions across various academic domains.",
+                prompt, max_tokens=2000, temperature=0.6, use_cache=use_cache
             )
-            
-            questions = response.choices[0].message.content.strip()
             logger.info(f"Generated research questions for topic: {topic}")
             
             return {
@@ -231,7 +219,7 @@ class AIService:
                 'topic': topic
             }
     
-    def analyze_research_trends(self, field: str, time_period: str = "recent") -> Dict[str, Any]:
+    def analyze_research_trends(self, field: str, time_period: str = "recent", use_cache: bool = True) -> Dict[str, Any]:
         """Analyze research trends in a specific field."""
         try:
             prompt = f"""
@@ -250,19 +238,10 @@ class AIService:
             Provide a comprehensive analysis with specific examples and data points where possible.
             """
             
-            client = OpenAI(api_key=self.openai_api_key)
-            
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert at analyzing research trends and patterns across academic fields."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=2000,
-                temperature=0.5
+            trends_analysis = self._chat(
+                "You are an expert at analyzing research trends and patterns across academic fields.",
+                prompt, max_tokens=2000, temperature=0.5, use_cache=use_cache
             )
-            
-            trends_analysis = response.choices[0].message.content.strip()
             logger.info(f"Analyzed research trends for field: {field}")
             
             return {
@@ -281,7 +260,7 @@ class AIService:
                 'field': field
             }
     
-    def generate_research_proposal(self, topic: str, objectives: List[str]) -> Dict[str, Any]:
+    def generate_research_proposal(self, topic: str, objectives: List[str], use_cache: bool = True) -> Dict[str, Any]:
         """Generate a research proposal outline."""
         try:
             objectives_text = "\n".join([f"- {obj}" for obj in objectives])
@@ -308,19 +287,10 @@ class AIService:
             Provide a comprehensive, well-structured research proposal outline.
             """
             
-            client = OpenAI(api_key=self.openai_api_key)
-            
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert at writing research proposals and grant applications."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=2500,
-                temperature=0.4
+            proposal = self._chat(
+                "You are an expert at writing research proposals and grant applications.",
+                prompt, max_tokens=2500, temperature=0.4, use_cache=use_cache
             )
-            
-            proposal = response.choices[0].message.content.strip()
             logger.info(f"Generated research proposal for topic: {topic}")
             
             return {
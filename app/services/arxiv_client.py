@@ -0,0 +1,320 @@
+import io
+import re
+import time
+import asyncio
+import logging
+import threading
+import requests
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+from requests.adapters import HTTPAdapter
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_URL = "http://export.arxiv.org/api/query"
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+ARXIV = '{http://arxiv.org/schemas/atom}'
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class Author(NamedTuple):
+    name: str
+
+class ArxivResult:
+    """One arXiv API entry, with the attributes of ``arxiv.Result`` that this app uses."""
+
+    def __init__(self, entry_id: str, title: str, summary: str, authors: List[Author], categories: List[str],
+                 published: Optional[datetime], updated: Optional[datetime], pdf_url: Optional[str] = None,
+                 doi: Optional[str] = None, journal_ref: Optional[str] = None):
+        self.entry_id = entry_id
+        self.title = title
+        self.summary = summary
+        self.authors = authors
+        self.categories = categories
+        self.published = published
+        self.updated = updated
+        self.pdf_url = pdf_url
+        self.doi = doi
+        self.journal_ref = journal_ref
+
+    def get_short_id(self) -> str:
+        return self.entry_id.split('/abs/')[-1]
+
+    def to_paper_dict(self) -> Dict[str, Any]:
+        """Column values for the local Paper table."""
+        arxiv_id = self.get_short_id()
+        return {
+            'arxiv_id': arxiv_id,
+            'base_id': re.sub(r'v\d+$', '', arxiv_id),
+            'title': self.title,
+            'abstract': self.summary,
+            'authors': ', '.join(author.name for author in self.authors),
+            'categories': ' '.join(self.categories),
+            'published': self.published,
+            'updated': self.updated,
+            'pdf_url': self.pdf_url,
+            'abs_url': self.entry_id,
+            'doi': self.doi,
+            'journal_ref': self.journal_ref
+        }
+
+def _text(elem: ET.Element, tag: str) -> str:
+    child = elem.find(tag)
+    return ' '.join(child.text.split()) if child is not None and child.text else ''
+
+def _parse_datetime(value: str) -> Optional[datetime]:
+    try:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ")
+    except (TypeError, ValueError):
+        return None
+
+def parse_entry(entry: ET.Element) -> ArxivResult:
+    """Convert one Atom <entry> from the arXiv API into an ArxivResult."""
+    pdf_url = None
+    for link in entry.findall(ATOM + 'link'):
+        if link.get('title') == 'pdf':
+            pdf_url = link.get('href')
+    return ArxivResult(
+        entry_id=_text(entry, ATOM + 'id'),
+        title=_text(entry, ATOM + 'title'),
+        summary=_text(entry, ATOM + 'summary'),
+        authors=[Author(_text(author, ATOM + 'name')) for author in entry.findall(ATOM + 'author')],
+        categories=[c.get('term') for c in entry.findall(ATOM + 'category') if c.get('term')],
+        published=_parse_datetime(_text(entry, ATOM + 'published')),
+        updated=_parse_datetime(_text(entry, ATOM + 'updated')),
+        pdf_url=pdf_url,
+        doi=_text(entry, ARXIV + 'doi') or None,
+        journal_ref=_text(entry, ARXIV + 'journal_ref') or None
+    )
+
+def parse_atom_feed(stream) -> Iterator[ArxivResult]:
+    """Incrementally parse an arXiv Atom feed, yielding entries without holding the whole document."""
+    for _, elem in ET.iterparse(stream, events=('end',)):
+        if elem.tag == ATOM + 'entry':
+            yield parse_entry(elem)
+            elem.clear()
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` requests per second with bursts of up to ``capacity``.
+
+    Callers reserve a token and are told how long to wait for it, so the same
+    bucket serves blocking threads and asyncio tasks.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return the number of seconds to wait before using it."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+class ArxivClient:
+    """Client for the arXiv query API with a keep-alive connection pool, a shared rate limit and retries.
+
+    Every request, from any thread or event loop, takes a token from one
+    bucket that allows a request every ``request_interval`` seconds (arXiv's
+    policy is one every 3 seconds). Connection errors, 429 and 5xx responses
+    are retried with exponential backoff, honouring ``Retry-After``.
+    """
+
+    def __init__(self, api_url: str = DEFAULT_API_URL, request_interval: float = 3.0, burst: int = 1,
+                 max_retries: int = 3, backoff: float = 2.0, timeout: float = 30, pool_size: int = 10):
+        self.api_url = api_url
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.bucket = TokenBucket(1.0 / request_interval if request_interval > 0 else 0, capacity=burst)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['User-Agent'] = 'Research-Flask/1.0 (arXiv API client)'
+
+    @property
+    def request_interval(self) -> float:
+        return 1.0 / self.bucket.rate if self.bucket.rate else 0.0
+
+    def _send(self, params: Dict[str, Any], stream: bool = False) -> requests.Response:
+        """One HTTP attempt; raises for statuses that should not be retried."""
+        response = self.session.get(self.api_url, params=params, timeout=self.timeout, stream=stream)
+        if response.status_code not in RETRY_STATUSES:
+            try:
+                response.raise_for_status()
+            except requests.HTTPError:
+                response.close()
+                raise
+        return response
+
+    def _retry_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * (2 ** attempt)
+
+    def _request(self, params: Dict[str, Any], stream: bool = False) -> requests.Response:
+        """GET the API under the rate limit, retrying transient failures; returns the successful response."""
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            response = None
+            try:
+                response = self._send(params, stream=stream)
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                error = f"HTTP {response.status_code}"
+                response.close()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = str(e)
+            if attempt == self.max_retries:
+                raise IOError(f"arXiv request failed after {attempt + 1} attempts: {error}")
+            delay = self._retry_delay(attempt, response)
+            logger.warning(f"arXiv request failed ({error}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+    def fetch(self, params: Dict[str, Any]) -> bytes:
+        """GET the API with the given query parameters and return the raw Atom feed."""
+        return self._request(params).content
+
+    @contextmanager
+    def fetch_stream(self, params: Dict[str, Any]) -> Iterator[Any]:
+        """Like fetch, but yields the response body as a file object so the feed is parsed while it downloads."""
+        response = self._request(params, stream=True)
+        try:
+            response.raw.decode_content = True  # Undo gzip transfer encoding on the fly
+            yield response.raw
+        finally:
+            response.close()
+
+    async def fetch_async(self, params: Dict[str, Any]) -> bytes:
+        """Asyncio version of fetch; waits for rate-limit tokens and backoff without blocking the loop."""
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire_async()
+            response = None
+            try:
+                response = await asyncio.to_thread(self._send, params)
+                if response.status_code not in RETRY_STATUSES:
+                    return response.content
+                error = f"HTTP {response.status_code}"
+                response.close()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = str(e)
+            if attempt == self.max_retries:
+                raise IOError(f"arXiv request failed after {attempt + 1} attempts: {error}")
+            delay = self._retry_delay(attempt, response)
+            logger.warning(f"arXiv request failed ({error}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _search_params(query: Optional[str] = None, id_list: Optional[List[str]] = None, start: int = 0,
+                       max_results: int = 10, sort_by: Optional[str] = 'relevance',
+                       sort_order: str = 'descending') -> Dict[str, Any]:
+        params = {'start': start, 'max_results': max_results}
+        if query:
+            params['search_query'] = query
+        if id_list:
+            params['id_list'] = ','.join(id_list)
+        if sort_by:
+            params['sortBy'] = sort_by
+            params['sortOrder'] = sort_order
+        return params
+
+    @staticmethod
+    def _parse(content: bytes) -> List[ArxivResult]:
+        # Async responses are read in a worker thread, so they arrive already buffered
+        return list(parse_atom_feed(io.BytesIO(content)))
+
+    def _fetch_results(self, params: Dict[str, Any]) -> List[ArxivResult]:
+        with self.fetch_stream(params) as stream:
+            return list(parse_atom_feed(stream))
+
+    def search_page(self, query: str, start: int = 0, max_results: int = 100, sort_by: str = 'relevance',
+                    sort_order: str = 'descending') -> List[ArxivResult]:
+        """One page of search results (arXiv allows ``sortBy`` relevance, lastUpdatedDate or submittedDate)."""
+        return self._fetch_results(self._search_params(query, start=start, max_results=max_results,
+                                                       sort_by=sort_by, sort_order=sort_order))
+
+    def iter_pages(self, query: str, max_results: int, page_size: int = 100, start: int = 0,
+                   sort_by: str = 'relevance', sort_order: str = 'descending') -> Iterator[List[ArxivResult]]:
+        """Yield result pages lazily until ``max_results`` entries or the end of the results."""
+        fetched = 0
+        while fetched < max_results:
+            size = min(page_size, max_results - fetched)
+            page = self.search_page(query, start=start + fetched, max_results=size, sort_by=sort_by, sort_order=sort_order)
+            if not page:
+                return
+            yield page
+            fetched += len(page)
+            if len(page) < size:
+                return
+
+    def search(self, query: str, max_results: int = 10, sort_by: str = 'relevance',
+               sort_order: str = 'descending') -> List[ArxivResult]:
+        return [result for page in self.iter_pages(query, max_results, sort_by=sort_by, sort_order=sort_order)
+                for result in page]
+
+    def get_by_ids(self, id_list: List[str]) -> List[ArxivResult]:
+        if not id_list:
+            return []
+        return self._fetch_results(self._search_params(id_list=id_list, max_results=len(id_list), sort_by=None))
+
+    async def search_async(self, query: str, max_results: int = 10, sort_by: str = 'relevance',
+                           sort_order: str = 'descending') -> List[ArxivResult]:
+        results = []
+        while len(results) < max_results:
+            size = min(100, max_results - len(results))
+            content = await self.fetch_async(self._search_params(query, start=len(results), max_results=size,
+                                                                 sort_by=sort_by, sort_order=sort_order))
+            page = self._parse(content)
+            results.extend(page)
+            if len(page) < size:
+                break
+        return results
+
+    async def get_by_ids_async(self, id_list: List[str]) -> List[ArxivResult]:
+        if not id_list:
+            return []
+        content = await self.fetch_async(self._search_params(id_list=id_list, max_results=len(id_list), sort_by=None))
+        return self._parse(content)
+
+_client: Optional[ArxivClient] = None
+_client_lock = threading.Lock()
+
+def configure_arxiv_client(**kwargs) -> ArxivClient:
+    """Replace the process-wide client, e.g. with settings from the app config."""
+    global _client
+    with _client_lock:
+        _client = ArxivClient(**kwargs)
+    return _client
+
+def get_arxiv_client() -> ArxivClient:
+    """The process-wide client shared by every service, so they all draw from one rate limit."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ArxivClient()
+    return _client
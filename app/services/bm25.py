@@ -0,0 +1,126 @@
+import os
+import re
+import json
+import math
+import logging
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Keeps model names and acronyms such as "gpt-4", "bert-base" or "resnet50" as single terms
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-.][a-z0-9]+)*")
+
+# Saved indexes built by another tokenizer version are discarded and rebuilt
+TOKENIZER_VERSION = 2
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was we were which with".split()
+)
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase terms without stopwords; hyphenated compounds also yield their parts.
+
+    "self-attention" gives "self-attention", "self" and "attention", so a
+    query for "attention" still reaches it.
+    """
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        if '-' in token:
+            tokens.extend(token.split('-'))
+    return [token for token in tokens if token not in STOPWORDS]
+
+class BM25Index:
+    """Okapi BM25 over an inverted index of paper titles and abstracts."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.doc_lengths: Dict[str, int] = {}
+        self.doc_terms: Dict[str, List[str]] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.doc_lengths
+
+    def add(self, doc_id: str, text: str):
+        """Index a document, replacing any previous version with the same ID."""
+        if doc_id in self.doc_lengths:
+            self.delete([doc_id])
+        terms = Counter(tokenize(text))
+        for term, freq in terms.items():
+            self.postings[term][doc_id] = freq
+        self.doc_terms[doc_id] = list(terms)
+        length = sum(terms.values())
+        self.doc_lengths[doc_id] = length
+        self.total_length += length
+
+    def delete(self, doc_ids: Iterable[str]):
+        for doc_id in doc_ids:
+            if doc_id not in self.doc_lengths:
+                continue
+            self.total_length -= self.doc_lengths.pop(doc_id)
+            for term in self.doc_terms.pop(doc_id, []):
+                postings = self.postings.get(term)
+                if postings is None:
+                    continue
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+
+    def search(self, query: str, k: int = 100) -> List[Tuple[str, float]]:
+        """Return up to ``k`` (doc_id, score) pairs, best first. Only documents sharing a term are scored."""
+        if not self.doc_lengths:
+            return []
+        n = len(self.doc_lengths)
+        avg_length = self.total_length / n if n else 0.0
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, freq in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / max(avg_length, 1e-9))
+                scores[doc_id] += idf * freq * (self.k1 + 1) / (freq + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': TOKENIZER_VERSION, 'k1': self.k1, 'b': self.b, 'postings': self.postings,
+                       'doc_lengths': self.doc_lengths}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'BM25Index':
+        with open(path) as f:
+            data = json.load(f)
+        if data.get('version') != TOKENIZER_VERSION:
+            raise ValueError(f"lexical index was built by tokenizer version {data.get('version', 1)}, "
+                             f"not {TOKENIZER_VERSION}")
+        index = cls(k1=data['k1'], b=data['b'])
+        index.postings = defaultdict(dict, data['postings'])
+        index.doc_lengths = data['doc_lengths']
+        index.total_length = sum(index.doc_lengths.values())
+        index.doc_terms = defaultdict(list)
+        for term, postings in index.postings.items():
+            for doc_id in postings:
+                index.doc_terms[doc_id].append(term)
+        index.doc_terms = dict(index.doc_terms)
+        return index
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse several best-first rankings of IDs into one, scoring each ID by sum(1 / (k + rank))."""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,205 @@
+import os
+import json
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class SQLiteCache:
+    """Small key/value cache persisted in SQLite so all worker processes share it.
+
+    Values are stored as JSON. Entries can expire after ``ttl`` seconds and the
+    table is trimmed to ``max_entries`` by evicting the least recently used rows.
+    """
+
+    def __init__(self, path: str, namespace: str, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        self.path = path
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "created REAL NOT NULL, last_used REAL NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_used ON cache (namespace, last_used)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Return cached values for the given keys, skipping misses and expired entries."""
+        found = {}
+        if not keys:
+            return found
+        unique_keys = list(dict.fromkeys(keys))
+        try:
+            now = time.time()
+            with self._connect() as conn:
+                for start in range(0, len(unique_keys), 500):
+                    batch = unique_keys[start:start + 500]
+                    placeholders = ','.join('?' * len(batch))
+                    rows = conn.execute(
+                        f"SELECT key, value, created FROM cache WHERE namespace = ? AND key IN ({placeholders})",
+                        [self.namespace] + batch
+                    ).fetchall()
+                    for key, value, created in rows:
+                        if self.ttl is None or now - created <= self.ttl:
+                            found[key] = json.loads(value)
+                if found:
+                    conn.executemany(
+                        "UPDATE cache SET last_used = ? WHERE namespace = ? AND key = ?",
+                        [(now, self.namespace, key) for key in found]
+                    )
+        except Exception as e:
+            logger.error(f"Error reading cache {self.namespace}: {str(e)}")
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(unique_keys) - len(found)
+        return found
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.get_many([key]).get(key, default)
+
+    def set_many(self, items: Dict[str, Any]):
+        """Store values and trim the namespace to ``max_entries``."""
+        if not items:
+            return
+        try:
+            now = time.time()
+            with self._connect() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO cache (namespace, key, value, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                    [(self.namespace, key, json.dumps(value), now, now) for key, value in items.items()]
+                )
+                if self.ttl is not None:
+                    conn.execute("DELETE FROM cache WHERE namespace = ? AND created < ?", (self.namespace, now - self.ttl))
+                if self.max_entries is not None:
+                    conn.execute(
+                        "DELETE FROM cache WHERE namespace = ? AND key IN ("
+                        "SELECT key FROM cache WHERE namespace = ? ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                        (self.namespace, self.namespace, self.max_entries)
+                    )
+                conn.execute("COMMIT")
+        except Exception as e:
+            logger.error(f"Error writing cache {self.namespace}: {str(e)}")
+
+    def set(self, key: str, value: Any):
+        self.set_many({key: value})
+
+    def delete(self, key: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)).fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self)
+        }
+
+class TTLCache:
+    """In-process LRU cache with optional per-entry TTL and an optional shared backend.
+
+    Lookups check memory first and then ``backend`` (e.g. a SQLiteCache shared by
+    all workers); values set here are written to both.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None, backend: Optional[SQLiteCache] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.backend_hits = 0
+        self._entries: 'OrderedDict[str, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        if self.backend is not None:
+            value = self.backend.get(key)
+            if value is not None:
+                self._store(key, value)
+                with self._lock:
+                    self.hits += 1
+                    self.backend_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key: str, value: Any):
+        self._store(key, value)
+        if self.backend is not None:
+            self.backend.set(key, value)
+
+    def _store(self, key: str, value: Any):
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'backend_hits': self.backend_hits,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self),
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'shared': self.backend is not None
+        }
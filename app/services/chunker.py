@@ -0,0 +1,82 @@
+import re
+import math
+import logging
+from typing import Callable, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Blank lines and the page markers written by PDFProcessor.extract_text_from_pdf end a paragraph
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n|\n?--- Page \d+ ---\n')
+SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9(\[])')
+
+TokenCounter = Callable[[List[str]], List[int]]
+
+def approximate_token_counter(texts: List[str]) -> List[int]:
+    """Rough word-piece count (about 1.3 tokens per word) for when no tokenizer is available.
+
+    Rounding up keeps it subadditive, so joined pieces never count more than their sum.
+    """
+    return [max(1, math.ceil(len(text.split()) * 1.3)) for text in texts]
+
+def tokenizer_token_counter(tokenizer) -> TokenCounter:
+    """Count tokens with a Hugging Face tokenizer, one batched call per list of texts."""
+    def count(texts: List[str]) -> List[int]:
+        if not texts:
+            return []
+        return [len(ids) for ids in tokenizer(texts, add_special_tokens=False)['input_ids']]
+    return count
+
+class TokenChunker:
+    """Split text into chunks of at most ``chunk_tokens`` model tokens.
+
+    Chunks are cut at paragraph boundaries where possible, then at sentence
+    boundaries, and only split inside a sentence (between words) when the
+    sentence alone is over budget. Consecutive chunks share up to
+    ``overlap_tokens`` tokens of trailing sentences.
+    """
+
+    def __init__(self, count_tokens: Optional[TokenCounter] = None, chunk_tokens: int = 256, overlap_tokens: int = 0):
+        if chunk_tokens <= 0 or not 0 <= overlap_tokens < chunk_tokens:
+            raise ValueError(f"Invalid chunk size {chunk_tokens} with overlap {overlap_tokens}")
+        self.count_tokens = count_tokens or approximate_token_counter
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+
+    def _pieces(self, texts: List[str], level: int = 0) -> List[Tuple[str, int]]:
+        """(text, tokens) units that each fit the budget, in document order."""
+        pieces = []
+        for text, tokens in zip(texts, self.count_tokens(texts)):
+            if tokens <= self.chunk_tokens or level == 2:
+                # A single word over budget is kept whole; the encoder truncates it
+                pieces.append((text, tokens))
+                continue
+            parts = SENTENCE_BREAK.split(text) if level == 0 else text.split()
+            pieces.extend(self._pieces([part.strip() for part in parts if part.strip()], level + 1))
+        return pieces
+
+    def split(self, text: str) -> List[str]:
+        paragraphs = [' '.join(paragraph.split()) for paragraph in PARAGRAPH_BREAK.split(text)]
+        pieces = self._pieces([paragraph for paragraph in paragraphs if paragraph])
+
+        chunks = []
+        current: List[Tuple[str, int]] = []
+        current_tokens = 0
+        for piece, tokens in pieces:
+            if current and current_tokens + tokens > self.chunk_tokens:
+                chunks.append(' '.join(text for text, _ in current))
+                # Start the next chunk with the trailing pieces that fit the overlap
+                overlap, overlap_tokens = [], 0
+                for text, count in reversed(current):
+                    if overlap_tokens + count > self.overlap_tokens:
+                        break
+                    overlap.insert(0, (text, count))
+                    overlap_tokens += count
+                current, current_tokens = overlap, overlap_tokens
+                while current and current_tokens + tokens > self.chunk_tokens:
+                    current_tokens -= current.pop(0)[1]
+            current.append((piece, tokens))
+            current_tokens += tokens
+        if current:
+            chunks.append(' '.join(text for text, _ in current))
+        return chunks
@@ -1,15 +1,16 @@
-import requests
 import xmltodict
 from datetime import datetime
 import logging
 from typing import Dict, Any, Optional
+from app.services.arxiv_client import ArxivClient, get_arxiv_client
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class CitationService:
-    def __init__(self):
-        self.arxiv_api_base = "http://export.arxiv.org/api/query"
+    def __init__(self, arxiv_client: Optional[ArxivClient] = None):
+        # Shared client: pooled connections, retries and the process-wide arXiv rate limit
+        self.arxiv_client = arxiv_client or get_arxiv_client()
     
     def get_arxiv_data(self, arxiv_url: str) -> Optional[Dict[str, Any]]:
         """Fetch data from arXiv using the arXiv API."""
@@ -22,28 +23,54 @@ class CitationService:
             else:
                 arxiv_id = arxiv_url.split('/')[-1]
             
-            # Construct the API URL
-            api_url = f'{self.arxiv_api_base}?id_list={arxiv_id}'
+            # Papers collected by the harvester are answered from the local database
+            entry = self._get_local_arxiv_data(arxiv_id)
+            if entry is not None:
+                logger.info(f"Found {arxiv_id} in the local paper store")
+                return entry
             
             logger.info(f"Fetching data for arXiv ID: {arxiv_id}")
             
-            # Make a request to the arXiv API
-            response = requests.get(api_url, timeout=10)
-            
-            # Parse the response as XML
-            if response.status_code == 200:
-                data = xmltodict.parse(response.content)
-                entry = data['feed']['entry']
-                logger.info(f"Successfully fetched data for {arxiv_id}")
-                return entry
-            else:
-                logger.error(f"Failed to fetch data: {response.status_code}")
-                return None
+            # Make a request to the arXiv API and parse the response as XML
+            content = self.arxiv_client.fetch({'id_list': arxiv_id})
+            data = xmltodict.parse(content)
+            entry = data['feed']['entry']
+            logger.info(f"Successfully fetched data for {arxiv_id}")
+            return entry
                 
         except Exception as e:
             logger.error(f"Error fetching arXiv data: {str(e)}")
             return None
 
+    def _get_local_arxiv_data(self, arxiv_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a paper in the local Paper table and shape it like an arXiv API entry."""
+        try:
+            from app import db
+            from app.models import Paper
+            
+            paper = db.session.get(Paper, arxiv_id)
+            if paper is None:
+                paper = Paper.query.filter_by(base_id=arxiv_id).order_by(Paper.updated.desc()).first()
+            if paper is None:
+                return None
+            
+            date_format = "%Y-%m-%dT%H:%M:%SZ"
+            return {
+                'id': paper.abs_url or f"http://arxiv.org/abs/{paper.arxiv_id}",
+                'title': paper.title,
+                'summary': paper.abstract,
+                'author': [{'name': name.strip()} for name in paper.authors.split(',') if name.strip()],
+                'published': paper.published.strftime(date_format) if paper.published else '',
+                'updated': paper.updated.strftime(date_format) if paper.updated else '',
+                'category': [{'@term': term} for term in paper.categories.split()],
+                'doi': paper.doi,
+                'journal_ref': paper.journal_ref
+            }
+        except Exception as e:
+            # No app context or no local store; fall back to the live API
+            logger.debug(f"Local paper lookup unavailable: {str(e)}")
+            return None
+
     def format_apa_citation(self, paper_data: Dict[str, Any]) -> str:
         """Format the arXiv paper data into an APA citation."""
         try:
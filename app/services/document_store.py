@@ -0,0 +1,268 @@
+import os
+import json
+import time
+import uuid
+import fcntl
+import shutil
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from app.services.vector_store import VectorStore
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def content_hash(data: bytes) -> str:
+    """Address of an uploaded file: SHA-256 of its bytes, independent of the filename."""
+    return hashlib.sha256(data).hexdigest()
+
+class DocumentStore:
+    """Processing artifacts of uploaded PDFs, keyed by content hash and shared between sessions.
+
+    Every upload opens a session that references the artifacts (text, chunks
+    and vector store) of its file. Artifacts are reference-counted: identical
+    files uploaded under any name share one copy, and the copy is deleted
+    when the last session referencing it is released or expires.
+
+    Artifacts live on disk under ``root_dir``, with the embedding matrix as a
+    memory-mapped ``.npy`` file, and sessions live in SQLite, so any worker can
+    serve any session. Each worker keeps recently used documents in memory and
+    evicts the least recently used ones beyond ``memory_budget`` bytes.
+    """
+
+    def __init__(self, root_dir: str, memory_budget: int = 256 * 1024 * 1024,
+                 session_ttl: Optional[float] = 86400, cleanup_interval: float = 300, preview_chars: int = 500):
+        self.root_dir = root_dir
+        self.preview_chars = preview_chars
+        self.memory_budget = memory_budget
+        self.session_ttl = session_ttl
+        self.cleanup_interval = cleanup_interval
+        self.sessions_opened = 0
+        self.documents_processed = 0
+        self._cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        self._last_cleanup = 0.0
+
+        self.documents_dir = os.path.join(root_dir, 'documents')
+        self.locks_dir = os.path.join(root_dir, 'locks')
+        os.makedirs(self.documents_dir, exist_ok=True)
+        os.makedirs(self.locks_dir, exist_ok=True)
+        self.db_path = os.path.join(root_dir, 'sessions.db')
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, doc_hash TEXT NOT NULL, "
+                "created REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_doc ON sessions (doc_hash)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_last_used ON sessions (last_used)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def _doc_dir(self, doc_hash: str) -> str:
+        return os.path.join(self.documents_dir, doc_hash)
+
+    @contextmanager
+    def processing(self, doc_hash: str):
+        """Serialize processing of one file, across threads and workers, so it is processed once."""
+        with open(os.path.join(self.locks_dir, f"{doc_hash}.lock"), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def has_document(self, doc_hash: str) -> bool:
+        return os.path.exists(os.path.join(self._doc_dir(doc_hash), 'meta.json'))
+
+    def add_document(self, doc_hash: str, text: str, chunks: List[str], vector_store: VectorStore):
+        """Write a processed document to disk; its directory appears atomically once complete."""
+        final_dir = self._doc_dir(doc_hash)
+        tmp_dir = f"{final_dir}.{os.getpid()}-{threading.get_ident()}.tmp"
+        os.makedirs(tmp_dir, exist_ok=True)
+        try:
+            with open(os.path.join(tmp_dir, 'text.txt'), 'w', encoding='utf-8') as f:
+                f.write(text)
+            with open(os.path.join(tmp_dir, 'chunks.json'), 'w', encoding='utf-8') as f:
+                json.dump(chunks, f)
+            vector_store.save(os.path.join(tmp_dir, 'embeddings.npy'))
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+                json.dump({
+                    'model_name': vector_store.model_name,
+                    'created': time.time(),
+                    'text_length': len(text),
+                    'chunk_count': len(chunks),
+                    'preview': text.strip()[:self.preview_chars]
+                }, f)
+            os.rename(tmp_dir, final_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            # Another worker stored the same document first
+            if not self.has_document(doc_hash):
+                raise
+        with self._lock:
+            self.documents_processed += 1
+
+    def open_session(self, doc_hash: str) -> Optional[str]:
+        """Start a session on a stored document; returns its ID, or None if the document is unknown."""
+        self._maybe_cleanup()
+        if not self.has_document(doc_hash):
+            return None
+        session_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT INTO sessions (session_id, doc_hash, created, last_used) VALUES (?, ?, ?, ?)",
+                         (session_id, doc_hash, now, now))
+        with self._lock:
+            self.sessions_opened += 1
+        return session_id
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Artifacts (text, chunks, vector_store) of the document behind a live session."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT doc_hash, last_used FROM sessions WHERE session_id = ?",
+                               (session_id,)).fetchone()
+            if row is None or (self.session_ttl is not None and now - row[1] > self.session_ttl):
+                return None
+            conn.execute("UPDATE sessions SET last_used = ? WHERE session_id = ?", (now, session_id))
+        try:
+            return self._load(row[0])
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading document {row[0][:12]}: {str(e)}")
+            return None
+
+    def info(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Counts and a short text preview of a session's document, without loading the document."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT doc_hash FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None:
+            return None
+        try:
+            with open(os.path.join(self._doc_dir(row[0]), 'meta.json')) as f:
+                meta = json.load(f)
+            if 'preview' not in meta:
+                # Stored before counts were recorded
+                document = self._load(row[0])
+                meta.update(text_length=len(document['text']), chunk_count=len(document['chunks']),
+                            preview=document['text'].strip()[:self.preview_chars])
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading document {row[0][:12]}: {str(e)}")
+            return None
+        return {
+            'document_hash': row[0],
+            'text_length': meta['text_length'],
+            'chunk_count': meta['chunk_count'],
+            'preview': meta['preview']
+        }
+
+    def _load(self, doc_hash: str) -> Dict[str, Any]:
+        with self._lock:
+            document = self._cache.get(doc_hash)
+            if document is not None:
+                self._cache.move_to_end(doc_hash)
+                return document
+
+        doc_dir = self._doc_dir(doc_hash)
+        with open(os.path.join(doc_dir, 'meta.json')) as f:
+            meta = json.load(f)
+        with open(os.path.join(doc_dir, 'text.txt'), encoding='utf-8') as f:
+            text = f.read()
+        with open(os.path.join(doc_dir, 'chunks.json'), encoding='utf-8') as f:
+            chunks = json.load(f)
+        vector_store = VectorStore.load(os.path.join(doc_dir, 'embeddings.npy'), chunks, meta['model_name'])
+        document = {
+            'text': text,
+            'chunks': chunks,
+            'vector_store': vector_store,
+            'size': len(text) + sum(len(chunk) for chunk in chunks) + vector_store.nbytes
+        }
+
+        with self._lock:
+            if doc_hash in self._cache:
+                return self._cache[doc_hash]
+            self._cache[doc_hash] = document
+            self._cache_bytes += document['size']
+            # Least recently used documents leave memory but stay on disk
+            while self._cache_bytes > self.memory_budget and len(self._cache) > 1:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= evicted['size']
+        return document
+
+    def release_session(self, session_id: str) -> bool:
+        """End a session and delete its document once no session references it."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT doc_hash FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                return False
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            remaining = conn.execute("SELECT COUNT(*) FROM sessions WHERE doc_hash = ?", (row[0],)).fetchone()[0]
+        if not remaining:
+            self._delete_document(row[0])
+        return True
+
+    def _delete_document(self, doc_hash: str):
+        with self._lock:
+            document = self._cache.pop(doc_hash, None)
+            if document is not None:
+                self._cache_bytes -= document['size']
+        shutil.rmtree(self._doc_dir(doc_hash), ignore_errors=True)
+        logger.info(f"Released artifacts for document {doc_hash[:12]}")
+
+    def _maybe_cleanup(self):
+        now = time.time()
+        if now - self._last_cleanup >= self.cleanup_interval:
+            self._last_cleanup = now
+            self.cleanup()
+
+    def cleanup(self, grace: float = 60) -> int:
+        """Expire idle sessions and delete unreferenced documents; returns the number deleted.
+
+        Documents younger than ``grace`` seconds are kept, since a worker may
+        have just written one and not yet opened its session.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            if self.session_ttl is not None:
+                conn.execute("DELETE FROM sessions WHERE last_used < ?", (now - self.session_ttl,))
+            referenced = {row[0] for row in conn.execute("SELECT DISTINCT doc_hash FROM sessions")}
+
+        deleted = 0
+        for name in os.listdir(self.documents_dir):
+            if name in referenced or name.endswith('.tmp'):
+                continue
+            try:
+                if now - os.path.getmtime(self._doc_dir(name)) < grace:
+                    continue
+            except OSError:
+                continue
+            self._delete_document(name)
+            deleted += 1
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            sessions = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        documents = sum(1 for name in os.listdir(self.documents_dir) if not name.endswith('.tmp'))
+        with self._lock:
+            return {
+                'documents': documents,
+                'sessions': sessions,
+                'cached_documents': len(self._cache),
+                'cached_bytes': self._cache_bytes,
+                'memory_budget': self.memory_budget,
+                'sessions_opened': self.sessions_opened,
+                'documents_processed': self.documents_processed
+            }
@@ -0,0 +1,168 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import logging
+import numpy as np
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """Persistent embedding store shared by all worker processes.
+
+    Vectors live in a memory-mapped float32 (or float16, half the size) matrix
+    with one row per slot. A SQLite index maps (model, key) to a slot and
+    records when it was last used, so the least recently used rows are
+    recycled once the store is full. Reads copy rows inside the same write
+    transaction that writers take before recycling a slot, so a slot cannot
+    change hands between looking it up and copying it.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str, dim: int, max_entries: int = 100000, dtype: str = 'float32'):
+        self.cache_dir = cache_dir
+        self.model_name = model_name
+        self.dim = dim
+        self.max_entries = max_entries
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.float32, np.float16):
+            raise ValueError(f"Unsupported embedding cache dtype '{dtype}'")
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', model_name)
+        self.index_path = os.path.join(cache_dir, 'embeddings.db')
+        self.matrix_path = os.path.join(cache_dir, f"{safe_name}.{dim}.f{self.dtype.itemsize * 8}")
+
+        self._init_index()
+        self.vectors = self._open_matrix()
+        logger.info(f"Embedding cache ready at {self.matrix_path} ({max_entries} slots)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_index(self):
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, key TEXT NOT NULL, slot INTEGER NOT NULL, last_used REAL NOT NULL, "
+                "PRIMARY KEY (model, key))"
+            )
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_embeddings_slot ON embeddings (model, slot)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (model, last_used)")
+            # Slots beyond a reduced max_entries are not in the matrix any more
+            dropped = conn.execute("DELETE FROM embeddings WHERE model = ? AND slot >= ?",
+                                   (self.model_name, self.max_entries)).rowcount
+            if dropped:
+                logger.info(f"Dropped {dropped} cached embeddings beyond the {self.max_entries} slots")
+
+    def _open_matrix(self) -> np.memmap:
+        """Open the vector file, growing it to full size if another worker has not already."""
+        size = self.max_entries * self.dim * self.dtype.itemsize
+        fd = os.open(self.matrix_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+        finally:
+            os.close(fd)
+        return np.memmap(self.matrix_path, dtype=self.dtype, mode='r+', shape=(self.max_entries, self.dim))
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Return cached vectors for the given keys, skipping misses."""
+        found = {}
+        if not keys:
+            return found
+        try:
+            with self._lock, self._connect() as conn:
+                # Writers recycle slots under the same lock, so rows cannot change while they are copied
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    for start in range(0, len(keys), 500):
+                        batch = keys[start:start + 500]
+                        placeholders = ','.join('?' * len(batch))
+                        rows = conn.execute(
+                            f"SELECT key, slot FROM embeddings WHERE model = ? AND key IN ({placeholders})",
+                            [self.model_name] + batch
+                        ).fetchall()
+                        for key, slot in rows:
+                            if slot < self.max_entries:
+                                found[key] = np.array(self.vectors[slot], dtype=np.float32)
+                    if found:
+                        now = time.time()
+                        conn.executemany(
+                            "UPDATE embeddings SET last_used = ? WHERE model = ? AND key = ?",
+                            [(now, self.model_name, key) for key in found]
+                        )
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+        except Exception as e:
+            logger.error(f"Error reading embedding cache: {str(e)}")
+        return found
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Dict[str, np.ndarray]):
+        """Store vectors, evicting the least recently used slots when the store is full."""
+        if not items:
+            return
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    now = time.time()
+                    for key, vector in items.items():
+                        row = conn.execute(
+                            "SELECT slot FROM embeddings WHERE model = ? AND key = ?", (self.model_name, key)
+                        ).fetchone()
+                        if row and row[0] < self.max_entries:
+                            slot = row[0]
+                        else:
+                            if row:
+                                conn.execute("DELETE FROM embeddings WHERE model = ? AND key = ?",
+                                             (self.model_name, key))
+                            slot = self._allocate_slot(conn)
+                        self.vectors[slot] = np.asarray(vector, dtype=self.dtype)
+                        conn.execute(
+                            "INSERT OR REPLACE INTO embeddings (model, key, slot, last_used) VALUES (?, ?, ?, ?)",
+                            (self.model_name, key, slot, now)
+                        )
+                    # Make vectors visible to other workers before their index rows are
+                    self.vectors.flush()
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+        except Exception as e:
+            logger.error(f"Error writing embedding cache: {str(e)}")
+
+    def put(self, key: str, vector: np.ndarray):
+        self.put_many({key: vector})
+
+    def _allocate_slot(self, conn: sqlite3.Connection) -> int:
+        count = conn.execute("SELECT COUNT(*) FROM embeddings WHERE model = ? AND slot < ?",
+                             (self.model_name, self.max_entries)).fetchone()[0]
+        if count < self.max_entries:
+            return count
+
+        # Store is full: recycle the least recently used slot
+        key, slot = conn.execute(
+            "SELECT key, slot FROM embeddings WHERE model = ? ORDER BY last_used ASC LIMIT 1", (self.model_name,)
+        ).fetchone()
+        conn.execute("DELETE FROM embeddings WHERE model = ? AND key = ?", (self.model_name, key))
+        return slot
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM embeddings WHERE model = ?", (self.model_name,)).fetchone()[0]
@@ -0,0 +1,200 @@
+import os
+import time
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from app.services.arxiv_client import ArxivClient, get_arxiv_client
+from app.services.trending import apply_count_deltas, count_keys
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class ArxivHarvester:
+    """Incrementally copies arXiv metadata per category into the local Paper table.
+
+    Each category is queried for entries whose lastUpdatedDate lies between its
+    stored checkpoint and now, oldest first, one page at a time. Every page is
+    upserted, embedded and committed together with the advanced checkpoint, so
+    an interrupted run resumes from the last completed page. The index is saved
+    once per run, so each run first reconciles it with the Paper table to pick
+    up pages committed by a run that died before saving. Needs an app context.
+    """
+
+    def __init__(self, search_service=None, client: Optional[ArxivClient] = None, page_size: int = 100,
+                 initial_days: int = 14):
+        self.search_service = search_service
+        self.client = client or get_arxiv_client()
+        self.page_size = page_size
+        self.initial_days = initial_days
+
+    def harvest(self, categories: List[str], until: Optional[datetime] = None) -> Dict[str, int]:
+        """Harvest every category; returns the number of new or changed papers per category."""
+        stats = {}
+        repaired = 0
+        try:
+            repaired = self.reconcile_index()
+        except Exception as e:
+            logger.error(f"Error reconciling local paper index: {str(e)}")
+        for category in categories:
+            try:
+                stats[category] = self.harvest_category(category, until=until)
+            except Exception as e:
+                logger.error(f"Error harvesting {category}: {str(e)}")
+                stats[category] = 0
+        if self.search_service is not None and (repaired or any(stats.values())):
+            self.search_service.save_paper_index()
+        return stats
+
+    def reconcile_index(self) -> int:
+        """Embed stored papers missing from the local index and drop indexed papers no longer stored.
+
+        Returns the number of index entries added or removed.
+        """
+        from app.models import Paper
+
+        if self.search_service is None:
+            return 0
+        stored = [row.arxiv_id for row in Paper.query.with_entities(Paper.arxiv_id)]
+        missing, stale = self.search_service.paper_index_differences(stored)
+        if stale:
+            self.search_service.remove_papers(stale, save=False)
+        for start in range(0, len(missing), self.page_size):
+            rows = Paper.query.filter(Paper.arxiv_id.in_(missing[start:start + self.page_size])).all()
+            self.search_service.index_papers([{'arxiv_id': row.arxiv_id, 'title': row.title, 'abstract': row.abstract}
+                                              for row in rows], save=False)
+        if missing or stale:
+            logger.info(f"Reconciled local paper index: {len(missing)} papers added, {len(stale)} removed")
+        return len(missing) + len(stale)
+
+    def harvest_category(self, category: str, until: Optional[datetime] = None) -> int:
+        from app import db
+        from app.models import HarvestCheckpoint
+
+        checkpoint = db.session.get(HarvestCheckpoint, category)
+        if checkpoint is None:
+            checkpoint = HarvestCheckpoint(category=category, papers_harvested=0)
+            db.session.add(checkpoint)
+
+        until = until or datetime.utcnow()
+        since = checkpoint.last_updated or until - timedelta(days=self.initial_days)
+        query = f"cat:{category} AND lastUpdatedDate:[{since:%Y%m%d%H%M} TO {until:%Y%m%d%H%M}]"
+        logger.info(f"Harvesting {category} updated since {since.isoformat()}")
+
+        changed_total = 0
+        start = 0
+        while True:
+            entries = self._fetch_page(query, start)
+            if not entries:
+                break
+
+            changed = self._upsert(entries)
+            self._embed(changed)
+
+            newest = max((e['updated'] for e in entries if e['updated']), default=None)
+            if newest and (checkpoint.last_updated is None or newest > checkpoint.last_updated):
+                checkpoint.last_updated = newest
+            checkpoint.papers_harvested = (checkpoint.papers_harvested or 0) + len(changed)
+            checkpoint.last_run = datetime.utcnow()
+            db.session.commit()
+
+            changed_total += len(changed)
+            if len(entries) < self.page_size:
+                break
+            start += len(entries)
+
+        checkpoint.last_run = datetime.utcnow()
+        db.session.commit()
+        logger.info(f"Harvested {changed_total} new or updated papers for {category}")
+        return changed_total
+
+    def _fetch_page(self, query: str, start: int) -> List[Dict[str, Any]]:
+        # The shared client spaces requests out and retries transient failures
+        page = self.client.search_page(query, start=start, max_results=self.page_size,
+                                       sort_by='lastUpdatedDate', sort_order='ascending')
+        return [result.to_paper_dict() for result in page]
+
+    def _upsert(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert or update papers; returns the entries whose content is new or changed."""
+        from app import db
+        from app.models import Paper
+
+        existing = {}
+        for row in Paper.query.filter(Paper.base_id.in_({e['base_id'] for e in entries})).all():
+            existing.setdefault(row.base_id, []).append(row)
+
+        changed, superseded = [], []
+        count_deltas = Counter()  # Keeps the trending aggregate table in step with the Paper table
+        for entry in entries:
+            rows = existing.get(entry['base_id'], [])
+            current = next((row for row in rows if row.arxiv_id == entry['arxiv_id']), None)
+
+            # Older versions are replaced by the newest one
+            for row in rows:
+                if row is not current:
+                    superseded.append(row.arxiv_id)
+                    count_deltas.subtract(count_keys(row.categories, row.published))
+                    db.session.delete(row)
+            existing[entry['base_id']] = [current] if current else []
+
+            if current is None:
+                current = Paper(**entry)
+                db.session.add(current)
+                existing[entry['base_id']] = [current]
+                count_deltas.update(count_keys(entry['categories'], entry['published']))
+                changed.append(entry)
+            elif current.updated != entry['updated'] or current.title != entry['title'] or current.abstract != entry['abstract']:
+                count_deltas.subtract(count_keys(current.categories, current.published))
+                count_deltas.update(count_keys(entry['categories'], entry['published']))
+                for field, value in entry.items():
+                    setattr(current, field, value)
+                changed.append(entry)
+
+        apply_count_deltas(count_deltas)
+        if superseded and self.search_service is not None:
+            self.search_service.remove_papers(superseded, save=False)
+        return changed
+
+    def _embed(self, entries: List[Dict[str, Any]]):
+        """Embed new abstracts in batches as part of the same run."""
+        if self.search_service is None or not entries:
+            return
+        self.search_service.index_papers(entries, save=False)
+
+def start_background_harvester(app, get_search_service, categories: List[str], interval: float) -> Optional[threading.Thread]:
+    """Run the harvester every ``interval`` seconds in one process.
+
+    Every gunicorn worker calls this; a non-blocking file lock in the cache
+    directory makes sure only one of them actually harvests.
+    """
+    import fcntl
+
+    lock_dir = app.config.get('CACHE_DIR') or os.path.join(app.root_path, '..', 'cache')
+    os.makedirs(lock_dir, exist_ok=True)
+    lock_file = open(os.path.join(lock_dir, 'harvester.lock'), 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        logger.info("Another worker is running the harvester")
+        return None
+
+    def run():
+        while True:
+            try:
+                with app.app_context():
+                    harvester = ArxivHarvester(
+                        search_service=get_search_service(),
+                        page_size=app.config.get('HARVEST_PAGE_SIZE', 100),
+                        initial_days=app.config.get('HARVEST_INITIAL_DAYS', 14)
+                    )
+                    harvester.harvest(categories)
+            except Exception as e:
+                logger.error(f"Error in background harvester: {str(e)}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="arxiv-harvester", daemon=True)
+    thread.lock_file = lock_file  # Keep the lock held for the life of the thread
+    thread.start()
+    return thread
@@ -0,0 +1,108 @@
+import logging
+import numpy as np
+from typing import Any, Dict
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 'torch' is full fp32 PyTorch, 'quantized' applies dynamic int8 quantization to
+# Linear layers, and 'onnx' runs an exported ONNX graph through onnxruntime.
+INFERENCE_BACKENDS = ('torch', 'quantized', 'onnx')
+
+def _check_backend(backend: str) -> str:
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {INFERENCE_BACKENDS}")
+    return backend
+
+def quantize_dynamic_int8(model):
+    """Return a copy of ``model`` with Linear layers dynamically quantized to int8 for CPU inference."""
+    import torch
+
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def loaded_backend(model, default: str = 'torch') -> str:
+    """The backend a loader actually used, which differs from the requested one after a fallback."""
+    return getattr(model, 'inference_backend', default)
+
+def load_transformer_encoder(model_name: str, backend: str = 'torch'):
+    """Load a Hugging Face encoder (e.g. SciBERT) for the requested backend.
+
+    The ONNX backend needs the optional ``optimum[onnxruntime]`` package; without
+    it we fall back to the quantized PyTorch model. The returned model's
+    ``inference_backend`` attribute names the backend actually loaded.
+    """
+    from transformers import AutoModel
+
+    backend = _check_backend(backend)
+    if backend == 'onnx':
+        try:
+            from optimum.onnxruntime import ORTModelForFeatureExtraction
+            model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+            model.inference_backend = backend
+            logger.info(f"Loaded {model_name} as an ONNX graph")
+            return model
+        except ImportError:
+            logger.warning("optimum[onnxruntime] not installed, falling back to quantized PyTorch")
+            backend = 'quantized'
+
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+    if backend == 'quantized':
+        model = quantize_dynamic_int8(model)
+        logger.info(f"Loaded {model_name} with dynamic int8 quantization")
+    model.inference_backend = backend
+    return model
+
+def load_sentence_encoder(model_name: str, backend: str = 'torch'):
+    """Load a sentence-transformers model (e.g. all-MiniLM-L6-v2) for the requested backend.
+
+    Falls back to quantized PyTorch when ONNX is unavailable, recording the
+    backend actually loaded in the model's ``inference_backend`` attribute.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    backend = _check_backend(backend)
+    if backend == 'onnx':
+        try:
+            model = SentenceTransformer(model_name, backend='onnx')
+            model.inference_backend = backend
+            logger.info(f"Loaded {model_name} as an ONNX graph")
+            return model
+        except Exception as e:
+            # Older sentence-transformers or missing onnxruntime
+            logger.warning(f"ONNX backend unavailable for {model_name} ({str(e)}), falling back to quantized PyTorch")
+            backend = 'quantized'
+
+    model = SentenceTransformer(model_name, device='cpu')
+    if backend == 'quantized':
+        model = quantize_dynamic_int8(model)
+        logger.info(f"Loaded {model_name} with dynamic int8 quantization")
+    model.inference_backend = backend
+    return model
+
+def ranking_agreement(baseline_queries: np.ndarray, baseline_docs: np.ndarray,
+                      candidate_queries: np.ndarray, candidate_docs: np.ndarray, k: int = 5) -> Dict[str, Any]:
+    """Compare cosine rankings produced by a candidate backend against the fp32 baseline.
+
+    Returns top-1 agreement, mean top-k overlap and the mean absolute change in
+    cosine similarity, each averaged over the queries.
+    """
+    def normalize(x):
+        x = np.asarray(x, dtype=np.float32)
+        return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+
+    base_scores = normalize(baseline_queries) @ normalize(baseline_docs).T
+    cand_scores = normalize(candidate_queries) @ normalize(candidate_docs).T
+    k = min(k, base_scores.shape[1])
+
+    base_top = np.argsort(-base_scores, axis=1)[:, :k]
+    cand_top = np.argsort(-cand_scores, axis=1)[:, :k]
+    overlaps = [len(set(b) & set(c)) / k for b, c in zip(base_top, cand_top)]
+
+    return {
+        'top1_agreement': float(np.mean(base_top[:, 0] == cand_top[:, 0])),
+        'topk_overlap': float(np.mean(overlaps)),
+        'mean_abs_score_delta': float(np.mean(np.abs(base_scores - cand_scores))),
+        'k': k
+    }
@@ -0,0 +1,227 @@
+import io
+import os
+import json
+import time
+import socket
+import uuid
+import sqlite3
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Progress reported when each stage starts
+STAGE_PROGRESS = {'extract': 0.0, 'chunk': 0.4, 'embed': 0.5, 'store': 0.95}
+
+def _owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def _owner_alive(owner: Optional[str]) -> bool:
+    """Whether the worker process that owns a job still exists; owners on other hosts are assumed alive."""
+    host, _, pid = (owner or '').rpartition(':')
+    if host != socket.gethostname() or not pid.isdigit():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class IngestionQueue:
+    """Runs PDF ingestion (extract → chunk → embed → store) on a pool of background threads.
+
+    Uploads return a job ID immediately and clients poll ``get`` for the
+    current stage and progress. Job state lives in SQLite next to the
+    document store, so any worker can report on any job. At most
+    ``max_queued`` jobs wait at once; beyond that ``submit`` refuses work.
+    Each job records the host and pid of the worker process that owns it.
+    Queued or running jobs whose owner is gone are reported as failed, as are
+    jobs still running ``job_timeout`` seconds after they started or still
+    queued that long after they were submitted, which covers owners on other
+    hosts whose pid cannot be checked.
+    """
+
+    def __init__(self, db_path: str, workers: int = 2, max_queued: int = 50, job_ttl: float = 86400,
+                 job_timeout: float = 1800):
+        self.db_path = db_path
+        self.workers = workers
+        self.max_queued = max_queued
+        self.job_ttl = job_ttl
+        self.job_timeout = job_timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ingest')
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, filename TEXT, document_hash TEXT NOT NULL, "
+                "status TEXT NOT NULL, stage TEXT, progress REAL NOT NULL DEFAULT 0, "
+                "session_id TEXT, deduplicated INTEGER NOT NULL DEFAULT 0, error TEXT, timings TEXT, "
+                "created REAL NOT NULL, started REAL, finished REAL, owner TEXT)"
+            )
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(jobs)")]
+            if 'owner' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def _update(self, job_id: str, **fields):
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+
+    def _fail_stalled(self, conn, now: float):
+        error = 'Processing did not finish in time; please upload the file again'
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = ?, finished = ? "
+            "WHERE (status = 'running' AND started < ?) OR (status = 'queued' AND created < ?)",
+            (error, now, now - self.job_timeout, now - self.job_timeout)
+        )
+        orphaned = [job_id for job_id, owner in conn.execute(
+            "SELECT job_id, owner FROM jobs WHERE status IN ('queued', 'running')"
+        ).fetchall() if not _owner_alive(owner)]
+        if orphaned:
+            logger.warning(f"Failing {len(orphaned)} ingestion jobs whose worker process is gone")
+            conn.executemany(
+                "UPDATE jobs SET status = 'failed', error = ?, finished = ? WHERE job_id = ? "
+                "AND status IN ('queued', 'running')",
+                [(error, now, job_id) for job_id in orphaned]
+            )
+
+    def queue_depth(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+
+    def submit(self, filename: str, data: bytes, doc_hash: str, pdf_processor, document_store) -> Optional[str]:
+        """Queue a PDF for ingestion; returns the job ID, or None when the queue is full.
+
+        A file that is already stored completes immediately with a new session.
+        """
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            # Jobs of workers that died never finish; fail them and later forget them with the finished ones
+            self._fail_stalled(conn, now)
+            conn.execute("DELETE FROM jobs WHERE created < ?", (now - self.job_ttl,))
+
+        session_id = document_store.open_session(doc_hash)
+        if session_id is not None:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT INTO jobs (job_id, filename, document_hash, status, progress, session_id, deduplicated, "
+                    "timings, created, started, finished) VALUES (?, ?, ?, 'done', 1, ?, 1, '{}', ?, ?, ?)",
+                    (job_id, filename, doc_hash, session_id, now, now, now)
+                )
+            logger.info(f"Reusing processed document {doc_hash[:12]} for {filename}")
+            return job_id
+
+        if self.queue_depth() >= self.max_queued:
+            logger.warning(f"Ingestion queue full, rejecting {filename}")
+            return None
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, filename, document_hash, status, created, owner) "
+                "VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, filename, doc_hash, now, _owner())
+            )
+        self.executor.submit(self._run, job_id, filename, data, doc_hash, pdf_processor, document_store)
+        return job_id
+
+    @contextmanager
+    def _stage(self, job_id: str, stage: str, timings: Dict[str, float]):
+        self._update(job_id, stage=stage, progress=STAGE_PROGRESS[stage], timings=json.dumps(timings))
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings[stage] = round(time.perf_counter() - start, 3)
+
+    def _run(self, job_id: str, filename: str, data: bytes, doc_hash: str, pdf_processor, document_store):
+        timings: Dict[str, float] = {}
+        self._update(job_id, status='running', started=time.time())
+        try:
+            with document_store.processing(doc_hash):
+                # A concurrent upload of the same file may have finished meanwhile
+                session_id = document_store.open_session(doc_hash)
+                deduplicated = session_id is not None
+                if session_id is None:
+                    logger.info(f"Processing PDF: {filename}")
+                    with self._stage(job_id, 'extract', timings):
+                        text = pdf_processor.extract_text_from_pdf(io.BytesIO(data))
+                    if not text:
+                        raise ValueError('Could not extract text from PDF')
+
+                    with self._stage(job_id, 'chunk', timings):
+                        chunks = pdf_processor.split_text_into_chunks(text)
+                    if not chunks:
+                        raise ValueError('Could not process text chunks')
+
+                    with self._stage(job_id, 'embed', timings):
+                        vector_store = pdf_processor.create_vector_store(chunks)
+                    if not vector_store:
+                        raise ValueError('Could not create vector store')
+
+                    with self._stage(job_id, 'store', timings):
+                        document_store.add_document(doc_hash, text, chunks, vector_store)
+                        session_id = document_store.open_session(doc_hash)
+
+            self._update(job_id, status='done', stage=None, progress=1.0, session_id=session_id,
+                         deduplicated=int(deduplicated), timings=json.dumps(timings), finished=time.time())
+            logger.info(f"Ingestion job {job_id[:8]} finished: {timings}")
+        except Exception as e:
+            logger.error(f"Ingestion job {job_id[:8]} failed: {str(e)}")
+            self._update(job_id, status='failed', error=str(e), timings=json.dumps(timings), finished=time.time())
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status, stage, progress and stage timings of a job; the session ID once it is done."""
+        with self._connect() as conn:
+            self._fail_stalled(conn, time.time())
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['deduplicated'] = bool(job['deduplicated'])
+        job['timings'] = json.loads(job['timings'] or '{}')
+        job['queued_seconds'] = round((job['started'] or time.time()) - job['created'], 3)
+        if job['status'] == 'queued':
+            with self._connect() as conn:
+                job['queue_position'] = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created < ?", (job['created'],)
+                ).fetchone()[0] + 1
+        return job
+
+    def stats(self, recent: int = 100) -> Dict[str, Any]:
+        """Jobs per status and mean stage timings over the most recent completed jobs."""
+        with self._connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            rows = conn.execute(
+                "SELECT timings, started - created FROM jobs WHERE status = 'done' AND deduplicated = 0 "
+                "ORDER BY finished DESC LIMIT ?", (recent,)
+            ).fetchall()
+
+        totals: Dict[str, float] = {}
+        for timings, _ in rows:
+            for stage, seconds in json.loads(timings or '{}').items():
+                totals[stage] = totals.get(stage, 0.0) + seconds
+        return {
+            'queue_depth': counts.get('queued', 0),
+            'running': counts.get('running', 0),
+            'done': counts.get('done', 0),
+            'failed': counts.get('failed', 0),
+            'workers': self.workers,
+            'max_queued': self.max_queued,
+            'mean_stage_seconds': {stage: round(total / len(rows), 3) for stage, total in totals.items()},
+            'mean_queued_seconds': round(sum(wait for _, wait in rows) / len(rows), 3) if rows else 0.0
+        }
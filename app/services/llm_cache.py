@@ -0,0 +1,75 @@
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+from app.services.cache_store import SQLiteCache
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class LLMResponseCache:
+    """Cache of LLM responses keyed on (provider, model, prompt, parameters).
+
+    Responses are kept in the shared SQLite cache, so every worker benefits,
+    expire after ``ttl`` seconds and are trimmed to the ``max_entries`` most
+    recently used. Each entry remembers how long the original call took, so
+    ``stats`` can report the latency saved by hits.
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = 7 * 86400, max_entries: Optional[int] = 10000):
+        self.store = SQLiteCache(path, 'llm_responses', ttl=ttl, max_entries=max_entries)
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.seconds_saved = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(provider: str, model: str, prompt: str, params: Optional[Dict[str, Any]] = None) -> str:
+        payload = json.dumps({'provider': provider, 'model': model, 'prompt': prompt, 'params': params or {}},
+                             sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def complete(self, provider: str, model: str, prompt: str, params: Optional[Dict[str, Any]],
+                 call: Callable[[], str], use_cache: bool = True) -> str:
+        """Return the cached response for this request, or run ``call`` and cache its result.
+
+        With ``use_cache=False`` the cache is neither read nor written. Errors
+        raised by ``call`` propagate and nothing is cached.
+        """
+        if not use_cache:
+            with self._lock:
+                self.bypassed += 1
+            return call()
+
+        key = self.key(provider, model, prompt, params)
+        entry = self.store.get(key)
+        if entry is not None:
+            with self._lock:
+                self.hits += 1
+                self.seconds_saved += entry.get('latency', 0.0)
+            return entry['response']
+
+        start = time.perf_counter()
+        response = call()
+        latency = time.perf_counter() - start
+        with self._lock:
+            self.misses += 1
+        if response:
+            self.store.set(key, {'response': response, 'latency': round(latency, 3)})
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and latency saved in this worker since start-up, plus the shared entry count."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'bypassed': self.bypassed,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'seconds_saved': round(self.seconds_saved, 3),
+                'entries': len(self.store)
+            }
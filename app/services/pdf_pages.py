@@ -0,0 +1,97 @@
+import io
+import signal
+import logging
+import threading
+import multiprocessing
+from typing import List
+from PyPDF2 import PdfReader
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Worker processes import this module and, through it, the app package (Flask and SQLAlchemy),
+# but not the services that load the ML and LLM stacks
+_worker_reader = None
+_context = None
+_context_lock = threading.Lock()
+
+def _init_page_worker(data: bytes):
+    """Open the PDF once per worker process."""
+    global _worker_reader
+    _worker_reader = PdfReader(io.BytesIO(data))
+
+def _on_page_timeout(signum, frame):
+    raise TimeoutError("page extraction timed out")
+
+def read_page(reader: PdfReader, page_num: int) -> str:
+    try:
+        return reader.pages[page_num].extract_text() or ""
+    except TimeoutError:
+        raise
+    except Exception as e:
+        logger.warning(f"Error extracting text from page {page_num + 1}: {str(e)}")
+        return ""
+
+def _extract_page(args):
+    """Extract one page's text in a worker; returns (page_num, text), with empty text on error or timeout."""
+    page_num, timeout = args
+    # SIGALRM only works in a process's main thread, i.e. in pool workers
+    use_alarm = bool(timeout) and hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_page_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return page_num, read_page(_worker_reader, page_num)
+    except TimeoutError:
+        logger.warning(f"Skipping page {page_num + 1}: extraction took longer than {timeout}s")
+        return page_num, ""
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+def _get_context():
+    """Start workers from a forkserver (or spawn), never by forking the threaded app process.
+
+    Extraction runs on ingest threads of a process that also runs torch thread
+    pools; a forked child can inherit a lock another thread held and deadlock.
+    The fork server is a small single-threaded process started once, so its
+    children still start quickly.
+    """
+    global _context
+    with _context_lock:
+        if _context is None:
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                _context = multiprocessing.get_context('forkserver')
+                _context.set_forkserver_preload([__name__])
+            else:
+                _context = multiprocessing.get_context('spawn')
+        return _context
+
+def extract_pages(data: bytes, page_count: int, workers: int = 1, page_timeout: float = 20) -> List[str]:
+    """Extract every page's text in worker processes; pages that time out or never return are left empty.
+
+    Even a single worker keeps the per-page timeout enforceable, which a
+    thread in the app process cannot do. Pages are collected in order, so a
+    stall is always the lowest outstanding page: the pool is killed, that page
+    is skipped and the remaining pages go to a fresh pool.
+    """
+    page_texts = [""] * page_count
+    remaining = list(range(page_count))
+    while remaining:
+        pool = _get_context().Pool(processes=max(1, min(workers, len(remaining))),
+                                   initializer=_init_page_worker, initargs=(data,))
+        done = 0
+        try:
+            results = pool.imap(_extract_page, [(page_num, page_timeout) for page_num in remaining])
+            for page_num in remaining:
+                # Safety net for pages stuck where the in-worker alarm cannot interrupt them
+                _, page_texts[page_num] = results.next(timeout=page_timeout + 5 if page_timeout else None)
+                done += 1
+        except multiprocessing.TimeoutError:
+            logger.warning(f"Skipping page {remaining[done] + 1}: extraction stalled; "
+                           f"restarting workers for {len(remaining) - done - 1} remaining pages")
+            done += 1
+        finally:
+            pool.terminate()
+        remaining = remaining[done:]
+    return page_texts
@@ -1,10 +1,8 @@
+import io
 import os
 import logging
 from typing import Dict, Any, Optional, List
 from PyPDF2 import PdfReader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from sentence_transformers import SentenceTransformer
-import numpy as np
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.chains.question_answering import load_qa_chain
 from langchain.prompts import PromptTemplate
@@ -12,20 +10,42 @@ import google.generativeai as genai
 import openai
 import re
 from datetime import datetime
+from app.services.inference import load_sentence_encoder
+from app.services.pdf_pages import extract_pages
+from app.services.vector_store import VectorStore
+from app.services.chunker import TokenChunker, tokenizer_token_counter
+from app.services.summarizer import MapReduceSummarizer
+
+SUMMARY_SYSTEM_PROMPT = ("You are an expert research assistant specializing in academic paper analysis and summarization. "
+                         "Always format output with proper markdown and LaTeX.")
+SUMMARY_MODES = ('map_reduce', 'single')
+GEMINI_MODEL = 'gemini-1.5-flash'
+OPENAI_MODEL = 'gpt-3.5-turbo'
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class PDFProcessor:
-    def __init__(self, openai_api_key: str, google_api_key: str = None):
+    def __init__(self, openai_api_key: str, google_api_key: str = None, inference_backend: str = 'torch',
+                 extract_workers: Optional[int] = None, parallel_min_pages: int = 16, page_timeout: float = 20,
+                 embed_chunk_tokens: int = 256, embed_chunk_overlap: int = 32,
+                 context_chunk_tokens: int = 2000, context_chunk_overlap: int = 200,
+                 summary_mode: str = 'map_reduce', summary_concurrency: int = 4, summary_cache=None,
+                 response_cache=None):
         self.openai_api_key = openai_api_key
         self.google_api_key = google_api_key
+        self.inference_backend = inference_backend
+        self.extract_workers = extract_workers or os.cpu_count() or 1
+        self.parallel_min_pages = parallel_min_pages
+        self.page_timeout = page_timeout
+        self.context_chunk_tokens = context_chunk_tokens
+        self.response_cache = response_cache
         
         # Initialize Google Gemini if API key is provided
         if self.google_api_key:
             try:
                 genai.configure(api_key=self.google_api_key)
-                self.gemini_model = genai.GenerativeModel('gemini-1.5-flash')
+                self.gemini_model = genai.GenerativeModel(GEMINI_MODEL)
                 logger.info("Google Gemini API configured successfully")
             except Exception as e:
                 logger.error(f"Error configuring Google Gemini: {str(e)}")
@@ -34,39 +54,58 @@ class PDFProcessor:
             self.gemini_model = None
             logger.warning("Google API key not provided. Using OpenAI for summarization.")
         
-        # Initialize embeddings and text splitter
+        # Initialize embeddings and chunkers. Chunks are measured in the encoder's own
+        # tokens: embedding chunks fit its window (minus [CLS]/[SEP]) so nothing is
+        # truncated, while context chunks are sized for LLM prompts.
         try:
-            self.embeddings = SentenceTransformer('all-MiniLM-L6-v2')
-            self.text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=5000,
-                chunk_overlap=500
-            )
-            logger.info("Embeddings and text splitter initialized")
+            self.embeddings = load_sentence_encoder('all-MiniLM-L6-v2', self.inference_backend)
+            count_tokens = tokenizer_token_counter(self.embeddings.tokenizer)
+            embed_chunk_tokens = min(embed_chunk_tokens, self.embeddings.max_seq_length - 2)
+            logger.info("Embeddings initialized")
         except Exception as e:
             logger.error(f"Error initializing embeddings: {str(e)}")
             self.embeddings = None
-            self.text_splitter = None
+            count_tokens = None
+        self.embed_chunker = TokenChunker(count_tokens, embed_chunk_tokens, min(embed_chunk_overlap, embed_chunk_tokens // 2))
+        self.context_chunker = TokenChunker(count_tokens, context_chunk_tokens, context_chunk_overlap)
+        
+        if summary_mode not in SUMMARY_MODES:
+            raise ValueError(f"Unknown summary mode '{summary_mode}', expected one of {SUMMARY_MODES}")
+        self.summary_mode = summary_mode
+        self.summarizer = MapReduceSummarizer(
+            lambda prompt, max_tokens, use_cache: self._generate(prompt, SUMMARY_SYSTEM_PROMPT, max_tokens=max_tokens,
+                                                                 use_cache=use_cache),
+            self.context_chunker, cache=summary_cache, concurrency=summary_concurrency,
+            model=self.generator_id
+        )
     
     def extract_text_from_pdf(self, pdf_file) -> str:
-        """Extract text from uploaded PDF file."""
+        """Extract text from uploaded PDF file.
+
+        Pages are extracted in worker processes, several for large documents and
+        one for small ones; every page gets at most ``page_timeout`` seconds and
+        the page texts are joined once, in order.
+        """
         try:
-            text = ""
-            pdf_reader = PdfReader(pdf_file)
-            
-            for page_num, page in enumerate(pdf_reader.pages):
-                try:
-                    page_text = page.extract_text()
-                    if page_text.strip():
-                        text += f"\n--- Page {page_num + 1} ---\n{page_text}\n"
-                except Exception as e:
-                    logger.warning(f"Error extracting text from page {page_num + 1}: {str(e)}")
-                    continue
+            if hasattr(pdf_file, 'read'):
+                data = pdf_file.read()
+            else:
+                with open(pdf_file, 'rb') as f:
+                    data = f.read()
+            page_count = len(PdfReader(io.BytesIO(data)).pages)
+            workers = self.extract_workers if page_count >= self.parallel_min_pages else 1
+            page_texts = extract_pages(data, page_count, workers=workers, page_timeout=self.page_timeout)
+            
+            text = "".join(
+                f"\n--- Page {page_num + 1} ---\n{page_text}\n"
+                for page_num, page_text in enumerate(page_texts) if page_text and page_text.strip()
+            )
             
             if not text.strip():
                 logger.warning("No text extracted from PDF")
                 return ""
             
-            logger.info(f"Successfully extracted {len(text)} characters from PDF")
+            logger.info(f"Successfully extracted {len(text)} characters from {page_count} PDF pages")
             return text
             
         except Exception as e:
@@ -74,24 +113,30 @@ class PDFProcessor:
             return ""
     
     def split_text_into_chunks(self, text: str) -> List[str]:
-        """Split text into chunks for processing."""
+        """Split text into chunks that fit the embedding model's context window."""
         try:
             if not text.strip():
                 return []
             
-            if not self.text_splitter:
-                logger.error("Text splitter not initialized")
-                return []
-            
-            chunks = self.text_splitter.split_text(text)
-            logger.info(f"Split text into {len(chunks)} chunks")
+            chunks = self.embed_chunker.split(text)
+            logger.info(f"Split text into {len(chunks)} chunks of up to {self.embed_chunker.chunk_tokens} tokens")
             return chunks
             
         except Exception as e:
             logger.error(f"Error splitting text: {str(e)}")
             return []
     
-    def create_vector_store(self, chunks: List[str]) -> Optional[Dict[str, Any]]:
+    def split_text_for_context(self, text: str) -> List[str]:
+        """Split text into larger chunks sized for LLM prompts."""
+        try:
+            if not text.strip():
+                return []
+            return self.context_chunker.split(text)
+        except Exception as e:
+            logger.error(f"Error splitting text: {str(e)}")
+            return []
+    
+    def create_vector_store(self, chunks: List[str]) -> Optional[VectorStore]:
         """Create vector store from text chunks using sentence-transformers."""
         try:
             if not chunks:
@@ -102,45 +147,26 @@ class PDFProcessor:
                 logger.error("Embeddings not initialized")
                 return None
             
-            # Create embeddings for all chunks
-            embeddings = self.embeddings.encode(chunks)
-            
-            # Convert NumPy arrays to lists for JSON serialization
-            embeddings_list = embeddings.tolist()
+            # Create embeddings for all chunks, kept as one float32 matrix
+            embeddings = self.embeddings.encode(chunks, convert_to_numpy=True)
+            vector_store = VectorStore(chunks, embeddings, 'all-MiniLM-L6-v2')
             
-            vector_store = {
-                'chunks': chunks,
-                'embeddings': embeddings_list,
-                'model_name': 'all-MiniLM-L6-v2'
-            }
-            
-            logger.info("Vector store created successfully")
+            logger.info(f"Vector store created successfully ({len(vector_store)} chunks, {vector_store.nbytes} bytes)")
             return vector_store
             
         except Exception as e:
             logger.error(f"Error creating vector store: {str(e)}")
             return None
     
-    def similarity_search(self, vector_store: Dict[str, Any], query: str, k: int = 3) -> List[str]:
+    def similarity_search(self, vector_store: VectorStore, query: str, k: int = 3) -> List[str]:
         """Search for similar chunks using cosine similarity."""
         try:
             if not vector_store or not self.embeddings:
                 return []
             
-            # Encode the query
-            query_embedding = self.embeddings.encode([query])
-            
-            # Convert embeddings back to NumPy array for similarity calculation
-            embeddings_array = np.array(vector_store['embeddings'])
-            
-            # Calculate cosine similarity
-            from sklearn.metrics.pairwise import cosine_similarity
-            similarities = cosine_similarity(query_embedding, embeddings_array)[0]
-            
-            # Get top k most similar chunks
-            top_indices = np.argsort(similarities)[-k:][::-1]
-            
-            return [vector_store['chunks'][i] for i in top_indices]
+            # Encode the query and score it against every chunk at once
+            query_embedding = self.embeddings.encode([query], convert_to_numpy=True)[0]
+            return [vector_store.chunks[i] for i, _ in vector_store.search(query_embedding, k=k)]
             
         except Exception as e:
             logger.error(f"Error in similarity search: {str(e)}")
@@ -191,13 +217,61 @@ class PDFProcessor:
         
         return text
     
-    def generate_summary(self, text: str) -> str:
-        """Generate comprehensive summary using Google Gemini or OpenAI."""
-        try:
-            if not text.strip():
-                return "No text available for summarization."
-            
-            prompt = f"""
+    def _openai_chat(self, prompt: str, system_prompt: str, max_tokens: int = 2000, temperature: float = 0.3,
+                     use_cache: bool = True) -> str:
+        def call():
+            from openai import OpenAI
+            client = OpenAI(api_key=self.openai_api_key)
+            response = client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=max_tokens,
+                temperature=temperature
+            )
+            return response.choices[0].message.content.strip()
+        
+        if self.response_cache is None:
+            return call()
+        params = {'system': system_prompt, 'max_tokens': max_tokens, 'temperature': temperature}
+        return self.response_cache.complete('openai', OPENAI_MODEL, prompt, params, call, use_cache=use_cache)
+    
+    def _gemini_generate(self, prompt: str, use_cache: bool = True) -> str:
+        def call():
+            return self.gemini_model.generate_content(prompt).text.strip()
+        
+        if self.response_cache is None:
+            return call()
+        return self.response_cache.complete('google', GEMINI_MODEL, prompt, None, call, use_cache=use_cache)
+    
+    @property
+    def generator_id(self) -> str:
+        """Providers and models ``_generate`` tries, in order; keys cached results to what produced them."""
+        providers = []
+        if self.gemini_model:
+            providers.append(f"google/{GEMINI_MODEL}")
+        if self.openai_api_key:
+            providers.append(f"openai/{OPENAI_MODEL}")
+        return '+'.join(providers)
+    
+    def _generate(self, prompt: str, system_prompt: str, max_tokens: int = 2000, temperature: float = 0.3,
+                  use_cache: bool = True) -> str:
+        """Run a prompt on Google Gemini, falling back to OpenAI; raises if neither succeeds."""
+        if self.gemini_model:
+            try:
+                return self._gemini_generate(prompt, use_cache=use_cache)
+            except Exception as e:
+                logger.warning(f"Google Gemini failed, falling back to OpenAI: {str(e)}")
+        
+        if not self.openai_api_key:
+            raise RuntimeError("No AI service configured")
+        return self._openai_chat(prompt, system_prompt, max_tokens=max_tokens, temperature=temperature, use_cache=use_cache)
+    
+    def _summary_prompt(self, content: str, sectioned: bool) -> str:
+        source = "Summaries of the document's consecutive sections" if sectioned else "Document text"
+        return f"""
             You are an AI assistant specializing in creating detailed summaries of academic documents for literature reviews. 
             Your task is to summarize the document following these guidelines:
 
@@ -215,8 +289,8 @@ class PDFProcessor:
             For each equation, please format it in LaTeX style using the following format:
             $equation$
             
-            Document text:
-            {text[:8000]}  # Limit text length for API
+            {source}:
+            {content}
             
             Please provide a comprehensive, well-structured summary that covers all these aspects.
             Format the output with proper markdown:
@@ -226,51 +300,47 @@ class PDFProcessor:
             - Use **bold** for emphasis
             - Use proper LaTeX formatting for equations
             """
+    
+    def generate_summary(self, text: str, use_cache: bool = True) -> str:
+        """Generate comprehensive summary using Google Gemini or OpenAI.
+
+        In ``map_reduce`` mode the whole document is covered: context-sized
+        chunks are summarized concurrently and merged by a final call. The
+        ``single`` mode only sends the first context chunk.
+        """
+        try:
+            if not text.strip():
+                return "No text available for summarization."
             
-            # Try Google Gemini first, fallback to OpenAI
-            if self.gemini_model:
-                try:
-                    response = self.gemini_model.generate_content(prompt)
-                    summary = response.text.strip()
-                    logger.info("Summary generated using Google Gemini")
-                    return summary
-                except Exception as e:
-                    logger.warning(f"Google Gemini failed, falling back to OpenAI: {str(e)}")
-            
-            # Fallback to OpenAI
-            if self.openai_api_key:
-                from openai import OpenAI
-                client = OpenAI(api_key=self.openai_api_key)
-                
-                response = client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are an expert research assistant specializing in academic paper analysis and summarization. Always format output with proper markdown and LaTeX."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=2000,
-                    temperature=0.3
-                )
-                
-                summary = response.choices[0].message.content.strip()
-                logger.info("Summary generated using OpenAI")
-                return summary
-            else:
+            if not self.gemini_model and not self.openai_api_key:
                 return "Error: No AI service configured for summarization."
             
+            if self.summary_mode == 'map_reduce':
+                summary = self.summarizer.summarize(text, self._summary_prompt, use_cache=use_cache)
+            else:
+                chunks = self.split_text_for_context(text)
+                summary = self._generate(self._summary_prompt(chunks[0] if chunks else text, False), SUMMARY_SYSTEM_PROMPT,
+                                         use_cache=use_cache)
+            logger.info(f"Summary generated ({self.summary_mode})")
+            return summary
+            
         except Exception as e:
             logger.error(f"Error generating summary: {str(e)}")
             return f"Error generating summary: {str(e)}"
     
-    def answer_question(self, question: str, vector_store: Dict[str, Any]) -> str:
+    def answer_question(self, question: str, vector_store: VectorStore, use_cache: bool = True) -> str:
         """Answer questions about the document using vector search."""
         try:
             if not vector_store:
                 return "No document has been processed yet. Please upload a document first."
+            if not self.embeddings:
+                return "Error: Embedding model is not available."
             
-            # Search for relevant chunks
-            relevant_chunks = self.similarity_search(vector_store, question, k=3)
-            context = "\n\n".join(relevant_chunks)
+            # Fill the context budget with the best matching chunks, in document order
+            k = max(3, self.context_chunk_tokens // self.embed_chunker.chunk_tokens)
+            query_embedding = self.embeddings.encode([question], convert_to_numpy=True)[0]
+            hits = sorted(i for i, _ in vector_store.search(query_embedding, k=k))
+            context = "\n\n".join(vector_store.chunks[i] for i in hits)
             
             prompt = f"""
             You are an AI research assistant. Use the provided context from research papers to answer the question as accurately as possible. 
@@ -282,42 +352,18 @@ class PDFProcessor:
             Please provide a clear, concise answer based on the context provided.
             """
             
-            # Try Google Gemini first, fallback to OpenAI
-            if self.gemini_model:
-                try:
-                    response = self.gemini_model.generate_content(prompt)
-                    answer = response.text.strip()
-                    logger.info("Question answered using Google Gemini")
-                    return answer
-                except Exception as e:
-                    logger.warning(f"Google Gemini failed, falling back to OpenAI: {str(e)}")
-            
-            # Fallback to OpenAI
-            if self.openai_api_key:
-                from openai import OpenAI
-                client = OpenAI(api_key=self.openai_api_key)
-                
-                response = client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are an expert research assistant."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=1000,
-                    temperature=0.3
-                )
-                
-                answer = response.choices[0].message.content.strip()
-                logger.info("Question answered using OpenAI")
-                return answer
-            else:
+            if not self.gemini_model and not self.openai_api_key:
                 return "Error: No AI service configured for question answering."
+            # Google Gemini first, falling back to OpenAI
+            answer = self._generate(prompt, "You are an expert research assistant.", max_tokens=1000, use_cache=use_cache)
+            logger.info("Question answered")
+            return answer
             
         except Exception as e:
             logger.error(f"Error answering question: {str(e)}")
             return f"Error answering question: {str(e)}"
     
-    def extract_key_information(self, text: str) -> Dict[str, Any]:
+    def extract_key_information(self, text: str, use_cache: bool = True) -> Dict[str, Any]:
         """Extract key information from the document."""
         try:
             prompt = f"""
@@ -338,20 +384,10 @@ class PDFProcessor:
             Return the information in a clear, structured format.
             """
             
-            from openai import OpenAI
-            client = OpenAI(api_key=self.openai_api_key)
-            
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert at extracting structured information from academic documents."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1500,
-                temperature=0.2
+            extracted_info = self._openai_chat(
+                prompt, "You are an expert at extracting structured information from academic documents.",
+                max_tokens=1500, temperature=0.2, use_cache=use_cache
             )
-            
-            extracted_info = response.choices[0].message.content.strip()
             logger.info("Key information extracted successfully")
             
             return {
@@ -1,29 +1,169 @@
-from transformers import AutoModel, AutoTokenizer, pipeline
-import torch
 from sklearn.metrics.pairwise import cosine_similarity
-import arxiv
 import numpy as np
 import logging
+import os
+import re
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from app.services.arxiv_client import ArxivClient, ArxivResult, get_arxiv_client
+from app.services.bm25 import BM25Index, reciprocal_rank_fusion
+from app.services.cache_store import SQLiteCache, TTLCache
+from app.services.embedding_cache import EmbeddingCache
+from app.services.inference import load_transformer_encoder, loaded_backend
+from app.services.trending import compute_trending, harvested_categories, has_counts
+from app.services.vector_index import VectorIndex
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEFAULT_CACHE_DIR = os.getenv(
+    'RESEARCH_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'cache')
+)
+
+# Trending categories with their search queries and display names
+TRENDING_QUERIES = {
+    'cs.LG': ('machine learning', 'Machine Learning'),
+    'cs.AI': ('artificial intelligence', 'Artificial Intelligence'),
+    'cs.CV': ('computer vision', 'Computer Vision'),
+    'cs.CL': ('natural language processing', 'Natural Language Processing'),
+    'cs.NE': ('neural networks', 'Neural Networks'),
+    'cs.RO': ('robotics', 'Robotics'),
+    'cs.CR': ('cryptography', 'Cryptography'),
+    'cs.DC': ('distributed computing', 'Distributed Computing')
+}
+
+def _merge_ranked(ranked: List[Dict[str, Any]], scored: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+    """Merge two best-first paper lists by similarity score, keeping each list's own order."""
+    merged, i, j = [], 0, 0
+    while len(merged) < limit and (i < len(ranked) or j < len(scored)):
+        if j >= len(scored) or (i < len(ranked) and ranked[i]['similarity_score'] >= scored[j]['similarity_score']):
+            merged.append(ranked[i])
+            i += 1
+        else:
+            merged.append(scored[j])
+            j += 1
+    return merged
+
+def _base_arxiv_id(arxiv_id: str) -> str:
+    """Strip the version suffix from an arXiv ID (1706.03762v7 -> 1706.03762)."""
+    return re.sub(r'v\d+$', '', arxiv_id)
+
+def _truncate_abstract(abstract: str) -> str:
+    return abstract[:200] + ("..." if len(abstract) > 200 else "")
+
 class SearchService:
-    def __init__(self):
+    def __init__(self, cache_dir: Optional[str] = None, embedding_cache_size: int = 100000,
+                 local_min_score: Optional[float] = None, preload: bool = False, arxiv_concurrency: int = 3,
+                 arxiv_client: Optional[ArxivClient] = None, trending_ttl: float = 1800, details_ttl: float = 86400,
+                 inference_backend: str = 'torch', query_cache_size: int = 1024,
+                 query_cache_ttl: Optional[float] = 3600, query_cache_shared: bool = False,
+                 retrieval_mode: str = 'direct', rerank_pool_factor: int = 10, rerank_max_pool: int = 200,
+                 rerank_latency_budget: float = 10.0, hybrid_search: bool = True, lexical_candidates: int = 100,
+                 vector_storage: str = 'float32', pq_subvectors: int = 96, summary_cache_size: int = 100000, app=None):
+        self.app = app  # Used to query the local paper store from background threads
         self.scibert_model = None
         self.tokenizer = None
         self.summarizer = None
-        self._load_models()
+        self.embedding_cache = None
+        self.summary_cache = None
+        self.details_cache = None
+        self.paper_index = None
+        self.lexical_index = None
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.embedding_cache_size = embedding_cache_size
+        self.local_min_score = local_min_score
+        self.index_path = os.path.join(self.cache_dir, 'index', 'papers.npz')
+        self.lexical_index_path = os.path.join(self.cache_dir, 'index', 'bm25.json')
+        self.index_reload_interval = 30  # Seconds between checks for an index saved by another process
+        self._index_mtime = None
+        self._index_checked = 0.0
+        # The harvester thread adds to the indexes while request threads search them
+        self._index_lock = threading.RLock()
+        self.arxiv_concurrency = arxiv_concurrency
+        # Shared with the other services so all arXiv traffic follows one rate limit
+        self.arxiv_client = arxiv_client or get_arxiv_client()
+        self.trending_ttl = trending_ttl
+        self.details_ttl = details_ttl
+        self.summary_cache_size = summary_cache_size
+        self.inference_backend = inference_backend
+        self.retrieval_mode = retrieval_mode
+        self.rerank_pool_factor = rerank_pool_factor
+        self.rerank_max_pool = rerank_max_pool
+        self.rerank_latency_budget = rerank_latency_budget
+        self.hybrid_search = hybrid_search
+        self.lexical_candidates = lexical_candidates
+        self.vector_storage = vector_storage
+        self.pq_subvectors = pq_subvectors
+        self._trending_cache = None
+        self._trending_refreshing = False
+        self._trending_lock = threading.Lock()
+        self._trending_done = threading.Condition(self._trending_lock)
+        self.loading = False
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self._init_summary_cache()
+        self.query_cache = TTLCache(
+            max_entries=query_cache_size,
+            ttl=query_cache_ttl,
+            backend=SQLiteCache(os.path.join(self.cache_dir, 'cache.db'), 'search_results',
+                                ttl=query_cache_ttl, max_entries=query_cache_size * 10) if query_cache_shared else None
+        )
+        
+        # Models are loaded on first use (or by warm_up) rather than at construction
+        if preload:
+            self.ensure_loaded()
     
+    @property
+    def is_ready(self) -> bool:
+        """True once models are loaded and the service can answer requests."""
+        return self._loaded and self.scibert_model is not None
+
+    def ensure_loaded(self):
+        """Load models, the embedding cache and the local index on first use."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            self.loading = True
+            try:
+                self._load_models()
+                self._init_embedding_cache()
+                self._load_paper_index()
+                self._loaded = True
+            finally:
+                self.loading = False
+
+    def warm_up(self):
+        """Load models, run one small inference and prime trending topics so the first real request pays no load cost."""
+        try:
+            start = time.time()
+            self.refresh_trending_topics_async()
+            self.ensure_loaded()
+            if self.scibert_model:
+                self.get_scibert_embeddings(["scientific text warm up"])
+            if self.summarizer:
+                self.summarizer("scientific text warm up " * 20, max_length=20, min_length=5, do_sample=False)
+            logger.info(f"Search service warmed up in {time.time() - start:.1f}s")
+        except Exception as e:
+            logger.error(f"Error warming up search service: {str(e)}")
+
     def _load_models(self):
         """Load SciBERT and summarization models."""
         try:
+            # Imported here so that importing this module (and creating the app) stays cheap
+            from transformers import AutoTokenizer, pipeline
+            
             self.model_name = "allenai/scibert_scivocab_uncased"
-            logger.info(f"Loading SciBERT model: {self.model_name}")
+            logger.info(f"Loading SciBERT model: {self.model_name} ({self.inference_backend} backend)")
             self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            self.scibert_model = AutoModel.from_pretrained(self.model_name)
+            self.scibert_model = load_transformer_encoder(self.model_name, self.inference_backend)
             
             logger.info("Loading summarization model")
             self.summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
@@ -34,9 +174,262 @@ class SearchService:
             self.tokenizer = None
             self.summarizer = None
 
-    def get_scibert_embedding(self, text: str) -> Optional[np.ndarray]:
+    def _init_embedding_cache(self):
+        """Open the persistent embedding store shared by all workers."""
+        if not self.scibert_model:
+            return
+        try:
+            # Quantized backends produce slightly different vectors, so they get their own store;
+            # label it by the backend actually loaded, which differs from the requested one after a fallback
+            backend = loaded_backend(self.scibert_model, self.inference_backend)
+            cache_model_name = self.model_name if backend == 'torch' else f"{self.model_name}-{backend}"
+            # Compact index formats keep their cached embeddings in float16 as well
+            cache_dtype = 'float32' if self.vector_storage == 'float32' else 'float16'
+            if cache_dtype != 'float32':
+                cache_model_name = f"{cache_model_name}-{cache_dtype}"
+            self.embedding_cache = EmbeddingCache(
+                os.path.join(self.cache_dir, 'embeddings'),
+                cache_model_name,
+                self.scibert_model.config.hidden_size,
+                max_entries=self.embedding_cache_size,
+                dtype=cache_dtype
+            )
+        except Exception as e:
+            logger.error(f"Error opening embedding cache: {str(e)}")
+            self.embedding_cache = None
+
+    def _init_summary_cache(self):
+        """Open the abstract summary and paper details caches shared by all workers."""
+        try:
+            self.summary_cache = SQLiteCache(os.path.join(self.cache_dir, 'cache.db'), 'abstract_summaries',
+                                             max_entries=self.summary_cache_size)
+            self.details_cache = SQLiteCache(os.path.join(self.cache_dir, 'cache.db'), 'paper_details',
+                                             ttl=self.details_ttl, max_entries=50000)
+        except Exception as e:
+            logger.error(f"Error opening summary cache: {str(e)}")
+            self.summary_cache = None
+            self.details_cache = None
+
+    def _load_paper_index(self):
+        """Load the local paper index from disk, or start an empty one."""
+        if not self.scibert_model:
+            return
+        # Load into locals and swap both indexes in together so searches never see a half-loaded pair
+        mtime = self._get_index_mtime()
+        try:
+            if os.path.exists(self.index_path):
+                paper_index = VectorIndex.load(self.index_path)
+                logger.info(f"Loaded local paper index with {len(paper_index)} papers ({paper_index.storage})")
+                if paper_index.storage != self.vector_storage:
+                    logger.info(f"Converting local paper index to {self.vector_storage} storage")
+                    paper_index = paper_index.convert(self.vector_storage, pq_subvectors=self.pq_subvectors)
+            else:
+                paper_index = self._new_paper_index()
+        except Exception as e:
+            logger.error(f"Error loading local paper index: {str(e)}")
+            paper_index = self._new_paper_index()
+        
+        try:
+            if os.path.exists(self.lexical_index_path):
+                lexical_index = BM25Index.load(self.lexical_index_path)
+            else:
+                lexical_index = BM25Index()
+        except Exception as e:
+            logger.error(f"Error loading lexical index: {str(e)}")
+            lexical_index = BM25Index()
+        with self._index_lock:
+            self.paper_index = paper_index
+            self.lexical_index = lexical_index
+            self._index_mtime = mtime
+        self._index_checked = time.monotonic()
+
+    def _new_paper_index(self) -> VectorIndex:
+        return VectorIndex(self.scibert_model.config.hidden_size, storage=self.vector_storage,
+                           pq_subvectors=self.pq_subvectors)
+
+    def _get_index_mtime(self) -> Optional[float]:
+        # The lexical index is written last, so its mtime marks a complete save
+        try:
+            return os.path.getmtime(self.lexical_index_path)
+        except OSError:
+            return None
+
+    def _maybe_reload_paper_index(self):
+        """Pick up an index saved by another process (e.g. the harvester), checking at most every few seconds."""
+        now = time.monotonic()
+        if now - self._index_checked < self.index_reload_interval:
+            return
+        self._index_checked = now
+        mtime = self._get_index_mtime()
+        if mtime is not None and mtime != self._index_mtime:
+            logger.info("Local paper index changed on disk, reloading")
+            self._load_paper_index()
+
+    def index_papers(self, papers: List[Dict[str, Any]], save: bool = True) -> int:
+        """Embed papers (dicts with arxiv_id, title and abstract) and add them to the local index."""
+        try:
+            self.ensure_loaded()
+            if self.paper_index is None or not papers:
+                return 0
+            
+            texts = [f"{paper['title']} {paper.get('abstract', '')}" for paper in papers]
+            ids = [paper['arxiv_id'] for paper in papers]
+            embeddings = self.get_scibert_embeddings(texts, cache_keys=ids)
+            
+            indexed = [(paper_id, emb) for paper_id, emb in zip(ids, embeddings) if emb is not None]
+            if not indexed:
+                return 0
+            # Embedding happens above without the lock; only the index updates exclude searches
+            with self._index_lock:
+                self.paper_index.add([paper_id for paper_id, _ in indexed], np.stack([emb for _, emb in indexed]))
+                indexed_ids = {paper_id for paper_id, _ in indexed}
+                for paper_id, text in zip(ids, texts):
+                    if paper_id in indexed_ids:
+                        self.lexical_index.add(paper_id, text)
+                
+                # Switch from exact to IVF search once there are enough vectors per list
+                if not self.paper_index.is_trained and len(self.paper_index) >= 39 * self.paper_index.nlist:
+                    self.paper_index.train()
+                
+                if save:
+                    self.save_paper_index()
+            logger.info(f"Indexed {len(indexed)} papers locally")
+            return len(indexed)
+        except Exception as e:
+            logger.error(f"Error indexing papers: {str(e)}")
+            return 0
+
+    def remove_papers(self, arxiv_ids: List[str], save: bool = True):
+        """Remove papers from the local index."""
+        self.ensure_loaded()
+        if self.paper_index is None:
+            return
+        with self._index_lock:
+            self.paper_index.delete(arxiv_ids)
+            self.lexical_index.delete(arxiv_ids)
+            if save:
+                self.save_paper_index()
+
+    def paper_index_differences(self, arxiv_ids: List[str]) -> Tuple[List[str], List[str]]:
+        """Compare the local index with the stored papers.
+
+        Returns the stored IDs missing from the index and the indexed IDs that are no longer stored.
+        """
+        self.ensure_loaded()
+        if self.paper_index is None:
+            return [], []
+        stored = set(arxiv_ids)
+        with self._index_lock:
+            # A lexical index discarded after a tokenizer change leaves papers missing from it alone
+            missing = sorted(arxiv_id for arxiv_id in stored
+                             if arxiv_id not in self.paper_index or arxiv_id not in self.lexical_index)
+            stale = sorted(arxiv_id for arxiv_id in self.paper_index.id_to_row if arxiv_id not in stored)
+        return missing, stale
+
+    def save_paper_index(self):
+        """Persist the dense and lexical local indexes."""
+        with self._index_lock:
+            self.paper_index.save(self.index_path)
+            self.lexical_index.save(self.lexical_index_path)
+            self._index_mtime = self._get_index_mtime()
+
+    def rebuild_paper_index(self) -> int:
+        """Rebuild and retrain the local index from every paper in the database."""
+        from app.models import Paper
+        
+        self.ensure_loaded()
+        with self._index_lock:
+            self.paper_index = self._new_paper_index()
+            self.lexical_index = BM25Index()
+        papers = [{'arxiv_id': p.arxiv_id, 'title': p.title, 'abstract': p.abstract} for p in Paper.query.all()]
+        count = self.index_papers(papers, save=False)
+        with self._index_lock:
+            self.paper_index.train()
+            self.save_paper_index()
+        return count
+
+    def _refine_vectors(self):
+        """Exact re-scoring source for product-quantized indexes: the on-disk embedding cache."""
+        if self.vector_storage != 'pq' or self.embedding_cache is None:
+            return None
+        return self.embedding_cache.get_many
+
+    def search_local_index(self, concept_embedding: np.ndarray, category: Optional[str] = None,
+                           max_results: int = 5, concept: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Answer a query from the local paper index and database, without calling arXiv.
+
+        With hybrid search enabled and the query text given, a BM25 stage first
+        prunes the corpus to ``lexical_candidates`` papers; only those are scored
+        densely and the two rankings are merged by reciprocal rank fusion.
+        """
+        try:
+            self.ensure_loaded()
+            self._maybe_reload_paper_index()
+            
+            from app.models import Paper
+            
+            # Hold the lock only while reading the indexes; database and summaries come after
+            with self._index_lock:
+                if self.paper_index is None or not len(self.paper_index):
+                    return []
+                
+                lexical_hits = []
+                if self.hybrid_search and concept and self.lexical_index is not None:
+                    lexical_hits = self.lexical_index.search(concept, k=self.lexical_candidates)
+                
+                bm25_scores, fusion_scores = {}, {}
+                if lexical_hits:
+                    # Dense stage only scores the lexical candidates
+                    bm25_scores = dict(lexical_hits)
+                    dense_scores = self.paper_index.score(list(bm25_scores), concept_embedding,
+                                                          refine=self._refine_vectors())
+                    if len(dense_scores) < max_results:
+                        # Too few term matches: let the ANN index contribute candidates too
+                        dense_scores.update(self.paper_index.search(concept_embedding, k=max_results * 4,
+                                                                    refine=self._refine_vectors()))
+                    lexical_ranking = [paper_id for paper_id, _ in lexical_hits if paper_id in dense_scores]
+                    dense_ranking = sorted(dense_scores, key=dense_scores.get, reverse=True)
+                    fused = reciprocal_rank_fusion([lexical_ranking, dense_ranking])
+                    fusion_scores = dict(fused)
+                    hits = [(paper_id, dense_scores[paper_id]) for paper_id, _ in fused]
+                else:
+                    # Over-fetch so that category filtering still leaves enough hits
+                    hits = self.paper_index.search(concept_embedding, k=max_results * 4, refine=self._refine_vectors())
+            
+            if self.local_min_score is not None:
+                hits = [(paper_id, score) for paper_id, score in hits if score >= self.local_min_score]
+            if not hits:
+                return []
+            
+            rows = {p.arxiv_id: p for p in Paper.query.filter(Paper.arxiv_id.in_([h[0] for h in hits])).all()}
+            
+            results = []
+            for paper_id, score in hits:
+                paper = rows.get(paper_id)
+                if paper is None:
+                    continue
+                if category and category not in paper.categories.split():
+                    continue
+                result = paper.to_dict()
+                result['similarity_score'] = score
+                if fusion_scores:
+                    result['bm25_score'] = bm25_scores.get(paper_id, 0.0)
+                    result['fusion_score'] = fusion_scores[paper_id]
+                results.append(result)
+                if len(results) >= max_results:
+                    break
+            
+            for result, summary in zip(results, self.summarize_abstracts([r['abstract'] for r in results])):
+                result['abstract'] = summary
+            return results
+        except Exception as e:
+            logger.error(f"Error searching local index: {str(e)}")
+            return []
+
+    def get_scibert_embedding(self, text: str, cache_key: Optional[str] = None) -> Optional[np.ndarray]:
         """Get SciBERT embeddings for a given text."""
         try:
+            self.ensure_loaded()
             if not text.strip():
                 return None
                 
@@ -44,94 +437,268 @@ class SearchService:
                 logger.error("Models not loaded")
                 return None
                 
-            inputs = self.tokenizer(text, return_tensors="pt", max_length=512, truncation=True, padding="max_length")
-            with torch.no_grad():
-                outputs = self.scibert_model(**inputs)
-            embeddings = outputs.last_hidden_state.mean(dim=1).squeeze().cpu().numpy()
-            return embeddings
+            cache_keys = [cache_key] if cache_key else None
+            return self.get_scibert_embeddings([text], cache_keys=cache_keys)[0]
         except Exception as e:
             logger.error(f"Error generating embeddings: {str(e)}")
             return None
 
-    def fetch_arxiv_papers(self, query: str, max_results: int = 5, categories: Optional[str] = None) -> List[arxiv.Result]:
+    def get_scibert_embeddings(self, texts: List[str], batch_size: int = 16,
+                               cache_keys: Optional[List[Optional[str]]] = None) -> List[Optional[np.ndarray]]:
+        """Get SciBERT embeddings for many texts using length-bucketed, dynamically padded batches.
+
+        When ``cache_keys`` is given (e.g. versioned arXiv IDs), texts whose key is
+        already in the embedding store are served from it and never reach the model.
+        """
+        embeddings: List[Optional[np.ndarray]] = [None] * len(texts)
+        try:
+            self.ensure_loaded()
+            if not self.tokenizer or not self.scibert_model:
+                logger.error("Models not loaded")
+                return embeddings
+            
+            cache_keys = cache_keys or [None] * len(texts)
+            if self.embedding_cache is not None:
+                cached = self.embedding_cache.get_many([key for key in cache_keys if key])
+                for i, key in enumerate(cache_keys):
+                    if key in cached:
+                        embeddings[i] = cached[key]
+            
+            import torch
+            
+            # Sort by length so each batch holds texts of similar size and pads little
+            indices = [i for i, text in enumerate(texts) if embeddings[i] is None and text and text.strip()]
+            indices.sort(key=lambda i: len(texts[i]))
+            
+            for start in range(0, len(indices), batch_size):
+                batch_indices = indices[start:start + batch_size]
+                batch_texts = [texts[i] for i in batch_indices]
+                
+                # Pad only to the longest member of the batch
+                inputs = self.tokenizer(batch_texts, return_tensors="pt", max_length=512, truncation=True, padding=True)
+                with torch.no_grad():
+                    outputs = self.scibert_model(**inputs)
+                
+                # Mean pool over real tokens only
+                mask = inputs['attention_mask'].unsqueeze(-1).to(outputs.last_hidden_state.dtype)
+                summed = (outputs.last_hidden_state * mask).sum(dim=1)
+                counts = mask.sum(dim=1).clamp(min=1e-9)
+                pooled = (summed / counts).cpu().numpy()
+                
+                new_entries = {}
+                for row, index in enumerate(batch_indices):
+                    embeddings[index] = pooled[row]
+                    if cache_keys[index]:
+                        new_entries[cache_keys[index]] = pooled[row]
+                
+                if self.embedding_cache is not None and new_entries:
+                    self.embedding_cache.put_many(new_entries)
+            
+            return embeddings
+        except Exception as e:
+            logger.error(f"Error generating batch embeddings: {str(e)}")
+            return embeddings
+
+    def fetch_arxiv_papers(self, query: str, max_results: int = 5, categories: Optional[str] = None) -> List[ArxivResult]:
         """Fetch papers from arXiv using their API."""
         try:
             category_query = f" AND cat:{categories}" if categories else ""
             full_query = query + category_query
             logger.info(f"Searching arXiv with query: {full_query}")
             
-            search = arxiv.Search(
-                query=full_query,
-                max_results=max_results,
-                sort_by=arxiv.SortCriterion.Relevance
-            )
-            results = list(search.results())
+            results = self.arxiv_client.search(full_query, max_results=max_results)
             logger.info(f"Found {len(results)} papers from arXiv")
             return results
         except Exception as e:
             logger.error(f"Error fetching papers from arXiv: {str(e)}")
             return []
 
+    def fetch_arxiv_candidates(self, query: str, pool_size: int, categories: Optional[str] = None,
+                               page_size: int = 100, latency_budget: Optional[float] = None,
+                               min_results: int = 0) -> List[ArxivResult]:
+        """Fetch a larger candidate pool from arXiv page by page.
+
+        Stops early once ``latency_budget`` seconds have passed and at least
+        ``min_results`` papers have been collected, so recall can be traded for latency.
+        """
+        results = []
+        try:
+            category_query = f" AND cat:{categories}" if categories else ""
+            full_query = query + category_query
+            logger.info(f"Fetching up to {pool_size} arXiv candidates for query: {full_query}")
+            
+            deadline = time.monotonic() + latency_budget if latency_budget else None
+            # Pages are requested lazily as the iterator advances
+            for page in self.arxiv_client.iter_pages(full_query, pool_size, page_size=min(page_size, pool_size)):
+                results.extend(page)
+                if deadline and time.monotonic() > deadline and len(results) >= min_results:
+                    logger.info(f"Candidate fetch hit its latency budget after {len(results)} papers")
+                    break
+            
+            logger.info(f"Fetched {len(results)} candidate papers from arXiv")
+            return results
+        except Exception as e:
+            logger.error(f"Error fetching candidate papers from arXiv: {str(e)}")
+            return results
+
     def summarize_abstract(self, abstract: str) -> str:
         """Summarize abstract using BART model."""
+        return self.summarize_abstracts([abstract])[0]
+
+    def summarize_abstracts(self, abstracts: List[str], batch_size: int = 8) -> List[str]:
+        """Summarize many abstracts in one batched BART call, reusing cached summaries."""
+        summaries = ["" if not abstract else None for abstract in abstracts]
         try:
-            if not abstract:
-                return ""
-                
+            self.ensure_loaded()
             if not self.summarizer:
-                logger.warning("Summarizer not loaded, returning truncated abstract")
-                return abstract[:200] + ("..." if len(abstract) > 200 else "")
-                
-            summary = self.summarizer(abstract, max_length=50, min_length=30, do_sample=False)
-            return summary[0]['summary_text']
+                logger.warning("Summarizer not loaded, returning truncated abstracts")
+                return [_truncate_abstract(abstract) for abstract in abstracts]
+            
+            # Identical abstracts share a summary regardless of which paper they came from
+            keys = [hashlib.sha256(abstract.encode('utf-8')).hexdigest() if abstract else None for abstract in abstracts]
+            if self.summary_cache is not None:
+                cached = self.summary_cache.get_many([key for key in keys if key])
+                for i, key in enumerate(keys):
+                    if key in cached:
+                        summaries[i] = cached[key]
+            
+            pending = {}
+            for i, key in enumerate(keys):
+                if summaries[i] is None:
+                    pending.setdefault(key, []).append(i)
+            
+            if pending:
+                texts = [abstracts[indices[0]] for indices in pending.values()]
+                outputs = self.summarizer(texts, max_length=50, min_length=30, do_sample=False,
+                                          truncation=True, batch_size=batch_size)
+                new_entries = {}
+                for (key, indices), output in zip(pending.items(), outputs):
+                    new_entries[key] = output['summary_text']
+                    for i in indices:
+                        summaries[i] = output['summary_text']
+                if self.summary_cache is not None:
+                    self.summary_cache.set_many(new_entries)
+            
+            return summaries
         except Exception as e:
-            logger.error(f"Error summarizing abstract: {str(e)}")
-            return abstract[:200] + ("..." if len(abstract) > 200 else "")
+            logger.error(f"Error summarizing abstracts: {str(e)}")
+            return [summary if summary is not None else _truncate_abstract(abstract)
+                    for summary, abstract in zip(summaries, abstracts)]
 
-    def find_similar_papers(self, concept: str, category: str = "cs.LG", max_results: int = 5) -> List[Dict[str, Any]]:
-        """Find similar papers using SciBERT embeddings and cosine similarity."""
+    def find_similar_papers(self, concept: str, category: str = "cs.LG", max_results: int = 5,
+                            mode: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Find similar papers using SciBERT embeddings and cosine similarity.
+
+        ``mode`` is 'direct' (rank exactly the papers arXiv returns) or 'rerank'
+        (over-fetch a larger candidate pool and keep the best ``max_results``);
+        it defaults to the service's configured retrieval mode.
+        """
+        ranking = []
+        for event, payload in self.iter_similar_papers(concept, category, max_results, mode=mode):
+            if event == 'ranking':
+                ranking = payload
+        return ranking
+
+    def iter_similar_papers(self, concept: str, category: str = "cs.LG", max_results: int = 5,
+                            summary_batch_size: Optional[int] = None,
+                            mode: Optional[str] = None) -> Iterator[Tuple[str, Any]]:
+        """Yield ('paper', paper) as each paper is scored and summarized, then ('ranking', papers).
+
+        Repeated (query, category, max_results) searches are served from the result
+        cache. ``summary_batch_size`` controls how many abstracts are summarized
+        per batch before their papers are emitted; by default all at once.
+        """
+        mode = mode or self.retrieval_mode
+        cache_key = self._query_cache_key(concept, category, max_results, mode)
+        cached = self.query_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Result cache hit for query: {concept[:50]}")
+            for paper in cached:
+                yield 'paper', dict(paper)
+            yield 'ranking', [dict(paper) for paper in cached]
+            return
+        
+        ranking = []
+        for event, payload in self._iter_similar_papers(concept, category, max_results, summary_batch_size, mode):
+            if event == 'ranking':
+                ranking = payload
+            yield event, payload
+        if ranking:
+            self.query_cache.set(cache_key, [dict(paper) for paper in ranking])
+
+    @staticmethod
+    def _query_cache_key(concept: str, category: Optional[str], max_results: int, mode: str = 'direct') -> str:
+        normalized = ' '.join(concept.lower().split())
+        return f"{normalized}|{category or ''}|{max_results}|{mode}"
+
+    def _iter_similar_papers(self, concept: str, category: str, max_results: int,
+                             summary_batch_size: Optional[int], mode: str = 'direct') -> Iterator[Tuple[str, Any]]:
+        """Generator pipeline: embed, search local index, fetch and score live papers, summarize, rank."""
         try:
             if not concept.strip():
                 logger.error("Empty concept provided")
-                return []
+                yield 'ranking', []
+                return
             
             # Check if models are loaded
+            self.ensure_loaded()
             if self.scibert_model is None or self.tokenizer is None:
                 logger.error("Models not loaded")
-                return []
-            
-            # Fetch papers from arXiv
-            papers = self.fetch_arxiv_papers(concept, max_results=max_results, categories=category)
-            
-            if not papers:
-                logger.warning("No papers found for the given query")
-                return []
+                yield 'ranking', []
+                return
             
             # Get SciBERT embedding for the concept
             concept_embedding = self.get_scibert_embedding(concept)
             if concept_embedding is None:
                 logger.error("Failed to generate embeddings for the concept")
-                return []
+                yield 'ranking', []
+                return
+            
+            # Answer from the local index when it has enough matches; off until a threshold is configured
+            local_papers = []
+            if self.local_min_score is not None:
+                local_papers = self.search_local_index(concept_embedding, category, max_results, concept=concept)
+            if len(local_papers) >= max_results:
+                logger.info(f"Answered query from local index with {len(local_papers)} papers")
+                for paper in local_papers:
+                    yield 'paper', paper
+                yield 'ranking', local_papers
+                return
+            
+            # Fetch papers from arXiv for the remainder
+            if mode == 'rerank':
+                # Over-fetch a candidate pool; embeddings are cached and batched so scoring it stays cheap
+                pool_size = min(max_results * self.rerank_pool_factor, self.rerank_max_pool)
+                papers = self.fetch_arxiv_candidates(concept, pool_size, categories=category,
+                                                     latency_budget=self.rerank_latency_budget,
+                                                     min_results=max_results)
+            else:
+                papers = self.fetch_arxiv_papers(concept, max_results=max_results, categories=category)
+            
+            if not papers and not local_papers:
+                logger.warning("No papers found for the given query")
+                yield 'ranking', []
+                return
+            
+            # Embed all candidates in a single batched pass
+            paper_texts = [paper.title + " " + paper.summary for paper in papers]
+            paper_ids = [paper.entry_id.split('/')[-1] for paper in papers]
+            paper_embeddings = self.get_scibert_embeddings(paper_texts, cache_keys=paper_ids)
             
             # Calculate similarity for each paper
-            similar_papers = []
-            for paper in papers:
-                paper_text = paper.title + " " + paper.summary
-                paper_embedding = self.get_scibert_embedding(paper_text)
-                
-                if paper_embedding is None:
+            new_papers = []
+            seen_ids = {_base_arxiv_id(p['arxiv_id']) for p in local_papers}
+            for paper, paper_embedding in zip(papers, paper_embeddings):
+                if paper_embedding is None or _base_arxiv_id(paper.entry_id.split('/')[-1]) in seen_ids:
                     continue
                 
                 # Calculate similarity score
                 similarity_score = cosine_similarity([concept_embedding], [paper_embedding]).flatten()[0]
                 
-                # Create excerpt from abstract
-                excerpt = self.summarize_abstract(paper.summary)
-                
-                similar_papers.append({
+                new_papers.append({
                     'title': paper.title,
                     'authors': ', '.join([author.name for author in paper.authors]),
-                    'abstract': excerpt,
+                    'abstract': paper.summary,
                     'arxiv_id': paper.entry_id.split('/')[-1],
                     'published_date': paper.published.strftime('%Y-%m-%d'),
                     'categories': [cat for cat in paper.categories],
@@ -140,53 +707,117 @@ class SearchService:
                     'similarity_score': float(similarity_score)
                 })
             
-            # Sort by similarity score and publication date
-            similar_papers.sort(key=lambda x: (x['similarity_score'], x['published_date']), reverse=True)
+            # Sort live papers by similarity score and publication date, then interleave them
+            # with the local hits without disturbing the local (fused) ranking
+            new_papers.sort(key=lambda x: (x['similarity_score'], x['published_date'] or ''), reverse=True)
+            similar_papers = _merge_ranked(local_papers, new_papers, max_results)
+            
+            # Emit papers best first; live papers are emitted once their excerpt is summarized
+            new_ids = {id(paper) for paper in new_papers}
+            batch_size = summary_batch_size or len(similar_papers) or 1
+            for start in range(0, len(similar_papers), batch_size):
+                batch = similar_papers[start:start + batch_size]
+                to_summarize = [paper for paper in batch if id(paper) in new_ids]
+                for paper, excerpt in zip(to_summarize, self.summarize_abstracts([p['abstract'] for p in to_summarize])):
+                    paper['abstract'] = excerpt
+                for paper in batch:
+                    yield 'paper', paper
             
             logger.info(f"Found {len(similar_papers)} similar papers")
-            return similar_papers
+            yield 'ranking', similar_papers
             
         except Exception as e:
             logger.error(f"Error finding similar papers: {str(e)}")
-            return []
+            yield 'ranking', []
 
     def get_trending_topics(self) -> List[Dict[str, Any]]:
-        """Get trending research topics."""
+        """Get trending research topics from memory, refreshing them in the background when stale."""
+        cached = self._trending_cache
+        if cached is None:
+            # Cold start: one request computes the topics and concurrent ones wait for its result
+            with self._trending_done:
+                while self._trending_refreshing:
+                    self._trending_done.wait()
+                cached = self._trending_cache
+                if cached is None:
+                    self._trending_refreshing = True
+            if cached is None:
+                return self.refresh_trending_topics()
+            return cached[1]
+        
+        fetched_at, topics = cached
+        if time.time() - fetched_at > self.trending_ttl:
+            # Serve the stale value now and revalidate in the background
+            self.refresh_trending_topics_async()
+        return topics
+
+    def refresh_trending_topics_async(self):
+        """Start a background refresh of the trending topics unless one is already running."""
+        with self._trending_lock:
+            if self._trending_refreshing:
+                return
+            self._trending_refreshing = True
+        threading.Thread(target=self.refresh_trending_topics, name="trending-refresh", daemon=True).start()
+
+    def refresh_trending_topics(self) -> List[Dict[str, Any]]:
+        """Recompute trending topics and store them in memory."""
         try:
-            # Define trending topics with their search queries
-            trending_queries = {
-                'cs.LG': ('machine learning', 'Machine Learning'),
-                'cs.AI': ('artificial intelligence', 'Artificial Intelligence'), 
-                'cs.CV': ('computer vision', 'Computer Vision'),
-                'cs.CL': ('natural language processing', 'Natural Language Processing'),
-                'cs.NE': ('neural networks', 'Neural Networks'),
-                'cs.RO': ('robotics', 'Robotics'),
-                'cs.CR': ('cryptography', 'Cryptography'),
-                'cs.DC': ('distributed computing', 'Distributed Computing')
-            }
-            
-            trending_topics = []
-            for category, (query, topic_name) in trending_queries.items():
+            with self._app_context():
+                topics, from_arxiv = self._compute_trending_topics()
+            # Fallback data is cached as already stale so the next request retries arXiv
+            self._trending_cache = (time.time() if from_arxiv else 0.0, topics)
+            return topics
+        finally:
+            with self._trending_done:
+                self._trending_refreshing = False
+                self._trending_done.notify_all()
+
+    def _app_context(self):
+        from flask import has_app_context
+        if self.app is None or has_app_context():
+            return nullcontext()
+        return self.app.app_context()
+
+    def _compute_trending_topics(self):
+        """Read week-over-week counts from the local aggregate table; returns (topics, whether real data was found).
+
+        Falls back to querying every trending category on arXiv concurrently
+        while the local paper store has not been harvested yet.
+        """
+        try:
+            harvested = harvested_categories(TRENDING_QUERIES)
+            if harvested and has_counts(harvested):
+                topics = compute_trending({category: TRENDING_QUERIES[category][1] for category in harvested})
+                logger.info(f"Computed {len(topics)} trending topics from the local paper store")
+                return topics, True
+        except Exception as e:
+            logger.error(f"Error reading trending counts: {str(e)}")
+        
+        try:
+            def fetch_category(item):
+                category, (query, topic_name) = item
                 try:
                     # Search for recent papers in this category with a specific query
-                    papers = self.fetch_arxiv_papers(query, max_results=5, categories=category)
-                    
-                    if papers:
-                        # Count papers and calculate growth (placeholder logic)
-                        paper_count = len(papers)
-                        # Generate a realistic growth rate based on category
-                        growth_rates = ["+12%", "+8%", "+15%", "+6%", "+10%", "+9%", "+7%", "+11%"]
-                        growth_rate = growth_rates[hash(category) % len(growth_rates)]
-                        
-                        trending_topics.append({
-                            'topic': topic_name,
-                            'paper_count': paper_count,
-                            'growth_rate': growth_rate,
-                            'category': category
-                        })
+                    return category, topic_name, self.fetch_arxiv_papers(query, max_results=5, categories=category)
                 except Exception as e:
                     logger.error(f"Error getting trending papers for {category}: {str(e)}")
-                    continue
+                    return category, topic_name, []
+            
+            # Bounded parallelism; fetch_arxiv_papers itself spaces requests to respect arXiv's rate limit
+            with ThreadPoolExecutor(max_workers=self.arxiv_concurrency) as executor:
+                results = list(executor.map(fetch_category, TRENDING_QUERIES.items()))
+            
+            trending_topics = []
+            for category, topic_name, papers in results:
+                if papers:
+                    # Without local counts there is no history to compute growth from
+                    trending_topics.append({
+                        'topic': topic_name,
+                        'paper_count': len(papers),
+                        'growth_rate': 'n/a',
+                        'category': category
+                    })
+            from_arxiv = bool(trending_topics)
             
             # If no trending topics found, return some default ones
             if not trending_topics:
@@ -228,12 +859,12 @@ class SearchService:
             trending_topics.sort(key=lambda x: x['paper_count'], reverse=True)
             
             logger.info(f"Found {len(trending_topics)} trending topics")
-            return trending_topics
+            return trending_topics, from_arxiv
             
         except Exception as e:
             logger.error(f"Error getting trending topics: {str(e)}")
             # Return default trending topics if there's an error
-            return [
+            return ([
                 {
                     'topic': 'Machine Learning',
                     'paper_count': 15,
@@ -252,35 +883,110 @@ class SearchService:
                     'growth_rate': '+15%',
                     'category': 'cs.CV'
                 }
-            ]
+            ], False)
 
     def get_paper_details(self, arxiv_id: str) -> Dict[str, Any]:
         """Get detailed information about a specific paper."""
+        result = self.get_papers_details([arxiv_id])[0]
+        return result.get('paper_details', {})
+
+    def get_papers_details(self, arxiv_ids: List[str], chunk_size: int = 100) -> List[Dict[str, Any]]:
+        """Get details for many papers at once, in input order with a per-ID error for misses.
+
+        IDs are resolved from the details cache and the local paper store first;
+        the rest are fetched with as few ``id_list`` arXiv requests as possible.
+        """
+        details: Dict[str, Dict[str, Any]] = {}
+        errors: Dict[str, str] = {}
+        wanted = list(dict.fromkeys(arxiv_id.strip() for arxiv_id in arxiv_ids if arxiv_id and arxiv_id.strip()))
+        
+        # Resolve locally first
+        if self.details_cache is not None:
+            details.update(self.details_cache.get_many(wanted))
+        missing = [arxiv_id for arxiv_id in wanted if arxiv_id not in details]
+        if missing:
+            details.update(self._get_local_papers_details(missing))
+            missing = [arxiv_id for arxiv_id in wanted if arxiv_id not in details]
+        
+        # Fetch the remainder from arXiv in batched id_list requests
+        for start in range(0, len(missing), chunk_size):
+            chunk = missing[start:start + chunk_size]
+            try:
+                fetched = {}
+                for paper in self.arxiv_client.get_by_ids(chunk):
+                    versioned_id = paper.entry_id.split('/')[-1]
+                    fetched[versioned_id] = paper
+                    fetched.setdefault(_base_arxiv_id(versioned_id), paper)
+                
+                new_entries = {}
+                for arxiv_id in chunk:
+                    paper = fetched.get(arxiv_id) or fetched.get(_base_arxiv_id(arxiv_id))
+                    if paper is None:
+                        errors[arxiv_id] = f'Paper with ID {arxiv_id} not found'
+                        continue
+                    new_entries[arxiv_id] = self._format_paper_details(paper, arxiv_id)
+                details.update(new_entries)
+                if self.details_cache is not None:
+                    self.details_cache.set_many(new_entries)
+            except Exception as e:
+                logger.error(f"Error getting paper details: {str(e)}")
+                for arxiv_id in chunk:
+                    errors[arxiv_id] = f'Error fetching paper details: {str(e)}'
+        
+        results = []
+        for arxiv_id in arxiv_ids:
+            key = arxiv_id.strip() if arxiv_id else ''
+            if key in details:
+                results.append({'arxiv_id': arxiv_id, 'success': True, 'paper_details': details[key]})
+            else:
+                results.append({'arxiv_id': arxiv_id, 'success': False,
+                                'error': errors.get(key, 'ArXiv ID is required' if not key else f'Paper with ID {key} not found')})
+        return results
+
+    def _get_local_papers_details(self, arxiv_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Look papers up in the local paper store; unversioned IDs match any stored version."""
         try:
-            # Search for the specific paper
-            search = arxiv.Search(id_list=[arxiv_id])
-            results = list(search.results())
-            
-            if not results:
-                return {}
-            
-            paper = results[0]
-            
-            return {
-                'title': paper.title,
-                'authors': [author.name for author in paper.authors],
-                'abstract': paper.summary,
-                'arxiv_id': arxiv_id,
-                'published_date': paper.published.strftime('%Y-%m-%d'),
-                'updated_date': paper.updated.strftime('%Y-%m-%d'),
-                'categories': [cat for cat in paper.categories],
-                'pdf_url': paper.pdf_url,
-                'abs_url': paper.entry_id,
-                'doi': paper.doi if hasattr(paper, 'doi') else None,
-                'keywords': [],  # arXiv doesn't provide keywords
-                'journal_ref': paper.journal_ref if hasattr(paper, 'journal_ref') else None
-            }
+            from sqlalchemy import or_
+            from app.models import Paper
+            
+            unversioned = [arxiv_id for arxiv_id in arxiv_ids if arxiv_id == _base_arxiv_id(arxiv_id)]
+            rows = Paper.query.filter(or_(
+                Paper.arxiv_id.in_(arxiv_ids),
+                *[Paper.arxiv_id.like(f"{arxiv_id}v%") for arxiv_id in unversioned]
+            )).all()
+            by_id = {}
+            for row in rows:
+                by_id[row.arxiv_id] = row
+                by_id.setdefault(_base_arxiv_id(row.arxiv_id), row)
             
+            found = {}
+            for arxiv_id in arxiv_ids:
+                row = by_id.get(arxiv_id)
+                if row is None:
+                    continue
+                paper_details = row.to_dict()
+                paper_details['arxiv_id'] = arxiv_id
+                paper_details['authors'] = [name.strip() for name in row.authors.split(',') if name.strip()]
+                paper_details['keywords'] = []
+                found[arxiv_id] = paper_details
+            return found
         except Exception as e:
-            logger.error(f"Error getting paper details: {str(e)}")
-            return {} 
\ No newline at end of file
+            # No application context or no local store; fall back to arXiv
+            logger.debug(f"Local paper lookup unavailable: {str(e)}")
+            return {}
+
+    def _format_paper_details(self, paper: ArxivResult, arxiv_id: str) -> Dict[str, Any]:
+        return {
+            'title': paper.title,
+            'authors': [author.name for author in paper.authors],
+            'abstract': paper.summary,
+            'arxiv_id': arxiv_id,
+            'published_date': paper.published.strftime('%Y-%m-%d'),
+            'updated_date': paper.updated.strftime('%Y-%m-%d'),
+            'categories': [cat for cat in paper.categories],
+            'pdf_url': paper.pdf_url,
+            'abs_url': paper.entry_id,
+            'doi': paper.doi if hasattr(paper, 'doi') else None,
+            'keywords': [],  # arXiv doesn't provide keywords
+            'journal_ref': paper.journal_ref if hasattr(paper, 'journal_ref') else None
+        }
@@ -0,0 +1,134 @@
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+from app.services.cache_store import SQLiteCache
+from app.services.chunker import TokenChunker
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MAP_PROMPT = """
+You are summarizing one section of a longer academic document. Write a dense summary of this section only, keeping:
+- the main concepts, methods and any model architecture details
+- key findings, with their numbers
+- important equations, in LaTeX style ($equation$)
+Do not add an introduction or a conclusion.
+
+Section text:
+{text}
+"""
+
+COMBINE_PROMPT = """
+The following are summaries of consecutive sections of an academic document.
+Merge them into one dense summary that keeps every distinct method, finding and equation (in LaTeX style, $equation$).
+
+{text}
+"""
+
+def prompt_key(prompt: str, model: str = '', max_tokens: Optional[int] = None) -> str:
+    """Cache key of one summary call: the same prompt on another model or token budget is a different entry."""
+    return hashlib.sha256(f"{model}\n{max_tokens}\n{prompt}".encode('utf-8')).hexdigest()
+
+class MapReduceSummarizer:
+    """Summarize documents longer than one LLM context.
+
+    The document is cut into context-sized chunks that are summarized
+    concurrently, at most ``concurrency`` calls at a time (map). The section
+    summaries are merged in groups until they fit one context, then passed
+    to a final call (reduce). Map and merge results are cached by the hash
+    of their prompt, ``model`` and token budget, so re-summarizing a document,
+    or one sharing sections with another, only calls the LLM for new chunks.
+
+    ``generate(prompt, max_tokens, use_cache)`` runs one LLM call; its
+    response cache is only used where this class has no cache of its own.
+    ``model`` identifies what ``generate`` runs (provider and model).
+    """
+
+    def __init__(self, generate: Callable[[str, int, bool], str], chunker: TokenChunker,
+                 cache: Optional[SQLiteCache] = None, concurrency: int = 4,
+                 map_tokens: int = 500, combine_tokens: int = 800, model: str = ''):
+        self.generate = generate
+        self.model = model
+        self.chunker = chunker
+        self.cache = cache
+        self.concurrency = concurrency
+        self.map_tokens = map_tokens
+        self.combine_tokens = combine_tokens
+        self.calls = 0
+        self.cached_calls = 0
+        self._lock = threading.Lock()
+
+    def _call(self, prompt: str, max_tokens: int, use_cache: bool) -> Optional[str]:
+        try:
+            result = self.generate(prompt, max_tokens, use_cache and self.cache is None)
+            with self._lock:
+                self.calls += 1
+            return result
+        except Exception as e:
+            logger.warning(f"Partial summary failed: {str(e)}")
+            return None
+
+    def _run_cached(self, prompts: List[str], max_tokens: int, use_cache: bool = True) -> List[Optional[str]]:
+        """Run prompts concurrently, skipping those with a cached result; failures come back as None."""
+        keys = [prompt_key(prompt, self.model, max_tokens) for prompt in prompts]
+        use_own_cache = use_cache and self.cache is not None
+        results = self.cache.get_many(keys) if use_own_cache else {}
+        missing = list(dict.fromkeys(key for key in keys if key not in results))
+        with self._lock:
+            self.cached_calls += len(keys) - len(missing)
+
+        if missing:
+            prompt_by_key = dict(zip(keys, prompts))
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(missing))) as executor:
+                outputs = list(executor.map(lambda key: self._call(prompt_by_key[key], max_tokens, use_cache), missing))
+            fresh = {key: output for key, output in zip(missing, outputs) if output}
+            if use_own_cache:
+                self.cache.set_many(fresh)
+            results.update(fresh)
+        return [results.get(key) for key in keys]
+
+    def _groups(self, summaries: List[str]) -> List[List[str]]:
+        """Pack consecutive summaries into groups that fit one context."""
+        groups, current, current_tokens = [], [], 0
+        for summary, tokens in zip(summaries, self.chunker.count_tokens(summaries)):
+            if current and current_tokens + tokens > self.chunker.chunk_tokens:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(summary)
+            current_tokens += tokens
+        if current:
+            groups.append(current)
+        return groups
+
+    def summarize(self, text: str, final_prompt: Callable[[str, bool], str], final_tokens: int = 2000,
+                  use_cache: bool = True) -> str:
+        """Summarize ``text``; ``final_prompt(content, sectioned)`` builds the reduce prompt.
+
+        With ``use_cache=False`` every call is made afresh and nothing is cached.
+        """
+        chunks = self.chunker.split(text)
+        if len(chunks) <= 1:
+            return self.generate(final_prompt(text, False), final_tokens, use_cache)
+
+        summaries = self._run_cached([MAP_PROMPT.format(text=chunk) for chunk in chunks], self.map_tokens, use_cache)
+        failed = sum(1 for summary in summaries if not summary)
+        summaries = [summary for summary in summaries if summary]
+        if not summaries:
+            raise RuntimeError("No section of the document could be summarized")
+        if failed:
+            logger.warning(f"Summarizing without {failed} of {len(chunks)} sections")
+
+        while len(summaries) > 1:
+            groups = self._groups(summaries)
+            if len(groups) == 1 or len(groups) == len(summaries):
+                break
+            merged = self._run_cached([COMBINE_PROMPT.format(text="\n\n".join(group)) for group in groups],
+                                      self.combine_tokens, use_cache)
+            # A group whose merge failed is carried forward as it is
+            summaries = [merged_summary or "\n\n".join(group) for merged_summary, group in zip(merged, groups)]
+
+        sections = "\n\n".join(f"[Section {i + 1}]\n{summary}" for i, summary in enumerate(summaries))
+        logger.info(f"Reducing {len(summaries)} section summaries of {len(chunks)} chunks")
+        return self.generate(final_prompt(sections, True), final_tokens, use_cache)
@@ -0,0 +1,108 @@
+import logging
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def count_keys(categories: str, published: Optional[datetime]) -> List[Tuple[str, date]]:
+    """(category, day) buckets a paper contributes to."""
+    if not published or not categories:
+        return []
+    day = published.date() if isinstance(published, datetime) else published
+    return [(category, day) for category in set(categories.split())]
+
+def apply_count_deltas(deltas: Counter):
+    """Add per-(category, day) deltas to the aggregate table. Commit is left to the caller."""
+    from app import db
+    from app.models import CategoryDailyCount
+
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    for (category, day), delta in deltas.items():
+        row = db.session.get(CategoryDailyCount, (category, day))
+        if row is None:
+            row = CategoryDailyCount(category=category, day=day, count=0)
+            db.session.add(row)
+        row.count = max((row.count or 0) + delta, 0)
+
+def rebuild_daily_counts() -> int:
+    """Recompute the aggregate table from every stored paper; returns the number of buckets."""
+    from app import db
+    from app.models import CategoryDailyCount, Paper
+
+    counts = Counter()
+    for categories, published in db.session.query(Paper.categories, Paper.published).yield_per(1000):
+        counts.update(count_keys(categories, published))
+
+    CategoryDailyCount.query.delete()
+    db.session.add_all(CategoryDailyCount(category=category, day=day, count=count)
+                       for (category, day), count in counts.items())
+    db.session.commit()
+    logger.info(f"Rebuilt {len(counts)} daily category counts")
+    return len(counts)
+
+def format_growth(current: int, previous: int) -> str:
+    if previous == 0:
+        return "new" if current else "0%"
+    return f"{(current - previous) / previous * 100:+.0f}%"
+
+def compute_trending(topics: Dict[str, str], today: Optional[date] = None, window_days: int = 7) -> List[Dict[str, Any]]:
+    """Week-over-week paper counts per category from the aggregate table.
+
+    One grouped query over at most ``2 * window_days`` rows per category; ``topics``
+    maps category to display name. Categories without papers in either window are left out.
+    """
+    from sqlalchemy import case, func
+    from app import db
+    from app.models import CategoryDailyCount
+
+    today = today or datetime.utcnow().date()
+    window_start = today - timedelta(days=window_days)
+    previous_start = window_start - timedelta(days=window_days)
+
+    in_window = CategoryDailyCount.day > window_start
+    rows = db.session.query(
+        CategoryDailyCount.category,
+        func.sum(case((in_window, CategoryDailyCount.count), else_=0)),
+        func.sum(case((in_window, 0), else_=CategoryDailyCount.count))
+    ).filter(
+        CategoryDailyCount.category.in_(list(topics)),
+        CategoryDailyCount.day > previous_start,
+        CategoryDailyCount.day <= today
+    ).group_by(CategoryDailyCount.category).all()
+
+    trending = []
+    for category, current, previous in rows:
+        current, previous = int(current or 0), int(previous or 0)
+        if not current and not previous:
+            continue
+        trending.append({
+            'topic': topics[category],
+            'paper_count': current,
+            'previous_count': previous,
+            'growth_rate': format_growth(current, previous),
+            'category': category
+        })
+    trending.sort(key=lambda x: x['paper_count'], reverse=True)
+    return trending
+
+def harvested_categories(categories: Iterable[str]) -> List[str]:
+    """The given categories that the harvester has copied at least once.
+
+    Papers cross-listed from a harvested category also count towards other
+    categories, so only fully harvested ones give meaningful growth numbers.
+    """
+    from app.models import HarvestCheckpoint
+
+    categories = list(categories)
+    rows = HarvestCheckpoint.query.filter(HarvestCheckpoint.category.in_(categories),
+                                          HarvestCheckpoint.last_updated.isnot(None)).all()
+    harvested = {row.category for row in rows}
+    return [category for category in categories if category in harvested]
+
+def has_counts(categories: Iterable[str]) -> bool:
+    from app.models import CategoryDailyCount
+    return CategoryDailyCount.query.filter(CategoryDailyCount.category.in_(list(categories))).first() is not None
@@ -0,0 +1,326 @@
+import os
+import logging
+import numpy as np
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STORAGE_FORMATS = ('float32', 'float16', 'pq')
+
+def _kmeans(vectors: np.ndarray, k: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    """Plain (Euclidean) k-means used to train product-quantizer codebooks."""
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    for _ in range(iterations):
+        distances = (vectors ** 2).sum(1)[:, None] - 2 * vectors @ centroids.T + (centroids ** 2).sum(1)[None, :]
+        assignments = np.argmin(distances, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=k)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids
+
+class ProductQuantizer:
+    """Splits vectors into ``m`` sub-vectors and stores each as a one-byte codebook index.
+
+    A 768-d float32 vector (3 KB) becomes ``m`` bytes. Queries are scored by
+    asymmetric distance computation: the query stays in float32 and its inner
+    product with every codeword is precomputed once, so scoring a stored vector
+    is ``m`` table lookups.
+    """
+
+    def __init__(self, dim: int, m: int = 96, ksub: int = 256):
+        if dim % m:
+            raise ValueError(f"Dimension {dim} is not divisible into {m} sub-vectors")
+        self.dim = dim
+        self.m = m
+        self.ksub = ksub
+        self.dsub = dim // m
+        self.codebooks: Optional[np.ndarray] = None  # (m, ksub, dsub)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.codebooks is not None
+
+    def train(self, vectors: np.ndarray, iterations: int = 10, seed: int = 0):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        ksub = min(self.ksub, len(vectors))
+        rng = np.random.default_rng(seed)
+        self.codebooks = np.stack([
+            _kmeans(vectors[:, i * self.dsub:(i + 1) * self.dsub], ksub, iterations, rng) for i in range(self.m)
+        ]).astype(np.float32)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        for i, codebook in enumerate(self.codebooks):
+            sub = vectors[:, i * self.dsub:(i + 1) * self.dsub]
+            distances = (sub ** 2).sum(1)[:, None] - 2 * sub @ codebook.T + (codebook ** 2).sum(1)[None, :]
+            codes[:, i] = np.argmin(distances, axis=1)
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return np.concatenate([self.codebooks[i][codes[:, i]] for i in range(self.m)], axis=1)
+
+    def inner_product_table(self, query: np.ndarray) -> np.ndarray:
+        """(m, ksub) inner products between each query sub-vector and its codewords."""
+        return np.einsum('mkd,md->mk', self.codebooks, query.reshape(self.m, self.dsub))
+
+    def adc_scores(self, codes: np.ndarray, table: np.ndarray) -> np.ndarray:
+        return table[np.arange(self.m), codes].sum(axis=1)
+
+class VectorIndex:
+    """Approximate nearest-neighbour index (IVF-flat) over normalized vectors in NumPy.
+
+    Vectors are clustered with k-means into ``nlist`` inverted lists; a query
+    only scans the ``nprobe`` lists whose centroids are closest to it. Until
+    the index is trained (or while it is small) every query is answered exactly.
+
+    ``storage`` selects how vectors are kept in memory and on disk: ``float32``,
+    ``float16`` (half the size, near-identical scores) or ``pq`` (product
+    quantization, ``pq_subvectors`` bytes per vector). A ``pq`` index keeps
+    float32 vectors until it is trained, then stores only codes.
+    """
+
+    def __init__(self, dim: int, nlist: int = 64, nprobe: int = 8, storage: str = 'float32', pq_subvectors: int = 96):
+        if storage not in STORAGE_FORMATS:
+            raise ValueError(f"Unknown vector storage '{storage}', expected one of {STORAGE_FORMATS}")
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.storage = storage
+        self.ids: List[str] = []
+        self.id_to_row: Dict[str, int] = {}
+        self.vectors = np.zeros((0, dim), dtype=np.float16 if storage == 'float16' else np.float32)
+        self.pq = ProductQuantizer(dim, m=pq_subvectors) if storage == 'pq' else None
+        self.codes = np.zeros((0, pq_subvectors), dtype=np.uint8) if storage == 'pq' else None
+        self.active = np.zeros(0, dtype=bool)
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments = np.zeros(0, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return int(self.active.sum())
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self.id_to_row
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    @property
+    def _quantized(self) -> bool:
+        return self.pq is not None and self.pq.is_trained
+
+    def _encode(self, vectors: np.ndarray):
+        """Convert normalized float32 vectors to the storage format."""
+        if self._quantized:
+            return self.pq.encode(vectors)
+        return vectors.astype(self.vectors.dtype)
+
+    def _reconstruct(self, rows=None) -> np.ndarray:
+        """Stored vectors as float32 (approximate for float16 and pq)."""
+        if self._quantized:
+            return self.pq.decode(self.codes if rows is None else self.codes[rows])
+        vectors = self.vectors if rows is None else self.vectors[rows]
+        return vectors.astype(np.float32, copy=False)
+
+    def _score_rows(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        if self._quantized:
+            return self.pq.adc_scores(self.codes[rows], self.pq.inner_product_table(query))
+        return self.vectors[rows].astype(np.float32, copy=False) @ query
+
+    def nbytes(self) -> int:
+        """Memory used by the stored vectors or codes."""
+        return self.codes.nbytes if self._quantized else self.vectors.nbytes
+
+    def add(self, ids: List[str], vectors: np.ndarray):
+        """Add vectors, replacing any existing entries with the same IDs."""
+        if not ids:
+            return
+        vectors = self._normalize(vectors)
+        if vectors.shape != (len(ids), self.dim):
+            raise ValueError(f"Expected {len(ids)} vectors of dimension {self.dim}, got {vectors.shape}")
+
+        self.delete([item_id for item_id in ids if item_id in self.id_to_row])
+
+        start = len(self.ids)
+        self.ids.extend(ids)
+        for offset, item_id in enumerate(ids):
+            self.id_to_row[item_id] = start + offset
+        if self._quantized:
+            self.codes = np.vstack([self.codes, self._encode(vectors)])
+        else:
+            self.vectors = np.vstack([self.vectors, self._encode(vectors)])
+        self.active = np.concatenate([self.active, np.ones(len(ids), dtype=bool)])
+        new_assignments = self._assign(vectors) if self.is_trained else np.zeros(len(ids), dtype=np.int32)
+        self.assignments = np.concatenate([self.assignments, new_assignments])
+
+    def delete(self, ids: Iterable[str]):
+        """Remove entries by ID. Rows are tombstoned and dropped on the next compaction."""
+        for item_id in ids:
+            row = self.id_to_row.pop(item_id, None)
+            if row is not None:
+                self.active[row] = False
+        if len(self.active) and self.active.mean() < 0.5:
+            self.compact()
+
+    def compact(self):
+        """Physically drop deleted rows."""
+        keep = np.flatnonzero(self.active)
+        self.ids = [self.ids[i] for i in keep]
+        self.id_to_row = {item_id: row for row, item_id in enumerate(self.ids)}
+        if self._quantized:
+            self.codes = self.codes[keep]
+        else:
+            self.vectors = self.vectors[keep]
+        self.active = np.ones(len(keep), dtype=bool)
+        self.assignments = self.assignments[keep]
+
+    def train(self, nlist: Optional[int] = None, iterations: int = 10, seed: int = 0):
+        """Cluster the stored vectors into inverted lists with spherical k-means (and train PQ codebooks)."""
+        self.compact()
+        vectors = self._reconstruct()
+        n = len(self.ids)
+        if self.pq is not None and not self.pq.is_trained and n:
+            # Codebooks are learned once from the float32 vectors, which are then dropped
+            self.pq.train(vectors, iterations=iterations, seed=seed)
+            self.codes = self.pq.encode(vectors)
+            self.vectors = np.zeros((0, self.dim), dtype=np.float32)
+            logger.info(f"Trained product quantizer with {self.pq.m} sub-vectors over {n} vectors")
+
+        nlist = min(nlist or self.nlist, n)
+        if nlist < 2:
+            logger.info("Too few vectors to train the index; using exact search")
+            self.centroids = None
+            return
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(n, nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = np.argmax(vectors @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = vectors[assignments == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids = self._normalize(centroids)
+        self.centroids = centroids
+        self.nlist = nlist
+        self.assignments = self._assign(vectors)
+        logger.info(f"Trained vector index with {nlist} lists over {n} vectors")
+
+    def convert(self, storage: str, pq_subvectors: int = 96) -> 'VectorIndex':
+        """Return a copy of this index in another storage format (retrained if it becomes PQ)."""
+        converted = VectorIndex(self.dim, nlist=self.nlist, nprobe=self.nprobe, storage=storage, pq_subvectors=pq_subvectors)
+        keep = np.flatnonzero(self.active)
+        converted.add([self.ids[i] for i in keep], self._reconstruct(keep))
+        if self.is_trained or storage == 'pq':
+            converted.train()
+        return converted
+
+    def search(self, query: np.ndarray, k: int = 10, nprobe: Optional[int] = None,
+               refine: Optional[Callable[[List[str]], Dict[str, np.ndarray]]] = None,
+               refine_factor: int = 4) -> List[Tuple[str, float]]:
+        """Return up to ``k`` (id, cosine similarity) pairs, best first.
+
+        ``refine`` maps IDs to their original vectors (e.g. an embedding cache
+        lookup). When given, ``k * refine_factor`` candidates are taken from the
+        compact codes and re-scored exactly, which recovers most of the recall
+        lost to product quantization.
+        """
+        if not len(self) or k <= 0:
+            return []
+        query = self._normalize(query)[0]
+
+        if self.is_trained:
+            nprobe = min(nprobe or self.nprobe, self.nlist)
+            probe_lists = np.argsort(-(self.centroids @ query))[:nprobe]
+            candidates = np.flatnonzero(np.isin(self.assignments, probe_lists) & self.active)
+        else:
+            candidates = np.flatnonzero(self.active)
+        if not len(candidates):
+            return []
+
+        scores = self._score_rows(candidates, query)
+        fetch = min(k * refine_factor if refine else k, len(candidates))
+        top = np.argpartition(-scores, fetch - 1)[:fetch]
+        top = top[np.argsort(-scores[top])]
+        hits = [(self.ids[candidates[i]], float(scores[i])) for i in top]
+        if refine:
+            originals = refine([item_id for item_id, _ in hits])
+            exact = {item_id: float(self._normalize(vector)[0] @ query) for item_id, vector in originals.items()}
+            hits = sorted(((item_id, exact.get(item_id, score)) for item_id, score in hits),
+                          key=lambda hit: hit[1], reverse=True)
+        return hits[:k]
+
+    def score(self, ids: List[str], query: np.ndarray,
+              refine: Optional[Callable[[List[str]], Dict[str, np.ndarray]]] = None) -> Dict[str, float]:
+        """Cosine similarity between ``query`` and the given stored IDs (unknown IDs are skipped).
+
+        Scores come from the stored vectors, so they are exact for float32,
+        near-exact for float16 and asymmetric-distance approximations for
+        ``pq``; ``refine`` (as in ``search``) re-scores exactly where it can.
+        """
+        rows = [self.id_to_row[item_id] for item_id in ids if item_id in self.id_to_row]
+        if not rows:
+            return {}
+        query = self._normalize(query)[0]
+        scores = self._score_rows(np.array(rows), query)
+        result = {self.ids[row]: float(score) for row, score in zip(rows, scores)}
+        if refine:
+            for item_id, vector in refine(list(result)).items():
+                result[item_id] = float(self._normalize(vector)[0] @ query)
+        return result
+
+    def save(self, path: str):
+        """Persist the index to a single ``.npz`` file, written atomically."""
+        self.compact()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        arrays = {}
+        if self.pq is not None:
+            arrays['pq_params'] = np.array([self.pq.m])
+            if self._quantized:
+                arrays['codes'] = self.codes
+                arrays['codebooks'] = self.pq.codebooks
+        np.savez(
+            tmp_path,
+            ids=np.array(self.ids, dtype=str),
+            vectors=self.vectors,
+            assignments=self.assignments,
+            centroids=self.centroids if self.is_trained else np.zeros((0, self.dim), dtype=np.float32),
+            params=np.array([self.dim, self.nlist, self.nprobe]),
+            storage=np.array(self.storage),
+            **arrays
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'VectorIndex':
+        data = np.load(path)
+        dim, nlist, nprobe = (int(x) for x in data['params'])
+        storage = str(data['storage']) if 'storage' in data else 'float32'
+        pq_subvectors = int(data['pq_params'][0]) if 'pq_params' in data else 96
+        index = cls(dim, nlist=nlist, nprobe=nprobe, storage=storage, pq_subvectors=pq_subvectors)
+        index.ids = [str(item_id) for item_id in data['ids']]
+        index.id_to_row = {item_id: row for row, item_id in enumerate(index.ids)}
+        index.vectors = data['vectors'].astype(index.vectors.dtype)
+        if 'codebooks' in data:
+            index.pq.codebooks = data['codebooks'].astype(np.float32)
+            index.codes = data['codes'].astype(np.uint8)
+        index.active = np.ones(len(index.ids), dtype=bool)
+        index.assignments = data['assignments'].astype(np.int32)
+        if len(data['centroids']):
+            index.centroids = data['centroids'].astype(np.float32)
+        return index
@@ -0,0 +1,71 @@
+import logging
+import numpy as np
+from typing import Any, Dict, List, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class VectorStore:
+    """Chunks of one document and their embeddings as a contiguous, pre-normalized float32 matrix.
+
+    Cosine similarity against every chunk is a single matrix-vector product;
+    top-k selection uses ``argpartition`` so only the k winners are sorted.
+    Lists are only produced when the store is serialized with ``to_dict``.
+    """
+
+    def __init__(self, chunks: List[str], embeddings: np.ndarray, model_name: str):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.ndim != 2 or len(embeddings) != len(chunks):
+            raise ValueError(f"Expected {len(chunks)} embeddings, got array of shape {embeddings.shape}")
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        self.embeddings = np.ascontiguousarray(embeddings / np.maximum(norms, 1e-12))
+        self.chunks = chunks
+        self.model_name = model_name
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    @property
+    def dim(self) -> int:
+        return self.embeddings.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return self.embeddings.nbytes
+
+    def search(self, query_embedding: np.ndarray, k: int = 3) -> List[Tuple[int, float]]:
+        """Return up to ``k`` (chunk index, cosine similarity) pairs, best first."""
+        if not len(self) or k <= 0:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        scores = self.embeddings @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form."""
+        return {
+            'chunks': self.chunks,
+            'embeddings': self.embeddings.tolist(),
+            'model_name': self.model_name
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'VectorStore':
+        return cls(data['chunks'], np.array(data['embeddings'], dtype=np.float32), data['model_name'])
+
+    def save(self, path: str):
+        """Write the normalized matrix as a ``.npy`` file that ``load`` can memory-map."""
+        np.save(path, self.embeddings)
+
+    @classmethod
+    def load(cls, path: str, chunks: List[str], model_name: str) -> 'VectorStore':
+        """Memory-map a matrix written by ``save``; pages are shared by every worker reading the file."""
+        store = cls.__new__(cls)
+        store.embeddings = np.load(path, mmap_mode='r')
+        store.chunks = chunks
+        store.model_name = model_name
+        return store
@@ -31,11 +31,46 @@ class Config:
     SCIBERT_MODEL_NAME = "allenai/scibert_scivocab_uncased"
     SUMMARIZATION_MODEL = "facebook/bart-large-cnn"
     EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+    INFERENCE_BACKEND = "torch"  # Encoder backend: "torch" (fp32), "quantized" (dynamic int8) or "onnx"
+    WARM_UP_MODELS = False  # Load search models in the background at startup instead of on first request
+    
+    # Cache configuration (embedding store and other on-disk caches shared by workers)
+    CACHE_DIR = os.environ.get('RESEARCH_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache'))
+    EMBEDDING_CACHE_SIZE = 100000  # Maximum number of cached paper embeddings per model
+    VECTOR_STORAGE = "float32"  # Local index vectors: "float32", "float16" (half size) or "pq" (PQ_SUBVECTORS bytes each)
+    PQ_SUBVECTORS = 96  # Product-quantization sub-vectors (must divide the embedding dimension)
     
     # Search configurations
     DEFAULT_SEARCH_CATEGORY = "cs.LG"
     DEFAULT_MAX_RESULTS = 5
     MAX_SEARCH_RESULTS = 20
+    LOCAL_INDEX_MIN_SCORE = None  # SciBERT cosine a local hit needs to skip arXiv; None disables local answering until calibrated (test_local_search.py)
+    HYBRID_SEARCH = True  # Prune local candidates with BM25 and fuse with embedding scores
+    LEXICAL_CANDIDATES = 100  # Papers kept by the BM25 stage before dense scoring
+    ARXIV_CONCURRENCY = 3  # Maximum parallel arXiv API requests
+    ARXIV_REQUEST_INTERVAL = 3.0  # Seconds between arXiv request starts (arXiv API policy)
+    ARXIV_API_URL = "http://export.arxiv.org/api/query"
+    ARXIV_MAX_RETRIES = 3  # Retries (with exponential backoff) for failed or throttled arXiv requests
+    ARXIV_POOL_SIZE = 10  # Keep-alive connections to the arXiv API per worker
+    TRENDING_TTL = 1800  # Seconds before trending topics are refreshed in the background
+    PAPER_DETAILS_TTL = 86400  # Seconds paper details stay in the shared cache
+    ABSTRACT_SUMMARY_CACHE_SIZE = 100000  # Abstract summaries kept in the shared cache (least recently used are evicted)
+    MAX_BULK_DETAILS = 100  # Maximum arXiv IDs per /search/papers-details request
+    QUERY_CACHE_SIZE = 1024  # Search results kept in each worker's LRU cache
+    QUERY_CACHE_TTL = 3600  # Seconds before a cached search result expires
+    QUERY_CACHE_SHARED = False  # Also share cached search results across workers via SQLite
+    RETRIEVAL_MODE = "direct"  # "direct" ranks arXiv's results as-is, "rerank" over-fetches and reranks
+    RERANK_POOL_FACTOR = 10  # Candidate pool size as a multiple of max_results in rerank mode
+    RERANK_MAX_POOL = 200  # Upper bound on the rerank candidate pool
+    RERANK_LATENCY_BUDGET = 10.0  # Seconds spent fetching candidates before ranking what we have
+    STREAM_SUMMARY_BATCH_SIZE = 1  # Abstracts summarized per batch before streamed papers are sent
+    
+    # Local corpus harvester configurations
+    # Categories copied into the local paper store; trending topics only rank harvested categories
+    HARVEST_CATEGORIES = ["cs.LG", "cs.AI", "cs.CL", "cs.CV", "cs.NE", "cs.RO", "cs.CR", "cs.DC"]
+    HARVEST_INTERVAL = 0  # Seconds between background harvests (0 disables; use "flask harvest" instead)
+    HARVEST_INITIAL_DAYS = 14  # How far back the first harvest reaches (two weeks give trending a previous week)
+    HARVEST_PAGE_SIZE = 100  # Entries requested per arXiv API page
     
     # AI configurations
     OPENAI_MODEL = "gpt-3.5-turbo"
@@ -43,8 +78,30 @@ class Config:
     TEMPERATURE = 0.3
     
     # PDF processing configurations
-    CHUNK_SIZE = 5000
-    CHUNK_OVERLAP = 500
+    EMBED_CHUNK_TOKENS = 256  # Tokens per retrieval chunk (capped at the embedding model's window)
+    EMBED_CHUNK_OVERLAP = 32  # Tokens shared by consecutive retrieval chunks
+    CONTEXT_CHUNK_TOKENS = 2000  # Tokens of document text per LLM prompt
+    CONTEXT_CHUNK_OVERLAP = 200  # Tokens shared by consecutive LLM context chunks
+    SUMMARY_MODE = "map_reduce"  # "map_reduce" covers the whole document; "single" summarizes the first context chunk
+    SUMMARY_CONCURRENCY = 4  # Parallel LLM calls while summarizing sections
+    SUMMARY_CACHE_SIZE = 20000  # Cached section summaries (keyed by prompt, provider and model, shared by workers)
+    SUMMARY_CACHE_TTL = 7 * 86400  # Seconds a cached section summary stays valid
+    LLM_CACHE_ENABLED = True  # Reuse LLM responses for identical (provider, model, prompt, parameters)
+    LLM_CACHE_TTL = 7 * 86400  # Seconds a cached LLM response stays valid
+    LLM_CACHE_SIZE = 10000  # Maximum cached LLM responses (least recently used are evicted)
+    PDF_EXTRACT_WORKERS = None  # Processes used to extract pages of large PDFs (None = one per CPU)
+    PDF_PARALLEL_MIN_PAGES = 16  # PDFs with fewer pages are extracted by a single worker process
+    PDF_PAGE_TIMEOUT = 20  # Seconds a single page may take before it is skipped
+    INGEST_WORKERS = 2  # Background threads per worker running PDF extract/chunk/embed jobs
+    INGEST_MAX_QUEUED = 50  # Uploads waiting for processing before new ones are refused (HTTP 503)
+    INGEST_JOB_TIMEOUT = 1800  # Seconds a job may run before it is reported failed (e.g. its worker died)
+    UPLOAD_PREVIEW_CHARS = 500  # Characters of extracted text returned with a finished upload
+    TEXT_PAGE_SIZE = 20000  # Default / maximum characters per /session/<id>/text request
+    TEXT_PAGE_MAX = 200000
+    CHUNK_PAGE_SIZE = 50  # Default / maximum chunks per /session/<id>/chunks request
+    CHUNK_PAGE_MAX = 500
+    SESSION_MEMORY_BUDGET_MB = 256  # Uploaded documents each worker keeps in memory; the rest are read from CACHE_DIR
+    SESSION_TTL = 86400  # Seconds an idle upload session lives before its artifacts may be deleted
     MAX_TEXT_LENGTH = 8000
     
     # Logging configuration
@@ -60,6 +117,7 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     DEBUG = False
     TESTING = False
+    WARM_UP_MODELS = True
 
 class TestingConfig(Config):
     TESTING = True
@@ -0,0 +1,50 @@
+"""
+Helpers shared by the test modules: the arXiv fixture corpus, the queries used
+against it and a SciBERT encoder that skips when torch, transformers or the
+model weights are unavailable.
+"""
+
+import os
+import json
+import pytest
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'arxiv_corpus.json')
+
+# Queries with related papers in the fixture corpus
+QUERIES = [
+    "self-attention sequence transduction",
+    "pretrained language model for scientific text",
+    "very deep convolutional networks for image classification",
+    "policy gradient reinforcement learning",
+    "generative models for image synthesis",
+    "stochastic gradient optimizer with adaptive moments",
+]
+
+def load_corpus():
+    with open(FIXTURE_PATH) as f:
+        return json.load(f)
+
+def load_documents():
+    return [p['title'] + ' ' + p['abstract'] for p in load_corpus()]
+
+def scibert_embed(backend, texts):
+    torch = pytest.importorskip('torch')
+    pytest.importorskip('transformers')
+    from transformers import AutoTokenizer
+    from app.services.inference import load_transformer_encoder, loaded_backend
+
+    if backend == 'onnx':
+        pytest.importorskip('optimum.onnxruntime')
+    model_name = "allenai/scibert_scivocab_uncased"
+    try:
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = load_transformer_encoder(model_name, backend)
+    except OSError as e:
+        pytest.skip(f"SciBERT weights unavailable: {e}")
+    assert loaded_backend(model) == backend
+
+    inputs = tokenizer(texts, return_tensors="pt", max_length=512, truncation=True, padding=True)
+    with torch.no_grad():
+        hidden = model(**inputs).last_hidden_state
+    mask = inputs['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+    return ((hidden * mask).sum(dim=1) / mask.sum(dim=1)).cpu().numpy()
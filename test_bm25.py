@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for the BM25 lexical index over the fixture corpus and for reciprocal rank fusion.
+"""
+
+import os
+import json
+import pytest
+from app.services.bm25 import BM25Index, reciprocal_rank_fusion
+from conftest import load_corpus
+
+def test_bm25_matches_exact_terms_and_acronyms():
+    corpus = load_corpus()
+    index = BM25Index()
+    for paper in corpus:
+        index.add(paper['arxiv_id'], paper['title'] + ' ' + paper['abstract'])
+
+    assert index.search("YOLO", k=1)[0][0] == "1506.02640v5"
+    assert index.search("SciBERT", k=1)[0][0] == "1903.10676v3"
+    assert index.search("quantum chromodynamics") == []
+
+    index.delete(["1506.02640v5"])
+    assert index.search("YOLO") == []
+    assert len(index) == len(corpus) - 1
+
+def test_bm25_matches_parts_of_hyphenated_terms(tmp_path):
+    index = BM25Index()
+    index.add("a", "Self-attention for sequence transduction")
+    index.add("b", "BERT-based ranking of state-of-the-art retrieval models")
+    index.add("c", "Convolutional networks for image classification")
+
+    assert [doc_id for doc_id, _ in index.search("attention")] == ["a"]
+    assert [doc_id for doc_id, _ in index.search("bert")] == ["b"]
+    assert index.search("self-attention")[0][0] == "a"
+    assert index.search("art")[0][0] == "b"
+
+    path = os.path.join(str(tmp_path), "bm25.json")
+    index.save(path)
+    assert BM25Index.load(path).search("attention") == index.search("attention")
+    with open(path) as f:
+        data = json.load(f)
+    del data['version']  # Saved before hyphenated parts were indexed
+    with open(path, 'w') as f:
+        json.dump(data, f)
+    with pytest.raises(ValueError):
+        BM25Index.load(path)
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c", "a"]])
+    assert fused[0][0] == "b"
+    assert [doc_id for doc_id, _ in fused] == ["b", "a", "c"]
+
+if __name__ == "__main__":
+    import tempfile
+    test_bm25_matches_exact_terms_and_acronyms()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_bm25_matches_parts_of_hyphenated_terms(tmp)
+    test_reciprocal_rank_fusion_rewards_agreement()
+    print("✅ All BM25 tests passed!")
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Tests for token-aware document chunking.
+"""
+
+from app.services.chunker import TokenChunker, approximate_token_counter
+
+def word_counter(texts):
+    # One token per word keeps the expected boundaries easy to reason about
+    return [len(text.split()) for text in texts]
+
+def make_document():
+    paragraphs = []
+    for p in range(6):
+        sentences = [f"Paragraph {p} sentence {s} has exactly eight words." for s in range(5)]
+        paragraphs.append(" ".join(sentences))
+    return "\n--- Page 1 ---\n" + "\n\n".join(paragraphs[:3]) + "\n\n--- Page 2 ---\n" + "\n\n".join(paragraphs[3:])
+
+def test_chunks_fit_budget_and_end_at_sentences():
+    text = make_document()
+    chunker = TokenChunker(word_counter, chunk_tokens=20, overlap_tokens=8)
+    chunks = chunker.split(text)
+    assert all(word_counter([chunk])[0] <= 20 for chunk in chunks)
+    assert all(chunk.endswith("words.") for chunk in chunks)
+    assert not any("--- Page" in chunk for chunk in chunks)
+    # Consecutive chunks share their boundary sentence
+    assert chunks[1].startswith(chunks[0].split(". ")[-1])
+
+    # Whole paragraphs (40 words) are kept together when the budget allows
+    paragraphs = TokenChunker(word_counter, chunk_tokens=40).split(text)
+    assert len(paragraphs) == 6 and paragraphs[0].startswith("Paragraph 0") and paragraphs[0].endswith("sentence 4 has exactly eight words.")
+
+def test_long_sentences_split_between_words():
+    sentence = " ".join(f"w{i}" for i in range(100)) + "."
+    chunks = TokenChunker(word_counter, chunk_tokens=30).split(sentence)
+    assert [len(chunk.split()) for chunk in chunks] == [30, 30, 30, 10]
+    assert " ".join(chunks) == sentence
+
+def test_approximate_counter_without_tokenizer():
+    chunks = TokenChunker(chunk_tokens=50).split(make_document())
+    assert chunks and all(approximate_token_counter([chunk])[0] <= 50 for chunk in chunks)
+
+if __name__ == "__main__":
+    test_chunks_fit_budget_and_end_at_sentences()
+    test_long_sentences_split_between_words()
+    test_approximate_counter_without_tokenizer()
+    print("✅ All chunker tests passed!")
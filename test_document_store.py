@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for content-addressed, disk-backed sharing of processed PDF uploads.
+"""
+
+import time
+import tempfile
+import threading
+import numpy as np
+from app.services.document_store import DocumentStore, content_hash
+from app.services.vector_store import VectorStore
+
+def make_vector_store(n=3, dim=8, seed=0):
+    rng = np.random.default_rng(seed)
+    return VectorStore([f"chunk {i}" for i in range(n)], rng.normal(size=(n, dim)), "test-model")
+
+def test_identical_bytes_share_artifacts_until_last_session_closes(tmp_path):
+    store = DocumentStore(str(tmp_path))
+    doc_hash = content_hash(b"%PDF-1.4 same bytes")
+    assert doc_hash == content_hash(b"%PDF-1.4 same bytes")
+    assert store.open_session(doc_hash) is None
+
+    store.add_document(doc_hash, "text", ["chunk 0", "chunk 1", "chunk 2"], make_vector_store())
+    first = store.open_session(doc_hash)
+    second = store.open_session(doc_hash)
+    assert first != second
+    assert store.get(first) is store.get(second)
+    assert store.info(first) == {'document_hash': doc_hash, 'text_length': 4, 'chunk_count': 3, 'preview': "text"}
+    assert store.stats()['documents_processed'] == 1
+
+    assert store.release_session(first)
+    assert store.get(second)['text'] == "text"
+    assert store.release_session(second)
+    assert not store.has_document(doc_hash)
+    assert not store.release_session(second)
+
+def test_sessions_are_shared_between_workers_and_bounded(tmp_path):
+    vector_store = make_vector_store(n=50, dim=64)
+    worker_a = DocumentStore(str(tmp_path))
+    # A budget smaller than two documents keeps only the most recent one in memory
+    worker_b = DocumentStore(str(tmp_path), memory_budget=vector_store.nbytes + 5000)
+
+    hashes = [content_hash(f"doc {i}".encode()) for i in range(3)]
+    sessions = []
+    for doc_hash in hashes:
+        worker_a.add_document(doc_hash, "text " + doc_hash, vector_store.chunks, vector_store)
+        sessions.append(worker_a.open_session(doc_hash))
+
+    query = np.ones(64, dtype=np.float32)
+    for doc_hash, session_id in zip(hashes, sessions):
+        document = worker_b.get(session_id)
+        assert document['text'] == "text " + doc_hash
+        assert isinstance(document['vector_store'].embeddings, np.memmap)
+        assert document['vector_store'].search(query, k=3) == vector_store.search(query, k=3)
+    stats = worker_b.stats()
+    assert stats['cached_documents'] == 1 and stats['cached_bytes'] <= stats['memory_budget']
+    assert stats['sessions'] == 3
+
+    # Releasing in one worker is visible to the other
+    assert worker_b.release_session(sessions[0])
+    assert worker_a.get(sessions[0]) is None and not worker_a.has_document(hashes[0])
+
+def test_idle_sessions_expire(tmp_path):
+    store = DocumentStore(str(tmp_path), session_ttl=0.05)
+    doc_hash = content_hash(b"%PDF-1.4 idle")
+    store.add_document(doc_hash, "text", ["chunk 0", "chunk 1", "chunk 2"], make_vector_store())
+    session_id = store.open_session(doc_hash)
+    assert store.get(session_id) is not None
+    time.sleep(0.1)
+    assert store.get(session_id) is None
+    assert store.cleanup(grace=0) == 1
+    assert not store.has_document(doc_hash)
+    assert store.stats()['sessions'] == 0
+
+def test_concurrent_uploads_process_once(tmp_path):
+    store = DocumentStore(str(tmp_path))
+    doc_hash = content_hash(b"%PDF-1.4 concurrent")
+    processed = []
+
+    def upload():
+        with store.processing(doc_hash):
+            if store.open_session(doc_hash) is None:
+                processed.append(1)
+                store.add_document(doc_hash, "text", ["chunk 0", "chunk 1", "chunk 2"], make_vector_store())
+                store.open_session(doc_hash)
+
+    threads = [threading.Thread(target=upload) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(processed) == 1
+    assert store.stats()['sessions'] == 8
+
+if __name__ == "__main__":
+    from pathlib import Path
+    for test in (test_identical_bytes_share_artifacts_until_last_session_closes,
+                 test_sessions_are_shared_between_workers_and_bounded,
+                 test_idle_sessions_expire,
+                 test_concurrent_uploads_process_once):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("✅ All document store tests passed!")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent memmap embedding cache shared by worker processes.
+Separate EmbeddingCache instances on one directory stand in for the workers.
+"""
+
+import tempfile
+import threading
+import zlib
+import numpy as np
+from app.services.embedding_cache import EmbeddingCache
+
+DIM = 16
+
+def vector_for(key):
+    return np.full(DIM, zlib.crc32(key.encode()) % 100000, dtype=np.float32)
+
+def test_reads_never_see_a_recycled_slot():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        writer = EmbeddingCache(cache_dir, 'test-model', DIM, max_entries=8)
+        reader = EmbeddingCache(cache_dir, 'test-model', DIM, max_entries=8)
+        writer.put_many({f"paper-{i}": vector_for(f"paper-{i}") for i in range(8)})
+
+        errors = []
+        done = threading.Event()
+        def recycle():
+            # The store is full, so every new key takes over the least recently used slot
+            for i in range(8, 3000):
+                writer.put(f"paper-{i}", vector_for(f"paper-{i}"))
+            done.set()
+
+        thread = threading.Thread(target=recycle)
+        thread.start()
+        while not done.is_set():
+            keys = [f"paper-{i}" for i in range(0, 3000, 3)]
+            for key, vector in reader.get_many(keys).items():
+                if not np.array_equal(vector, vector_for(key)):
+                    errors.append(key)
+        thread.join()
+        assert errors == []
+        assert len(reader) == 8
+
+def test_smaller_store_keeps_the_slots_it_still_has():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        large = EmbeddingCache(cache_dir, 'test-model', DIM, max_entries=10)
+        large.put_many({f"paper-{i}": vector_for(f"paper-{i}") for i in range(10)})
+
+        small = EmbeddingCache(cache_dir, 'test-model', DIM, max_entries=4)
+        found = small.get_many([f"paper-{i}" for i in range(10)])
+        assert sorted(found) == [f"paper-{i}" for i in range(4)]
+        assert all(np.array_equal(vector, vector_for(key)) for key, vector in found.items())
+        assert len(small) == 4
+
+        small.put_many({"new-1": vector_for("new-1"), "new-2": vector_for("new-2")})
+        assert len(small) == 4
+        assert np.array_equal(small.get("new-2"), vector_for("new-2"))
+
+if __name__ == "__main__":
+    test_reads_never_see_a_recycled_slot()
+    print("✅ Reads never return a vector from a recycled slot")
+    test_smaller_store_keeps_the_slots_it_still_has()
+    print("✅ A smaller store drops only the slots beyond its size")
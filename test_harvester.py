@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the shared arXiv client and the incremental harvester.
+A local HTTP server stands in for export.arxiv.org and serves the fixture
+corpus as an Atom feed, honouring category, lastUpdatedDate range and paging.
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse, parse_qs
+from xml.sax.saxutils import escape
+from flask import Flask
+from app import db
+from app.models import CategoryDailyCount, Paper, HarvestCheckpoint
+from app.services.arxiv_client import ArxivClient
+from app.services.citation_service import CitationService
+from app.services.harvester import ArxivHarvester
+from app.services.search_service import SearchService
+from app.services.trending import compute_trending, harvested_categories, rebuild_daily_counts
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'arxiv_corpus.json')
+UNTIL = datetime(2024, 1, 1)
+
+def load_feed_entries():
+    with open(FIXTURE_PATH) as f:
+        corpus = json.load(f)
+    for paper in corpus:
+        paper['updated'] = paper['published'] + 'T00:00:00Z'
+    return corpus
+
+def render_entry(paper):
+    authors = ''.join(f"<author><name>{escape(name.strip())}</name></author>" for name in paper['authors'].split(','))
+    categories = ''.join(f'<category term="{term}"/>' for term in paper['categories'].split())
+    return (
+        f"<entry><id>http://arxiv.org/abs/{paper['arxiv_id']}</id>"
+        f"<updated>{paper['updated']}</updated><published>{paper['published']}T00:00:00Z</published>"
+        f"<title>{escape(paper['title'])}</title><summary>{escape(paper['abstract'])}</summary>"
+        f"{authors}{categories}"
+        f"<link title=\"pdf\" href=\"http://arxiv.org/pdf/{paper['arxiv_id']}\" rel=\"related\"/></entry>"
+    )
+
+class FeedHandler(BaseHTTPRequestHandler):
+    entries = []
+    requests = []
+    failures = 0  # Number of upcoming requests answered with 503
+
+    def do_GET(self):
+        if FeedHandler.failures:
+            FeedHandler.failures -= 1
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        params = parse_qs(urlparse(self.path).query)
+        start, max_results = int(params['start'][0]), int(params['max_results'][0])
+        if 'id_list' in params:
+            wanted = params['id_list'][0].split(',')
+            matching = [p for p in self.entries if p['arxiv_id'] in wanted or p['arxiv_id'][:-2] in wanted]
+        else:
+            query = params['search_query'][0]
+            FeedHandler.requests.append(query)
+            category = re.search(r"cat:(\S+)", query).group(1)
+            since, until = re.search(r"lastUpdatedDate:\[(\d+) TO (\d+)\]", query).groups()
+            matching = sorted(
+                (p for p in self.entries
+                 if category in p['categories'].split()
+                 and since <= p['updated'][:16].replace('-', '').replace('T', '').replace(':', '') <= until),
+                key=lambda p: p['updated']
+            )
+        body = ('<?xml version="1.0" encoding="UTF-8"?><feed xmlns="http://www.w3.org/2005/Atom">'
+                + ''.join(render_entry(p) for p in matching[start:start + max_results]) + '</feed>').encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/atom+xml')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class RecordingSearchService:
+    """Stands in for SearchService and records what would be embedded."""
+
+    def __init__(self):
+        self.indexed = []
+        self.removed = []
+        self.saves = 0
+
+    def index_papers(self, papers, save=True):
+        self.indexed.extend(p['arxiv_id'] for p in papers)
+        return len(papers)
+
+    def remove_papers(self, arxiv_ids, save=True):
+        self.removed.extend(arxiv_ids)
+
+    def paper_index_differences(self, arxiv_ids):
+        stored, indexed = set(arxiv_ids), set(self.indexed) - set(self.removed)
+        return sorted(stored - indexed), sorted(indexed - stored)
+
+    def save_paper_index(self):
+        self.saves += 1
+
+def make_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+def start_server():
+    FeedHandler.entries = load_feed_entries()
+    FeedHandler.requests = []
+    FeedHandler.failures = 0
+    server = HTTPServer(('127.0.0.1', 0), FeedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def test_harvest_is_incremental_and_resumable():
+    server = start_server()
+    app = make_app()
+    service = RecordingSearchService()
+    client = ArxivClient(api_url=f"http://127.0.0.1:{server.server_port}/api/query", request_interval=0)
+    harvester = ArxivHarvester(search_service=service, client=client, page_size=2, initial_days=365 * 20)
+    try:
+        with app.app_context():
+            expected = [p for p in FeedHandler.entries if 'cs.LG' in p['categories'].split()]
+            stats = harvester.harvest(['cs.LG'], until=UNTIL)
+            assert stats == {'cs.LG': len(expected)}
+            assert Paper.query.count() == len(expected)
+            assert sorted(service.indexed) == sorted(p['arxiv_id'] for p in expected)
+            assert service.saves == 1
+
+            checkpoint = db.session.get(HarvestCheckpoint, 'cs.LG')
+            newest = max(p['updated'] for p in expected)
+            assert checkpoint.last_updated == datetime.strptime(newest, "%Y-%m-%dT%H:%M:%SZ")
+            assert checkpoint.papers_harvested == len(expected)
+
+            # Second run starts at the checkpoint and re-embeds nothing
+            indexed_before = len(service.indexed)
+            assert harvester.harvest(['cs.LG'], until=UNTIL) == {'cs.LG': 0}
+            assert len(service.indexed) == indexed_before
+            assert service.saves == 1
+            assert checkpoint.last_updated.strftime('%Y%m%d%H%M') in FeedHandler.requests[-1]
+
+            # A new version replaces the old row and its index entry
+            old = expected[0]
+            new_version = dict(old, arxiv_id=old['arxiv_id'][:-1] + str(int(old['arxiv_id'][-1]) + 1),
+                               title=old['title'] + ' (revised)', updated='2023-06-01T12:00:00Z')
+            FeedHandler.entries.append(new_version)
+            assert harvester.harvest(['cs.LG'], until=UNTIL) == {'cs.LG': 1}
+            assert service.indexed[indexed_before:] == [new_version['arxiv_id']]
+            assert service.removed == [old['arxiv_id']]
+            assert db.session.get(Paper, old['arxiv_id']) is None
+            assert Paper.query.count() == len(expected)
+
+            # Citations are answered from the local store
+            entry = CitationService(arxiv_client=client).get_arxiv_data(f"https://arxiv.org/abs/{new_version['arxiv_id'][:-2]}")
+            assert entry['title'] == new_version['title']
+            assert entry['author'][0]['name'] == old['authors'].split(',')[0]
+
+            # Daily counts maintained incrementally match a full rebuild
+            incremental = {(c.category, c.day): c.count for c in CategoryDailyCount.query if c.count}
+            assert sum(count for (category, _), count in incremental.items() if category == 'cs.LG') == len(expected)
+            rebuild_daily_counts()
+            assert {(c.category, c.day): c.count for c in CategoryDailyCount.query} == incremental
+    finally:
+        server.shutdown()
+
+def test_harvest_reconciles_index_after_crash():
+    server = start_server()
+    app = make_app()
+    client = ArxivClient(api_url=f"http://127.0.0.1:{server.server_port}/api/query", request_interval=0)
+    try:
+        with app.app_context():
+            ArxivHarvester(search_service=RecordingSearchService(), client=client, page_size=2,
+                           initial_days=365 * 20).harvest(['cs.LG'], until=UNTIL)
+            stored = sorted(p.arxiv_id for p in Paper.query)
+
+            # A restarted worker loads an index saved before the last pages were committed
+            service = RecordingSearchService()
+            service.indexed = stored[:2] + ['9999.99999v1']
+            harvester = ArxivHarvester(search_service=service, client=client, page_size=2)
+            assert harvester.harvest(['cs.LG'], until=UNTIL) == {'cs.LG': 0}
+            assert sorted(set(service.indexed) - set(service.removed)) == stored
+            assert service.removed == ['9999.99999v1']
+            assert service.saves == 1
+    finally:
+        server.shutdown()
+
+def test_client_retries_and_rate_limits():
+    server = start_server()
+    client = ArxivClient(api_url=f"http://127.0.0.1:{server.server_port}/api/query",
+                         request_interval=0.2, backoff=0.01)
+    try:
+        FeedHandler.failures = 2
+        results = client.get_by_ids(['1706.03762'])
+        assert [r.get_short_id() for r in results] == ['1706.03762v7']
+        assert results[0].authors[0].name == 'Ashish Vaswani'
+
+        # Sync and asyncio callers draw from the same bucket: 4 requests take at least 3 intervals
+        async def fetch_concurrently():
+            return await asyncio.gather(*(client.get_by_ids_async(['1810.04805']) for _ in range(3)))
+        start = time.monotonic()
+        client.get_by_ids(['1706.03762'])
+        assert all(len(r) == 1 for r in asyncio.run(fetch_concurrently()))
+        assert time.monotonic() - start >= 0.55
+
+        client.max_retries = 1
+        FeedHandler.failures = 5
+        try:
+            client.get_by_ids(['1706.03762'])
+            assert False, "expected the request to fail"
+        except IOError:
+            pass
+    finally:
+        server.shutdown()
+
+def test_throttled_async_responses_are_released():
+    server = start_server()
+    client = ArxivClient(api_url=f"http://127.0.0.1:{server.server_port}/api/query", request_interval=0, backoff=0.01)
+    throttled, closed = [], []
+    send = client._send
+    def recording_send(params, stream=False):
+        response = send(params, stream=stream)
+        if response.status_code != 200:
+            throttled.append(response)
+            response.close = lambda: closed.append(response)
+        return response
+    client._send = recording_send
+    try:
+        FeedHandler.failures = 2
+        assert len(asyncio.run(client.get_by_ids_async(['1706.03762']))) == 1
+        assert len(throttled) == 2 and len(closed) == 2
+    finally:
+        server.shutdown()
+
+def test_pages_are_parsed_from_the_stream():
+    server = start_server()
+    client = ArxivClient(api_url=f"http://127.0.0.1:{server.server_port}/api/query", request_interval=0, backoff=0.01)
+    def buffered_fetch(params):
+        raise AssertionError("search pages should not buffer the whole feed")
+    client.fetch = buffered_fetch
+    try:
+        FeedHandler.failures = 1
+        page = client.search_page('cat:cs.LG AND lastUpdatedDate:[190001010000 TO 210001010000]', max_results=3)
+        assert len(page) == 3
+        assert [r.get_short_id() for r in client.get_by_ids(['1706.03762'])] == ['1706.03762v7']
+    finally:
+        server.shutdown()
+
+def test_trending_growth_is_week_over_week():
+    app = make_app()
+    with app.app_context():
+        today = datetime(2024, 3, 15).date()
+        rows = [('cs.LG', 1, 6), ('cs.LG', 5, 4), ('cs.LG', 9, 5), ('cs.AI', 3, 2), ('cs.CV', 20, 7)]
+        for category, days_ago, count in rows:
+            db.session.add(CategoryDailyCount(category=category, day=today - timedelta(days=days_ago), count=count))
+        db.session.commit()
+
+        topics = compute_trending({'cs.LG': 'Machine Learning', 'cs.AI': 'Artificial Intelligence',
+                                   'cs.CV': 'Computer Vision'}, today=today)
+        assert topics == [
+            {'topic': 'Machine Learning', 'paper_count': 10, 'previous_count': 5, 'growth_rate': '+100%', 'category': 'cs.LG'},
+            {'topic': 'Artificial Intelligence', 'paper_count': 2, 'previous_count': 0, 'growth_rate': 'new', 'category': 'cs.AI'}
+        ]
+
+def test_trending_only_ranks_harvested_categories():
+    app = make_app()
+    with app.app_context():
+        today = datetime.utcnow().date()
+        for category in ('cs.LG', 'cs.NE'):  # cs.NE counts come only from papers cross-listed in cs.LG
+            db.session.add(CategoryDailyCount(category=category, day=today - timedelta(days=1), count=3))
+        db.session.add(HarvestCheckpoint(category='cs.LG', last_updated=datetime.utcnow(), papers_harvested=3))
+        db.session.commit()
+
+        assert harvested_categories(['cs.LG', 'cs.NE', 'cs.RO']) == ['cs.LG']
+        with tempfile.TemporaryDirectory() as cache_dir:
+            topics, from_store = SearchService(cache_dir=cache_dir)._compute_trending_topics()
+        assert from_store
+        assert [topic['category'] for topic in topics] == ['cs.LG']
+
+if __name__ == "__main__":
+    test_harvest_is_incremental_and_resumable()
+    test_harvest_reconciles_index_after_crash()
+    test_client_retries_and_rate_limits()
+    test_throttled_async_responses_are_released()
+    test_pages_are_parsed_from_the_stream()
+    test_trending_growth_is_week_over_week()
+    test_trending_only_ranks_harvested_categories()
+    print("✅ All arXiv client and harvester tests passed!")
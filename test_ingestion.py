@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for background PDF ingestion jobs.
+"""
+
+import sys
+import time
+import socket
+import tempfile
+import subprocess
+import threading
+import numpy as np
+from app.services.document_store import DocumentStore, content_hash
+from app.services.ingestion import IngestionQueue
+from app.services.vector_store import VectorStore
+
+class StubProcessor:
+    """Stands in for PDFProcessor; ``release`` holds extraction until the test lets it go."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.release.set()
+        self.extracted = 0
+
+    def extract_text_from_pdf(self, pdf_file):
+        self.release.wait(5)
+        self.extracted += 1
+        data = pdf_file.read()
+        return "" if data.startswith(b"broken") else f"Text of {len(data)} bytes. Second sentence."
+
+    def split_text_into_chunks(self, text):
+        return text.split(". ")
+
+    def create_vector_store(self, chunks):
+        return VectorStore(chunks, np.ones((len(chunks), 4)), "stub")
+
+def wait_for(queue, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+def test_jobs_run_in_background_and_report_stages(tmp_path):
+    store = DocumentStore(str(tmp_path))
+    queue = IngestionQueue(str(tmp_path / "jobs.db"), workers=1, max_queued=1)
+    processor = StubProcessor()
+    processor.release.clear()
+
+    data = b"%PDF-1.4 paper"
+    first = queue.submit("paper.pdf", data, content_hash(data), processor, store)
+    while queue.get(first)['stage'] != 'extract':
+        time.sleep(0.01)
+    # With the only worker busy, one more job may wait and the next is refused
+    second = queue.submit("other.pdf", b"%PDF other", content_hash(b"%PDF other"), processor, store)
+    assert queue.stats()['queue_depth'] == 1 and queue.get(second)['queue_position'] == 1
+    assert queue.submit("third.pdf", b"%PDF third", content_hash(b"%PDF third"), processor, store) is None
+
+    processor.release.set()
+    job = wait_for(queue, first)
+    assert job['status'] == 'done' and not job['deduplicated'] and job['progress'] == 1.0
+    assert set(job['timings']) == {'extract', 'chunk', 'embed', 'store'}
+    assert store.get(job['session_id'])['chunks'] == ["Text of 14 bytes", "Second sentence."]
+    wait_for(queue, second)
+
+    # The same bytes again complete at submission without reprocessing
+    again = queue.get(queue.submit("copy.pdf", data, content_hash(data), processor, store))
+    assert again['status'] == 'done' and again['deduplicated'] and again['session_id'] != job['session_id']
+    assert processor.extracted == 2
+
+    failed = wait_for(queue, queue.submit("broken.pdf", b"broken", content_hash(b"broken"), processor, store))
+    assert failed['status'] == 'failed' and 'extract' in failed['error']
+    stats = queue.stats()
+    assert stats['done'] == 3 and stats['failed'] == 1 and stats['queue_depth'] == 0
+    assert set(stats['mean_stage_seconds']) == {'extract', 'chunk', 'embed', 'store'}
+
+def test_jobs_of_a_dead_worker_are_failed(tmp_path):
+    store = DocumentStore(str(tmp_path))
+    stuck = IngestionQueue(str(tmp_path / "jobs.db"), workers=1)
+    processor = StubProcessor()
+    processor.release.clear()
+    job_id = stuck.submit("paper.pdf", b"%PDF-1.4 paper", content_hash(b"%PDF-1.4 paper"), processor, store)
+    while stuck.get(job_id)['stage'] != 'extract':
+        time.sleep(0.01)
+
+    # Another worker process reports on the job once it has run for longer than the limit
+    other = IngestionQueue(str(tmp_path / "jobs.db"), workers=1, job_timeout=0.2)
+    assert other.get(job_id)['status'] == 'running'
+    time.sleep(0.3)
+    job = other.get(job_id)
+    assert job['status'] == 'failed' and job['error']
+    assert other.stats()['running'] == 0
+    processor.release.set()
+    stuck.executor.shutdown(wait=True)
+
+def test_queued_jobs_of_a_dead_worker_are_failed(tmp_path):
+    store = DocumentStore(str(tmp_path))
+    queue = IngestionQueue(str(tmp_path / "jobs.db"), workers=1, max_queued=1, job_timeout=60)
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    with queue._connect() as conn:
+        # Left queued by a worker that was recycled on this host, and by one on another host long ago
+        conn.execute("INSERT INTO jobs (job_id, filename, document_hash, status, created, owner) "
+                     "VALUES ('orphan', 'lost.pdf', 'h1', 'queued', ?, ?)",
+                     (time.time(), f"{socket.gethostname()}:{dead.pid}"))
+        conn.execute("INSERT INTO jobs (job_id, filename, document_hash, status, created, owner) "
+                     "VALUES ('remote', 'old.pdf', 'h2', 'queued', ?, 'elsewhere:1')", (time.time() - 120,))
+
+    assert queue.get('orphan')['status'] == 'failed' and queue.get('remote')['status'] == 'failed'
+    assert queue.queue_depth() == 0
+    processor = StubProcessor()
+    job_id = queue.submit("paper.pdf", b"%PDF-1.4 paper", content_hash(b"%PDF-1.4 paper"), processor, store)
+    assert job_id is not None
+    assert wait_for(queue, job_id)['status'] == 'done'
+    queue.executor.shutdown(wait=True)
+
+if __name__ == "__main__":
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as tmp:
+        test_jobs_run_in_background_and_report_stages(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_jobs_of_a_dead_worker_are_failed(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_queued_jobs_of_a_dead_worker_are_failed(Path(tmp))
+    print("✅ All ingestion tests passed!")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the LLM response cache.
+"""
+
+import time
+import tempfile
+from app.services.llm_cache import LLMResponseCache
+
+class CountingLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, prompt):
+        def call():
+            self.calls += 1
+            return f"answer {self.calls} to {prompt}"
+        return call
+
+def test_identical_requests_are_served_from_cache(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.db"))
+    llm = CountingLLM()
+    params = {'max_tokens': 100, 'temperature': 0.3}
+
+    first = cache.complete('openai', 'gpt-3.5-turbo', 'topic: GNNs', params, llm('topic: GNNs'))
+    assert cache.complete('openai', 'gpt-3.5-turbo', 'topic: GNNs', dict(reversed(params.items())), llm('topic: GNNs')) == first
+    assert llm.calls == 1
+
+    # Provider, model and parameters are part of the key
+    cache.complete('google', 'gemini-1.5-flash', 'topic: GNNs', None, llm('topic: GNNs'))
+    cache.complete('openai', 'gpt-3.5-turbo', 'topic: GNNs', {**params, 'temperature': 0.7}, llm('topic: GNNs'))
+    assert llm.calls == 3
+
+    # Opting out neither reads nor writes the cache
+    fresh = cache.complete('openai', 'gpt-3.5-turbo', 'topic: GNNs', params, llm('topic: GNNs'), use_cache=False)
+    assert fresh != first and llm.calls == 4
+    assert cache.complete('openai', 'gpt-3.5-turbo', 'topic: GNNs', params, llm('topic: GNNs')) == first
+
+    # A second worker sees the same entries
+    other = LLMResponseCache(str(tmp_path / "cache.db"))
+    assert other.complete('openai', 'gpt-3.5-turbo', 'topic: GNNs', params, llm('topic: GNNs')) == first
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['bypassed'], stats['entries']) == (2, 3, 1, 3)
+    assert stats['hit_rate'] == 0.4
+
+def test_ttl_size_bound_and_errors(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.db"), ttl=0.05, max_entries=2)
+    llm = CountingLLM()
+    for prompt in ('a', 'b', 'c'):
+        cache.complete('openai', 'm', prompt, None, llm(prompt))
+    assert cache.stats()['entries'] == 2
+
+    time.sleep(0.1)
+    cache.complete('openai', 'm', 'c', None, llm('c'))
+    assert llm.calls == 4
+
+    def failing():
+        raise IOError("rate limited")
+    try:
+        cache.complete('openai', 'm', 'd', None, failing)
+        assert False, "error should propagate"
+    except IOError:
+        pass
+    cache.complete('openai', 'm', 'd', None, llm('d'))
+    assert llm.calls == 5
+
+if __name__ == "__main__":
+    from pathlib import Path
+    for test in (test_identical_requests_are_served_from_cache, test_ttl_size_bound_and_errors):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("✅ All LLM cache tests passed!")
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Tests for answering searches from the local paper index.
+SciBERT is replaced by deterministic hashed embeddings so the index, the
+database lookups and the locking can be exercised without model weights.
+"""
+
+import hashlib
+import threading
+from datetime import datetime
+import numpy as np
+import pytest
+from flask import Flask
+from app import db
+from app.models import Paper
+from app.services.arxiv_client import ArxivResult, Author
+from app.services.search_service import SearchService, _merge_ranked
+from config_sample import Config
+from conftest import QUERIES, load_documents, scibert_embed
+
+# Queries with nothing related in the fixture corpus
+FAR_OFF_QUERIES = [
+    "medieval french poetry and the wine trade",
+    "soil erosion in alpine vineyards",
+]
+
+DIM = 32
+
+def fake_embedding(text):
+    seed = int(hashlib.sha256(text.encode('utf-8')).hexdigest()[:8], 16)
+    return np.random.default_rng(seed).standard_normal(DIM).astype(np.float32)
+
+class RecordingClient:
+    """Stands in for ArxivClient and records the searches that fell back to arXiv."""
+
+    def __init__(self):
+        self.queries = []
+
+    def search(self, query, max_results=10, **kwargs):
+        self.queries.append(query)
+        return [ArxivResult("http://arxiv.org/abs/2402.00001v1", "A live arXiv paper", "Fetched from arXiv.",
+                            [Author("A. Author")], ["cs.LG"], datetime(2024, 2, 1), datetime(2024, 2, 1))]
+
+class HashedSearchService(SearchService):
+    """SearchService with a stand-in encoder: one random vector per distinct text."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('arxiv_client', RecordingClient())
+        super().__init__(**kwargs)
+        self.scibert_model = type('Model', (), {'config': type('Config', (), {'hidden_size': DIM})()})()
+        self.tokenizer = object()
+        self._load_paper_index()
+        self._loaded = True
+
+    def get_scibert_embeddings(self, texts, batch_size=16, cache_keys=None):
+        return [fake_embedding(text) for text in texts]
+
+def make_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+def make_papers(start, count):
+    return [{'arxiv_id': f"2401.{i:05d}v1", 'title': f"Paper {i} on topic {i % 7}",
+             'abstract': f"Abstract number {i} about graphs and topic {i % 7}."} for i in range(start, start + count)]
+
+def store_papers(papers):
+    for paper in papers:
+        db.session.add(Paper(arxiv_id=paper['arxiv_id'], base_id=paper['arxiv_id'][:-2], title=paper['title'],
+                             abstract=paper['abstract'], categories='cs.LG', published=datetime(2024, 1, 1),
+                             updated=datetime(2024, 1, 1)))
+    db.session.commit()
+
+def test_search_while_indexing(tmp_path):
+    app = make_app()
+    service = HashedSearchService(cache_dir=str(tmp_path), local_min_score=-1.0)
+    initial = make_papers(0, 50)
+    with app.app_context():
+        store_papers(initial)
+    assert service.index_papers(initial) == 50
+
+    errors = []
+    def harvest():
+        try:
+            for start in range(50, 3050, 10):
+                if service.index_papers(make_papers(start, 10), save=False) != 10:
+                    errors.append(f"indexing batch at {start} failed")
+        except Exception as e:
+            errors.append(str(e))
+
+    harvester = threading.Thread(target=harvest)
+    harvester.start()
+    with app.app_context():
+        while harvester.is_alive():
+            query = initial[len(errors) % 50]
+            results = service.search_local_index(fake_embedding(query['title']), max_results=3,
+                                                 concept=query['title'])
+            if not results:
+                errors.append("search returned nothing while the index was growing")
+                break
+    harvester.join()
+    assert errors == []
+    assert len(service.paper_index) == 3050
+    assert len(service.lexical_index) == 3050
+
+def test_index_differences(tmp_path):
+    service = HashedSearchService(cache_dir=str(tmp_path))
+    papers = make_papers(0, 5)
+    service.index_papers(papers[:4], save=False)
+    stored = [p['arxiv_id'] for p in papers[1:]]
+    assert service.paper_index_differences(stored) == ([papers[4]['arxiv_id']], [papers[0]['arxiv_id']])
+    # Papers left out of a discarded lexical index are reported as missing too
+    service.lexical_index.delete([papers[2]['arxiv_id']])
+    assert service.paper_index_differences(stored)[0] == [papers[2]['arxiv_id'], papers[4]['arxiv_id']]
+
+def test_merge_keeps_the_fused_local_order():
+    # Local hits arrive in reciprocal-rank-fusion order, which need not follow their dense scores
+    local = [{'arxiv_id': 'local-a', 'similarity_score': 0.90}, {'arxiv_id': 'local-b', 'similarity_score': 0.95}]
+    live = [{'arxiv_id': 'live-c', 'similarity_score': 0.92}, {'arxiv_id': 'live-d', 'similarity_score': 0.50}]
+    merged = [paper['arxiv_id'] for paper in _merge_ranked(local, live, 4)]
+    assert merged == ['live-c', 'local-a', 'local-b', 'live-d']
+    assert [paper['arxiv_id'] for paper in _merge_ranked(local, live, 2)] == ['live-c', 'local-a']
+
+def test_far_off_query_falls_back_to_arxiv(tmp_path):
+    app = make_app()
+    # Hashed embeddings give 1.0 for the indexed text and near 0 for anything else
+    service = HashedSearchService(cache_dir=str(tmp_path), local_min_score=0.8)
+    papers = make_papers(0, 20)
+    with app.app_context():
+        store_papers(papers)
+        service.index_papers(papers)
+
+        on_topic = f"{papers[3]['title']} {papers[3]['abstract']}"
+        results = service.find_similar_papers(on_topic, category=None, max_results=1)
+        assert [r['arxiv_id'] for r in results] == [papers[3]['arxiv_id']]
+        assert service.arxiv_client.queries == []
+
+        results = service.find_similar_papers(FAR_OFF_QUERIES[0], category=None, max_results=1)
+        assert service.arxiv_client.queries == [FAR_OFF_QUERIES[0]]
+        assert [r['arxiv_id'] for r in results] == ['2402.00001v1']
+
+def test_local_answering_is_off_by_default(tmp_path):
+    app = make_app()
+    assert Config.LOCAL_INDEX_MIN_SCORE is None
+    service = HashedSearchService(cache_dir=str(tmp_path))
+    papers = make_papers(0, 5)
+    with app.app_context():
+        store_papers(papers)
+        service.index_papers(papers)
+        on_topic = f"{papers[3]['title']} {papers[3]['abstract']}"
+        results = service.find_similar_papers(on_topic, category=None, max_results=1)
+    assert service.arxiv_client.queries == [on_topic]
+    assert [r['arxiv_id'] for r in results] == ['2402.00001v1']
+
+def test_min_score_separates_related_from_far_off_queries():
+    """Best SciBERT cosine of related and far-off queries over the fixture corpus.
+
+    Run it with the model available and set LOCAL_INDEX_MIN_SCORE between the
+    two reported ranges; the test fails while no threshold can separate them.
+    """
+    documents = load_documents()
+    vectors = scibert_embed('torch', QUERIES + FAR_OFF_QUERIES + documents)
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries, docs = vectors[:-len(documents)], vectors[-len(documents):]
+    best = (queries @ docs.T).max(axis=1)
+    related, far_off = best[:len(QUERIES)], best[len(QUERIES):]
+    print(f"related: {np.round(related, 3)} far-off: {np.round(far_off, 3)}")
+    assert related.min() > far_off.max(), (related, far_off)
+    if Config.LOCAL_INDEX_MIN_SCORE is not None:
+        assert far_off.max() < Config.LOCAL_INDEX_MIN_SCORE <= related.min(), (related, far_off)
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as tmp:
+        test_search_while_indexing(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_index_differences(Path(tmp))
+    print("✅ Local search stays consistent while the harvester adds papers")
+    test_merge_keeps_the_fused_local_order()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_far_off_query_falls_back_to_arxiv(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_local_answering_is_off_by_default(Path(tmp))
+    print("✅ Queries without a close local match fall back to arXiv")
+    try:
+        test_min_score_separates_related_from_far_off_queries()
+        print("✅ SciBERT scores separate related from far-off queries")
+    except pytest.skip.Exception:
+        print("⏭️  Threshold calibration skipped (SciBERT unavailable)")
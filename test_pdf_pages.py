@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for page-level PDF text extraction in worker processes.
+PDFs are generated with reportlab; extraction runs from a background thread,
+as it does on the ingest queue.
+"""
+
+import io
+import time
+import signal
+import threading
+from reportlab.pdfgen import canvas
+from app.services import pdf_pages
+from app.services.pdf_pages import extract_pages
+
+def make_pdf(page_count):
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    for page_num in range(page_count):
+        pdf.drawString(72, 720, f"Content of page number {page_num + 1}")
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+def hang_on_second_page(args):
+    """Runs in the workers: page 2 blocks the alarm and never returns, like a page stuck in C code."""
+    page_num, timeout = args
+    if page_num == 1:
+        signal.pthread_sigmask(signal.SIG_BLOCK, [signal.SIGALRM])
+        time.sleep(120)
+    return pdf_pages._extract_page(args)
+
+def extract_in_thread(data, page_count, workers, page_timeout=20):
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(
+        texts=extract_pages(data, page_count, workers=workers, page_timeout=page_timeout)))
+    thread.start()
+    thread.join(timeout=60)
+    assert not thread.is_alive(), "extraction did not finish"
+    return result['texts']
+
+def test_pages_come_back_in_order():
+    for page_count, workers in [(3, 1), (20, 4)]:
+        texts = extract_in_thread(make_pdf(page_count), page_count, workers)
+        assert len(texts) == page_count
+        for page_num, text in enumerate(texts):
+            assert f"page number {page_num + 1}" in text
+
+def test_a_stalled_page_only_loses_itself():
+    # Pickled by reference, so the workers run this module's stand-in instead of the real extractor
+    original = pdf_pages._extract_page
+    pdf_pages._extract_page = hang_on_second_page
+    try:
+        texts = extract_in_thread(make_pdf(6), 6, workers=1, page_timeout=0.5)
+    finally:
+        pdf_pages._extract_page = original
+    assert texts[1] == ""
+    for page_num in (0, 2, 3, 4, 5):
+        assert f"page number {page_num + 1}" in texts[page_num]
+
+if __name__ == "__main__":
+    test_pages_come_back_in_order()
+    print("✅ PDF pages are extracted in worker processes, in order")
+    test_a_stalled_page_only_loses_itself()
+    print("✅ A stalled page is skipped without losing the pages after it")
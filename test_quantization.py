@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Accuracy check for the quantized / ONNX inference backends.
+Compares cosine rankings over the fixture corpus against the fp32 baseline.
+Model tests are skipped when torch, transformers or the model weights are unavailable.
+Run directly to print the agreement metrics for every backend.
+"""
+
+import numpy as np
+import pytest
+from app.services.inference import ranking_agreement
+from conftest import QUERIES, load_documents, scibert_embed
+
+# Minimum agreement with fp32 we accept for the faster backends
+MIN_TOP1_AGREEMENT = 0.8
+MIN_TOPK_OVERLAP = 0.8
+
+def minilm_embed(backend, texts):
+    pytest.importorskip('sentence_transformers')
+    from app.services.inference import load_sentence_encoder, loaded_backend
+
+    if backend == 'onnx':
+        pytest.importorskip('optimum.onnxruntime')
+    try:
+        model = load_sentence_encoder('all-MiniLM-L6-v2', backend)
+    except OSError as e:
+        pytest.skip(f"MiniLM weights unavailable: {e}")
+    assert loaded_backend(model) == backend
+    return np.asarray(model.encode(texts))
+
+def check_backend(embed, backend):
+    documents = load_documents()
+    baseline = embed('torch', QUERIES + documents)
+    candidate = embed(backend, QUERIES + documents)
+    n = len(QUERIES)
+    return ranking_agreement(baseline[:n], baseline[n:], candidate[:n], candidate[n:], k=3)
+
+def test_ranking_agreement_identical_and_perturbed():
+    rng = np.random.default_rng(0)
+    queries = rng.normal(size=(6, 32))
+    docs = rng.normal(size=(12, 32))
+
+    identical = ranking_agreement(queries, docs, queries, docs, k=3)
+    assert identical['top1_agreement'] == 1.0
+    assert identical['topk_overlap'] == 1.0
+    assert identical['mean_abs_score_delta'] < 1e-6
+
+    noisy = ranking_agreement(queries, docs, queries + rng.normal(scale=5.0, size=queries.shape), docs, k=3)
+    assert noisy['mean_abs_score_delta'] > 0.0
+
+@pytest.mark.parametrize('backend', ['quantized', 'onnx'])
+def test_scibert_backend_matches_fp32_ranking(backend):
+    metrics = check_backend(scibert_embed, backend)
+    assert metrics['top1_agreement'] >= MIN_TOP1_AGREEMENT, metrics
+    assert metrics['topk_overlap'] >= MIN_TOPK_OVERLAP, metrics
+
+@pytest.mark.parametrize('backend', ['quantized', 'onnx'])
+def test_minilm_backend_matches_fp32_ranking(backend):
+    metrics = check_backend(minilm_embed, backend)
+    assert metrics['top1_agreement'] >= MIN_TOP1_AGREEMENT, metrics
+    assert metrics['topk_overlap'] >= MIN_TOPK_OVERLAP, metrics
+
+if __name__ == "__main__":
+    for name, embed in [('SciBERT', scibert_embed), ('MiniLM', minilm_embed)]:
+        for backend in ('quantized', 'onnx'):
+            print(f"{name} {backend}: {check_backend(embed, backend)}")
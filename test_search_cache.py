@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Tests that repeated SearchService calls are served from its persistent caches
+(embeddings, abstract summaries and paper details) instead of recomputing.
+Models and arXiv are replaced by recording stand-ins; the embedding test is
+skipped when torch is unavailable.
+"""
+
+import time
+import tempfile
+import threading
+from datetime import datetime
+import numpy as np
+import pytest
+from app.services.arxiv_client import ArxivResult, Author
+from app.services.embedding_cache import EmbeddingCache
+from app.services.search_service import SearchService
+
+class RecordingClient:
+    """Stands in for ArxivClient and records which IDs were requested."""
+
+    def __init__(self):
+        self.requested = []
+
+    def get_by_ids(self, arxiv_ids):
+        self.requested.append(list(arxiv_ids))
+        return [ArxivResult(f"http://arxiv.org/abs/{arxiv_id}v1", f"Paper {arxiv_id}", "An abstract.",
+                            [Author("A. Author")], ["cs.LG"], datetime(2024, 1, 1), datetime(2024, 1, 2))
+                for arxiv_id in arxiv_ids]
+
+class RecordingSummarizer:
+    """Stands in for the BART pipeline and records every text it summarizes."""
+
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts, **kwargs):
+        self.texts.extend(texts)
+        return [{'summary_text': f"summary of {text[:10]}"} for text in texts]
+
+def make_service(cache_dir, client=None):
+    service = SearchService(cache_dir=cache_dir, arxiv_client=client or RecordingClient())
+    service._loaded = True  # Skip model loading; the tests install stand-ins
+    return service
+
+def test_repeat_summaries_come_from_cache():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        service = make_service(cache_dir)
+        service.summarizer = RecordingSummarizer()
+        abstracts = ["first abstract text", "second abstract text", "first abstract text"]
+
+        first = service.summarize_abstracts(abstracts)
+        assert len(service.summarizer.texts) == 2  # Duplicates share one summary
+        second = service.summarize_abstracts(abstracts)
+        assert second == first
+        assert len(service.summarizer.texts) == 2
+        assert service.summary_cache.stats()['entries'] == 2
+
+        # A new worker process sharing the cache directory reuses them too
+        other = make_service(cache_dir)
+        other.summarizer = RecordingSummarizer()
+        assert other.summarize_abstracts(abstracts) == first
+        assert other.summarizer.texts == []
+
+def test_summary_cache_is_bounded():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        service = SearchService(cache_dir=cache_dir, arxiv_client=RecordingClient(), summary_cache_size=2)
+        service._loaded = True
+        service.summarizer = RecordingSummarizer()
+        service.summarize_abstracts([f"abstract number {i}" for i in range(5)])
+        assert service.summary_cache.stats()['entries'] == 2
+
+def test_repeat_details_come_from_cache():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        client = RecordingClient()
+        service = make_service(cache_dir, client)
+
+        first = service.get_papers_details(["2401.00001", "2401.00002"])
+        assert all(result['success'] for result in first)
+        assert client.requested == [["2401.00001", "2401.00002"]]
+
+        second = service.get_papers_details(["2401.00001", "2401.00002"])
+        assert second == first
+        assert client.requested == [["2401.00001", "2401.00002"]]
+
+def test_cold_trending_topics_are_computed_once():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        service = make_service(cache_dir)
+        calls = []
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return [{'topic': 'Machine Learning', 'category': 'cs.LG'}], True
+        service._compute_trending_topics = compute
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(service.get_trending_topics())) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1
+        assert results == [[{'topic': 'Machine Learning', 'category': 'cs.LG'}]] * 5
+
+def test_embedding_store_is_named_after_the_loaded_backend():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        service = SearchService(cache_dir=cache_dir, arxiv_client=RecordingClient(), inference_backend='onnx')
+        service.model_name = "allenai/scibert_scivocab_uncased"
+        # ONNX was requested but the loader fell back to quantized PyTorch
+        service.scibert_model = type('Model', (), {'inference_backend': 'quantized',
+                                                   'config': type('Config', (), {'hidden_size': 8})()})()
+        service._init_embedding_cache()
+        assert service.embedding_cache.model_name == "allenai/scibert_scivocab_uncased-quantized"
+
+def test_repeat_embeddings_come_from_cache():
+    torch = pytest.importorskip('torch')
+    dim = 8
+
+    class CountingTokenizer:
+        def __call__(self, texts, **kwargs):
+            ids = torch.tensor([[len(word) for word in text.split()][:4] + [0] * (4 - min(4, len(text.split())))
+                                for text in texts])
+            return {'input_ids': ids, 'attention_mask': (ids > 0).long()}
+
+    class CountingModel(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.embed = torch.nn.Embedding(64, dim)
+            self.calls = 0
+
+        def forward(self, input_ids, attention_mask):
+            self.calls += 1
+            return type('Output', (), {'last_hidden_state': self.embed(input_ids)})()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        service = make_service(cache_dir)
+        service.tokenizer = CountingTokenizer()
+        service.scibert_model = CountingModel()
+        service.embedding_cache = EmbeddingCache(cache_dir, 'test-model', dim, max_entries=16)
+        texts = ["graph neural networks", "diffusion models for images"]
+        keys = ["2401.00001v1", "2401.00002v1"]
+
+        first = service.get_scibert_embeddings(texts, cache_keys=keys)
+        assert service.scibert_model.calls == 1
+        second = service.get_scibert_embeddings(texts, cache_keys=keys)
+        assert service.scibert_model.calls == 1
+        for a, b in zip(first, second):
+            assert np.allclose(a, b)
+
+if __name__ == "__main__":
+    test_repeat_summaries_come_from_cache()
+    print("✅ Abstract summaries are served from the cache on repeat calls")
+    test_summary_cache_is_bounded()
+    print("✅ Abstract summary cache is bounded")
+    test_repeat_details_come_from_cache()
+    print("✅ Paper details are served from the cache on repeat calls")
+    test_cold_trending_topics_are_computed_once()
+    print("✅ Concurrent cold requests share one trending refresh")
+    test_embedding_store_is_named_after_the_loaded_backend()
+    print("✅ Embedding store is named after the backend actually loaded")
+    try:
+        test_repeat_embeddings_come_from_cache()
+        print("✅ Embeddings are served from the cache on repeat calls")
+    except pytest.skip.Exception:
+        print("⏭️  Embedding cache test skipped (torch unavailable)")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Client tests for request validation on the search routes.
+The search service is replaced by a stand-in that records what it was asked.
+"""
+
+from flask import Flask
+from app.routes import search
+
+class RecordingSearchService:
+    """Stands in for SearchService and records the requested result counts and detail lookups."""
+
+    def __init__(self):
+        self.max_results = []
+        self.details = []
+
+    def find_similar_papers(self, concept, category="cs.LG", max_results=5, mode=None):
+        self.max_results.append(max_results)
+        return []
+
+    def iter_similar_papers(self, concept, category="cs.LG", max_results=5, summary_batch_size=None, mode=None):
+        self.max_results.append(max_results)
+        yield 'ranking', []
+
+    def get_papers_details(self, arxiv_ids):
+        self.details.append(list(arxiv_ids))
+        return [{'arxiv_id': arxiv_id, 'success': True} for arxiv_id in arxiv_ids]
+
+def make_client():
+    app = Flask(__name__)
+    app.config.update(DEFAULT_MAX_RESULTS=5, MAX_SEARCH_RESULTS=20)
+    app.register_blueprint(search.search_bp, url_prefix='/search')
+    return app.test_client()
+
+ROUTES = [
+    ('/search/search-papers', {'query': 'graph neural networks'}),
+    ('/search/search-papers/stream', {'query': 'graph neural networks'}),
+    ('/search/find-similar', {'paper_title': 'Graph neural networks'}),
+]
+
+def test_max_results_is_validated_and_clamped():
+    client = make_client()
+    previous, search.search_service = search.search_service, RecordingSearchService()
+    try:
+        for url, body in ROUTES:
+            service = search.search_service = RecordingSearchService()
+            for bad in ('many', -1, 0, None, [3]):
+                response = client.post(url, json=dict(body, max_results=bad))
+                assert response.status_code == 400, (url, bad)
+                assert 'max_results' in response.get_json()['error']
+            assert service.max_results == []
+
+            for requested, expected in ((None, 5), (3, 3), ('7', 7), (10 ** 6, 20)):
+                payload = dict(body) if requested is None else dict(body, max_results=requested)
+                response = client.post(url, json=payload)
+                assert response.status_code == 200
+                response.get_data()  # Drain streamed responses
+                assert service.max_results[-1] == expected, (url, requested)
+    finally:
+        search.search_service = previous
+
+def test_details_require_string_ids():
+    client = make_client()
+    previous, service = search.search_service, RecordingSearchService()
+    search.search_service = service
+    try:
+        for bad in ([1706, None], ["1706.03762", ""], ["1706.03762", "  "], ["1706.03762", ["1810.04805"]], "1706.03762"):
+            response = client.post('/search/papers-details', json={'arxiv_ids': bad})
+            assert response.status_code == 400, bad
+        assert service.details == []
+
+        response = client.post('/search/papers-details', json={'arxiv_ids': ["1706.03762", "1810.04805"]})
+        assert response.status_code == 200 and response.get_json()['total_results'] == 2
+    finally:
+        search.search_service = previous
+
+if __name__ == "__main__":
+    test_max_results_is_validated_and_clamped()
+    print("✅ Search routes validate and clamp max_results")
+    test_details_require_string_ids()
+    print("✅ Paper details reject IDs that are not non-empty strings")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Client tests for paging through a processed upload's text and chunks.
+Skipped when the paper analysis blueprint's LLM dependencies are not installed.
+"""
+
+import tempfile
+import numpy as np
+import pytest
+from flask import Flask
+from app.services.document_store import content_hash
+from app.services.vector_store import VectorStore
+
+TEXT = "The quick brown fox jumps over the lazy dog. " * 3
+CHUNKS = [f"chunk {i}" for i in range(7)]
+
+def make_client(tmp_path):
+    paper_analysis = pytest.importorskip('app.routes.paper_analysis')
+    app = Flask(__name__)
+    app.config.update(CACHE_DIR=str(tmp_path), TEXT_PAGE_SIZE=20, TEXT_PAGE_MAX=50,
+                      CHUNK_PAGE_SIZE=2, CHUNK_PAGE_MAX=3)
+    app.register_blueprint(paper_analysis.paper_analysis_bp, url_prefix='/paper-analysis')
+    paper_analysis.document_store = None  # Start from a store under this test's directory
+    with app.app_context():
+        store = paper_analysis.get_document_store()
+    doc_hash = content_hash(b"%PDF-1.4 paged")
+    store.add_document(doc_hash, TEXT, CHUNKS, VectorStore(CHUNKS, np.ones((len(CHUNKS), 4)), "test-model"))
+    return app.test_client(), store.open_session(doc_hash)
+
+def follow(client, url, cursor, key, limit=None):
+    """Collect every page by following the next cursor; fails if it does not terminate."""
+    pages, position = [], 0
+    for _ in range(100):
+        query = f"{url}?{cursor}={position}" + (f"&limit={limit}" if limit else "")
+        data = client.get(query).get_json()
+        pages.append(data[key])
+        position = data[f"next_{cursor}"]
+        if position is None:
+            return pages
+    raise AssertionError("cursor never reached the end")
+
+def test_text_pages_cover_the_document(tmp_path):
+    client, session_id = make_client(tmp_path)
+    url = f"/paper-analysis/session/{session_id}/text"
+
+    pages = follow(client, url, 'offset', 'text')
+    assert "".join(pages) == TEXT and len(pages[0]) == 20  # TEXT_PAGE_SIZE by default
+    assert "".join(follow(client, url, 'offset', 'text', limit=7)) == TEXT
+    assert len(client.get(f"{url}?limit=1000").get_json()['text']) == 50  # Clamped to TEXT_PAGE_MAX
+
+    past_end = client.get(f"{url}?offset={len(TEXT) + 10}").get_json()
+    assert past_end['text'] == "" and past_end['next_offset'] is None and past_end['total_length'] == len(TEXT)
+
+def test_chunk_pages_cover_the_document(tmp_path):
+    client, session_id = make_client(tmp_path)
+    url = f"/paper-analysis/session/{session_id}/chunks"
+
+    pages = follow(client, url, 'start', 'chunks')
+    assert sum(pages, []) == CHUNKS and len(pages[0]) == 2  # CHUNK_PAGE_SIZE by default
+    assert len(client.get(f"{url}?limit=100").get_json()['chunks']) == 3  # Clamped to CHUNK_PAGE_MAX
+    assert client.get(f"{url}?start=1&limit=2").get_json()['chunks'] == CHUNKS[1:3]
+
+def test_bad_ranges_and_unknown_sessions_are_rejected(tmp_path):
+    client, session_id = make_client(tmp_path)
+    for path in ('text', 'chunks'):
+        url = f"/paper-analysis/session/{session_id}/{path}"
+        cursor = 'offset' if path == 'text' else 'start'
+        for query in ('limit=0', 'limit=-3', 'limit=abc', f'{cursor}=-1', f'{cursor}=1.5'):
+            response = client.get(f"{url}?{query}")
+            assert response.status_code == 400, (path, query)
+            assert 'error' in response.get_json()
+        assert client.get(f"/paper-analysis/session/no-such-session/{path}").status_code == 404
+
+if __name__ == "__main__":
+    from pathlib import Path
+    try:
+        for test in (test_text_pages_cover_the_document, test_chunk_pages_cover_the_document,
+                     test_bad_ranges_and_unknown_sessions_are_rejected):
+            with tempfile.TemporaryDirectory() as tmp:
+                test(Path(tmp))
+        print("✅ Session text and chunks page correctly and reject bad ranges")
+    except pytest.skip.Exception as e:
+        print(f"⏭️  Session route tests skipped ({e})")
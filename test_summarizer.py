@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for map-reduce summarization of long documents.
+"""
+
+import time
+import threading
+from app.services.cache_store import SQLiteCache
+from app.services.chunker import TokenChunker
+from app.services.summarizer import MapReduceSummarizer
+
+def word_counter(texts):
+    return [len(text.split()) for text in texts]
+
+class RecordingLLM:
+    """Fake LLM that answers every prompt with a short digest and tracks concurrency."""
+
+    def __init__(self):
+        self.prompts = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, prompt, max_tokens, use_cache=True):
+        with self.lock:
+            self.prompts.append(prompt)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.02)
+        with self.lock:
+            self.active -= 1
+        words = prompt.split()
+        return f"digest of {len(words)} words ending {words[-1]}"
+
+def final_prompt(content, sectioned):
+    return ("SECTIONS " if sectioned else "TEXT ") + content
+
+def make_document(sections, words=30):
+    return "\n\n".join(" ".join(f"s{s}w{w}" for w in range(words)) + "." for s in range(sections))
+
+def test_long_documents_are_mapped_concurrently_and_reduced(tmp_path):
+    llm = RecordingLLM()
+    cache = SQLiteCache(str(tmp_path / "cache.db"), "chunk_summaries")
+    summarizer = MapReduceSummarizer(llm, TokenChunker(word_counter, chunk_tokens=40), cache=cache, concurrency=3)
+
+    # Short documents take a single call
+    assert summarizer.summarize(make_document(1), final_prompt).startswith("digest")
+    assert llm.prompts[-1].startswith("TEXT ")
+
+    llm.prompts.clear()
+    document = make_document(8)
+    summarizer.summarize(document, final_prompt)
+    map_calls = [p for p in llm.prompts if "Section text:" in p]
+    assert len(map_calls) == 8 and 1 < llm.max_active <= 3
+    # Every section reaches the reduce step
+    assert llm.prompts[-1].startswith("SECTIONS ") and all(f"s{s}w29." in " ".join(map_calls) for s in range(8))
+
+    # A document sharing six sections only pays for the new ones
+    llm.prompts.clear()
+    summarizer.summarize(make_document(6) + "\n\n" + " ".join(f"new{w}" for w in range(30)) + ".", final_prompt)
+    assert len([p for p in llm.prompts if "Section text:" in p]) == 1
+
+def test_failed_sections_are_skipped_and_not_cached(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), "chunk_summaries")
+    calls = []
+    failures = [IOError("rate limited")]
+
+    def flaky(prompt, max_tokens, use_cache=True):
+        calls.append(prompt)
+        if "s1w0" in prompt and "Section text:" in prompt and failures:
+            raise failures.pop()
+        return "ok"
+
+    summarizer = MapReduceSummarizer(flaky, TokenChunker(word_counter, chunk_tokens=40), cache=cache, concurrency=1)
+    assert summarizer.summarize(make_document(3), final_prompt) == "ok"
+    assert len(cache) == 2
+    calls.clear()
+    summarizer.summarize(make_document(3), final_prompt)
+    assert len([p for p in calls if "Section text:" in p]) == 1 and len(cache) == 3
+
+def test_cached_sections_are_not_shared_across_models(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), "chunk_summaries")
+    chunker = TokenChunker(word_counter, chunk_tokens=40)
+    first, second = RecordingLLM(), RecordingLLM()
+    MapReduceSummarizer(first, chunker, cache=cache, model="google/gemini").summarize(make_document(4), final_prompt)
+    MapReduceSummarizer(second, chunker, cache=cache, model="openai/gpt").summarize(make_document(4), final_prompt)
+    assert len([p for p in second.prompts if "Section text:" in p]) == 4
+    assert len(cache) == 8
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    for test in (test_long_documents_are_mapped_concurrently_and_reduced, test_failed_sections_are_skipped_and_not_cached,
+                 test_cached_sections_are_not_shared_across_models):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("✅ All summarizer tests passed!")
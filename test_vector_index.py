@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the local dense paper index, run against the fixture corpus.
+SciBERT is replaced by a deterministic hashed bag-of-words embedding so no
+model download or network access is needed.
+"""
+
+import os
+import zlib
+import numpy as np
+from app.services.vector_index import VectorIndex
+from conftest import load_corpus
+
+DIM = 256
+
+def embed(text):
+    vector = np.zeros(DIM, dtype=np.float32)
+    for word in text.lower().split():
+        vector[zlib.crc32(word.strip('.,:;').encode()) % DIM] += 1.0
+    return vector
+
+def build_index(corpus, **kwargs):
+    index = VectorIndex(DIM, **kwargs)
+    index.add([p['arxiv_id'] for p in corpus], np.stack([embed(p['title'] + ' ' + p['abstract']) for p in corpus]))
+    return index
+
+def test_exact_search_finds_matching_paper():
+    corpus = load_corpus()
+    index = build_index(corpus)
+    for paper in corpus:
+        hits = index.search(embed(paper['title'] + ' ' + paper['abstract']), k=3)
+        assert hits[0][0] == paper['arxiv_id']
+        assert abs(hits[0][1] - 1.0) < 1e-5
+
+def test_delete_and_replace():
+    corpus = load_corpus()
+    index = build_index(corpus)
+    target = corpus[0]
+    index.delete([target['arxiv_id']])
+    assert target['arxiv_id'] not in index
+    assert len(index) == len(corpus) - 1
+    hits = index.search(embed(target['title'] + ' ' + target['abstract']), k=len(corpus))
+    assert target['arxiv_id'] not in [h[0] for h in hits]
+
+    # Re-adding an existing ID replaces it instead of duplicating it
+    index.add([corpus[1]['arxiv_id']], embed(corpus[1]['title'])[None, :])
+    assert len(index) == len(corpus) - 1
+
+def test_trained_index_matches_exact_search_with_full_probe():
+    corpus = load_corpus()
+    exact = build_index(corpus)
+    ivf = build_index(corpus, nlist=4)
+    ivf.train()
+    assert ivf.is_trained
+    query = embed("transformer attention language model")
+    assert ivf.search(query, k=5, nprobe=4) == exact.search(query, k=5)
+
+def test_save_and_load_round_trip(tmp_path):
+    corpus = load_corpus()
+    index = build_index(corpus, nlist=3)
+    index.train()
+    path = os.path.join(str(tmp_path), 'papers.npz')
+    index.save(path)
+
+    loaded = VectorIndex.load(path)
+    assert len(loaded) == len(index)
+    assert loaded.is_trained
+    query = embed("reinforcement learning policy")
+    assert loaded.search(query, k=4) == index.search(query, k=4)
+
+if __name__ == "__main__":
+    import tempfile
+    test_exact_search_finds_matching_paper()
+    test_delete_and_replace()
+    test_trained_index_matches_exact_search_with_full_probe()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_save_and_load_round_trip(tmp)
+    print("✅ All vector index tests passed!")
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Tests for the NumPy vector store that holds an uploaded document's chunk embeddings.
+"""
+
+import numpy as np
+from app.services.vector_store import VectorStore
+
+def test_document_vector_store_matches_full_sort():
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(200, 384)).astype(np.float32)
+    store = VectorStore([f"chunk {i}" for i in range(200)], embeddings, 'all-MiniLM-L6-v2')
+    query = rng.normal(size=384)
+
+    normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    expected = np.argsort(normalized @ (query / np.linalg.norm(query)))[-5:][::-1]
+    assert [i for i, _ in store.search(query, k=5)] == list(expected)
+    assert store.embeddings.flags['C_CONTIGUOUS'] and store.nbytes == 200 * 384 * 4
+
+    restored = VectorStore.from_dict(store.to_dict())
+    assert [i for i, _ in restored.search(query, k=5)] == list(expected)
+
+if __name__ == "__main__":
+    test_document_vector_store_matches_full_sort()
+    print("✅ All vector store tests passed!")